@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from benchmarks import BenchmarkSuite, save_results, load_results, compare, format_results, format_scaling
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time world loading, MDP solving and Q-learning.")
+    parser.add_argument('--cases', nargs='+', choices=BenchmarkSuite.cases, default=None)
+    parser.add_argument('--sizes', nargs='*', type=int, default=None, help="sides of the generated square worlds")
+    parser.add_argument('--engines', nargs='+', default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='results/benchmark.json')
+    parser.add_argument('--baseline', default=None, help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument('--min-seconds', type=float, default=0.01, help="faster cases are not compared")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    suite = BenchmarkSuite(arguments.cases, arguments.sizes, arguments.engines, arguments.repeat, arguments.seed)
+    results = suite.run(progress=lambda result: print(result, flush=True))
+    print(format_results(results))
+    print(format_scaling(results))
+    save_results(results, arguments.output)
+    if arguments.baseline is not None:
+        regressions = compare(
+            results, load_results(arguments.baseline), arguments.threshold, arguments.min_seconds
+        )
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            sys.exit(1)
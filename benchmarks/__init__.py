@@ -0,0 +1,16 @@
+from .worlds import scaled_world_data
+from .worlds import write_world
+from .worlds import bundled_worlds
+
+from .suite import BenchmarkCaseUnknownException
+from .suite import SweepLimitException
+from .suite import BenchmarkResult
+from .suite import BenchmarkSuite
+
+from .report import Regression
+from .report import save_results
+from .report import load_results
+from .report import compare
+from .report import scaling
+from .report import format_results
+from .report import format_scaling
@@ -0,0 +1,98 @@
+import json
+import os
+import platform
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.suite import BenchmarkResult
+from benchmarks.worlds import scaled_prefix
+
+
+class Regression:
+    def __init__(self, case: str, world: str, baseline_seconds: float, seconds: float):
+        self.case = case
+        self.world = world
+        self.baseline_seconds = baseline_seconds
+        self.seconds = seconds
+
+    @property
+    def ratio(self) -> float:
+        return self.seconds / self.baseline_seconds if self.baseline_seconds else float('inf')
+
+    def __repr__(self):
+        return "<Regression {} {} {:.6f}s -> {:.6f}s x{:.2f}>".format(
+            self.case, self.world, self.baseline_seconds, self.seconds, self.ratio
+        )
+
+
+def save_results(results: Sequence[BenchmarkResult], filename: str) -> None:
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': [result.to_dict() for result in results]
+    }
+    with open(filename, 'w') as f:
+        json.dump(document, f, indent=2)
+
+
+def load_results(filename: str) -> List[BenchmarkResult]:
+    with open(filename, 'r') as f:
+        return [BenchmarkResult.from_dict(result) for result in json.load(f)['results']]
+
+
+def compare(results: Sequence[BenchmarkResult], baseline: Sequence[BenchmarkResult],
+            threshold: float = 0.25, min_seconds: float = 0.01) -> List[Regression]:
+    # A case regresses when its best time is more than threshold (0.25 = 25%) slower than in the baseline.
+    # Cases faster than min_seconds are left to timer jitter, cases missing from either side are not compared.
+    baseline_seconds = {result.key: result.seconds for result in baseline}
+    return [
+        Regression(result.case, result.world, baseline_seconds[result.key], result.seconds)
+        for result in results
+        if result.key in baseline_seconds and result.seconds >= min_seconds
+        and result.seconds > baseline_seconds[result.key] * (1 + threshold)
+    ]
+
+
+def scaling(results: Sequence[BenchmarkResult]) -> Dict[str, Tuple[List[Tuple[int, float]], float or None]]:
+    # For every case the (states, seconds) points of the generated worlds sorted by states and the fitted
+    # exponent k of seconds ~ states ** k, None with fewer than two sizes.
+    curves = {}
+    for result in results:
+        if not result.world.startswith(scaled_prefix):
+            continue
+        curves.setdefault(result.case, {})[result.states] = result.seconds
+    scaled = {}
+    for case, points in curves.items():
+        points = sorted(points.items())
+        exponent = None
+        if len(points) > 1:
+            states, seconds = np.log(np.array(points, dtype=float)).T
+            exponent = float(np.polyfit(states, seconds, 1)[0])
+        scaled[case] = (points, exponent)
+    return scaled
+
+
+def format_results(results: Sequence[BenchmarkResult]) -> str:
+    lines = ['{:<28} {:<20} {:>9} {:>12} {:>14} {:<10} {:>10}'.format(
+        'case', 'world', 'states', 'seconds', 'throughput', 'unit', 'peak KiB'
+    )]
+    for result in results:
+        lines.append('{:<28} {:<20} {:>9} {:>12.6f} {:>14.1f} {:<10} {:>10.1f}'.format(
+            result.case, result.world, result.states, result.seconds, result.throughput, result.unit,
+            result.peak_memory / 1024
+        ))
+    return '\n'.join(lines)
+
+
+def format_scaling(results: Sequence[BenchmarkResult]) -> str:
+    lines = []
+    for case, (points, exponent) in sorted(scaling(results).items()):
+        curve = ', '.join('{}: {:.6f}s'.format(states, seconds) for states, seconds in points)
+        slope = 'n/a' if exponent is None else '{:.2f}'.format(exponent)
+        lines.append('{:<28} exponent {:>5}  {}'.format(case, slope, curve))
+    return '\n'.join(lines)
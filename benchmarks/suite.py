@@ -0,0 +1,257 @@
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from markov_libs import Field, World, QLearningAgent, RandomStream
+from benchmarks.worlds import scaled_world_data, write_world, bundled_worlds
+
+
+class BenchmarkCaseUnknownException(Exception):
+    pass
+
+
+class SweepLimitException(Exception):
+    pass
+
+
+class BenchmarkResult:
+    def __init__(self, case: str, world: str, states: int, seconds: float, operations: int, unit: str,
+                 peak_memory: int, runs: Sequence[float] = ()):
+        self.case = case
+        self.world = world
+        self.states = states
+        self.seconds = seconds
+        self.operations = operations
+        self.unit = unit
+        self.peak_memory = peak_memory
+        self.runs = list(runs)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.case, self.world
+
+    @property
+    def throughput(self) -> float:
+        return self.operations / self.seconds if self.seconds else float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'case': self.case,
+            'world': self.world,
+            'states': self.states,
+            'seconds': self.seconds,
+            'operations': self.operations,
+            'unit': self.unit,
+            'throughput': self.throughput,
+            'peak_memory': self.peak_memory,
+            'runs': self.runs
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BenchmarkResult':
+        return cls(
+            data['case'], data['world'], data['states'], data['seconds'], data['operations'], data['unit'],
+            data['peak_memory'], data.get('runs', ())
+        )
+
+    def __repr__(self):
+        return "<BenchmarkResult {} {} states:{} seconds:{:.6f} {:.1f} {}>".format(
+            self.case, self.world, self.states, self.seconds, self.throughput, self.unit
+        )
+
+
+class BenchmarkSuite:
+    # Every case prepares fresh state outside the timed region, then is timed `repeat` times (the best run is
+    # reported) and run once more under tracemalloc for the peak memory of the timed region alone.
+    load = 'load'
+    load_cached = 'load_cached'
+    mdp_n = 'mdp_n'
+    mdp_termination = 'mdp_termination'
+    calculate_policy = 'calculate_policy'
+    agent_move = 'agent_move'
+    q_learning = 'q_learning'
+    cases = (load, load_cached, mdp_n, mdp_termination, calculate_policy, agent_move, q_learning)
+    engine_cases = (mdp_n, mdp_termination, calculate_policy)
+    units = {
+        load: 'states/s',
+        load_cached: 'states/s',
+        mdp_n: 'backups/s',
+        mdp_termination: 'backups/s',
+        calculate_policy: 'states/s',
+        agent_move: 'steps/s',
+        q_learning: 'steps/s'
+    }
+
+    sizes = (10, 30, 100, 300, 1000)
+    engines = (World.fields_engine, World.numpy_engine)
+    sweeps = 10
+    termination_value = 0.0001
+    max_sweeps = 10000
+    moves = 100000
+    episodes = 20
+    # Cases walking Field objects in Python are skipped on worlds with more states than this.
+    fields_engine_states = 2500
+    q_learning_states = 2500
+
+    def __init__(self, cases: Sequence[str] = None, sizes: Sequence[int] = None, engines: Sequence[str] = None,
+                 repeat: int = 3, seed: int = 0, worlds_directory: str = 'worlds'):
+        cases = self.cases if cases is None else cases
+        for case in cases:
+            if case not in self.cases:
+                raise BenchmarkCaseUnknownException("Benchmark case {} is unknown. Use one of cases: {}".format(
+                    case, self.cases)
+                )
+        self.selected_cases = tuple(cases)
+        self.selected_sizes = self.sizes if sizes is None else tuple(sizes)
+        self.selected_engines = self.engines if engines is None else tuple(engines)
+        self.repeat = repeat
+        self.seed = seed
+        self.worlds_directory = worlds_directory
+
+    def run(self, progress: Callable[[BenchmarkResult], None] = None) -> List[BenchmarkResult]:
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            worlds = bundled_worlds(self.worlds_directory, directory) if self.worlds_directory else []
+            for size in self.selected_sizes:
+                data = scaled_world_data(size, seed=self.seed)
+                worlds.append((data['title'], write_world(data, os.path.join(directory, data['title'] + '.toml'))))
+            for name, filename in worlds:
+                for result in self.run_world(name, filename):
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+        return results
+
+    def run_world(self, name: str, filename: str) -> List[BenchmarkResult]:
+        world = self._load(filename)
+        states = world.board.size
+        results = []
+        for case in self.selected_cases:
+            engines = self.selected_engines if case in self.engine_cases else (None,)
+            for engine in engines:
+                if not self._runs_on(case, engine, states):
+                    continue
+                label = case if engine is None else '{}:{}'.format(case, engine)
+                try:
+                    result = self.measure(label, name, states, getattr(self, '_prepare_' + case)(filename, engine))
+                except SweepLimitException:
+                    continue
+                results.append(result)
+        return results
+
+    def _runs_on(self, case: str, engine: str, states: int) -> bool:
+        if case == self.q_learning:
+            return states <= self.q_learning_states
+        if engine == World.fields_engine:
+            return states <= self.fields_engine_states
+        return True
+
+    def measure(self, case: str, world: str, states: int,
+                prepare: Callable[[], Callable[[], int]]) -> BenchmarkResult:
+        # prepare builds fresh state and returns the timed callable, which returns the number of operations done.
+        runs = []
+        operations = 0
+        for _ in range(self.repeat):
+            timed = prepare()
+            gc.collect()
+            start = time.perf_counter()
+            operations = timed()
+            runs.append(time.perf_counter() - start)
+        timed = prepare()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            timed()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return BenchmarkResult(case, world, states, min(runs), operations, self.units[case.split(':')[0]],
+                               peak_memory, runs)
+
+    @staticmethod
+    def _load(filename: str, cache: bool = False) -> World:
+        world = World()
+        world.load(filename, cache)
+        return world
+
+    @staticmethod
+    def _backed_up_states(world: World) -> int:
+        return int((~world.board.mask(Field.forbidden)).sum())
+
+    def _limit_sweeps(self, iteration: int, residual: float) -> None:
+        if iteration >= self.max_sweeps:
+            raise SweepLimitException("No convergence after {} sweeps, residual {}".format(iteration, residual))
+
+    def _solve(self, world: World, engine: str) -> int:
+        return world.mdp(termination_value=self.termination_value, engine=engine, callback=self._limit_sweeps)
+
+    def _prepare_load(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def timed() -> int:
+            return self._load(filename).board.size
+        return lambda: timed
+
+    def _prepare_load_cached(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        # The first load compiles the cache file, the timed loads only read it.
+        self._load(filename, cache=True)
+
+        def timed() -> int:
+            return self._load(filename, cache=True).board.size
+        return lambda: timed
+
+    def _prepare_mdp_n(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def prepare() -> Callable[[], int]:
+            world = self._load(filename)
+            backups = self._backed_up_states(world)
+            return lambda: world.mdp(n=self.sweeps, engine=engine) * backups
+        return prepare
+
+    def _prepare_mdp_termination(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def prepare() -> Callable[[], int]:
+            world = self._load(filename)
+            backups = self._backed_up_states(world)
+            return lambda: self._solve(world, engine) * backups
+        return prepare
+
+    def _prepare_calculate_policy(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def prepare() -> Callable[[], int]:
+            world = self._load(filename)
+            self._solve(world, engine)
+
+            def timed() -> int:
+                world.calculate_policy(engine)
+                return world.board.size
+            return timed
+        return prepare
+
+    def _prepare_agent_move(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def prepare() -> Callable[[], int]:
+            world = self._load(filename)
+            world.random = RandomStream(self.seed)
+            action_ids = np.random.default_rng(self.seed + 1).integers(len(World.actions), size=self.moves)
+            actions = [World.actions[action] for action in action_ids.tolist()]
+            start = world.start_field()
+
+            def timed() -> int:
+                field = start
+                for action in actions:
+                    field = world.agent_move(field, action)
+                    if field.is_terminal():
+                        field = start
+                return len(actions)
+            return timed
+        return prepare
+
+    def _prepare_q_learning(self, filename: str, engine: str) -> Callable[[], Callable[[], int]]:
+        def prepare() -> Callable[[], int]:
+            agent = QLearningAgent(self._load(filename), seed=self.seed)
+
+            def timed() -> int:
+                agent.learning(self.episodes)
+                return int(agent.actions_count.sum())
+            return timed
+        return prepare
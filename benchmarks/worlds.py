@@ -0,0 +1,34 @@
+import os
+import shutil
+from typing import List, Tuple
+
+import toml
+
+from markov_libs import WorldGenerator
+
+scaled_prefix = 'scaled'
+
+
+def scaled_world_data(size: int, forbidden_density: float = 0.1, seed: int = 0) -> dict:
+    # A size x size open world from WorldGenerator in the format of worlds/*.toml.
+    title = '{}{}x{}'.format(scaled_prefix, size, size)
+    return WorldGenerator(size, size, seed, forbidden_density=forbidden_density, title=title).data()
+
+
+def write_world(data: dict, filename: str) -> str:
+    with open(filename, 'w') as f:
+        f.write(toml.dumps(data))
+    return filename
+
+
+def bundled_worlds(directory: str, copy_to: str = None) -> List[Tuple[str, str]]:
+    # With copy_to the worlds are copied there first, so cache files written while loading stay out of directory.
+    worlds = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.toml'):
+            continue
+        filename = os.path.join(directory, name)
+        if copy_to is not None:
+            filename = shutil.copy(filename, os.path.join(copy_to, name))
+        worlds.append((os.path.splitext(name)[0], filename))
+    return worlds
@@ -1,3 +1,16 @@
+from . import storage
+from .storage import StorageInUseException
+
+from .profiler import ProfilerNotRecordingException
+from .profiler import Profiler
+from .profiler import profile_phase
+
+from .utility_history import HistoryModeUnknownException
+from .utility_history import HistoryNotRecordedException
+from .utility_history import UtilityHistory
+
+from .board import Board
+
 from .field import FieldStateUnknownException
 from .field import FieldRequiresValueException
 from .field import EmptyUtilityHistoryException
@@ -7,9 +20,48 @@ from .world_factory import WorldFactory
 from .world_factory import BoardEmptyException
 from .world_factory import BoardNoDefaultException
 
+from .random_stream import RandomStream
+
+from .world_cache import WorldCacheException
+from .world_cache import WorldCache
+
+from .world_generator import WorldLayoutUnknownException
+from .world_generator import WorldGenerator
+
+from .transition_table import TransitionTable
+from .array_engine import ArrayEngine
+from .sparse_engine import CsrMatrix
+from .sparse_engine import SparseEngine
+from .prioritized_sweeping import PrioritizedSweeping
+
+from .exporter import ExportFormatUnknownException
+from .exporter import StreamingExporter
+from .exporter import gnuplot_header
+from .exporter import gnuplot_lines
+from .exporter import write_npy_header
+
+from .telemetry import EpisodeTelemetry
+
 from .world import FieldDoesNotExistException
 from .world import FieldForbiddenException
 from .world import UtilitiesNotCalculated
 from .world import World
 
+from .batch_solver import BatchResult
+from .batch_solver import BatchSolver
+
+from .replay_buffer import ReplayBufferEmptyException
+from .replay_buffer import ReplayBuffer
+from .batch_q_learning import BatchQLearning
+from .q_learning_agent import TieBreakingUnknownException
 from .q_learning_agent import QLearningAgent
+
+from .convergence import QDeltaConvergence
+from .convergence import PolicyConvergence
+from .convergence import MdpDistanceConvergence
+
+from .experiment_runner import AlgorithmUnknownException
+from .experiment_runner import Job
+from .experiment_runner import JobResult
+from .experiment_runner import ExperimentRunner
+from .experiment_runner import run_job
@@ -0,0 +1,111 @@
+import numpy as np
+
+from markov_libs import Field
+
+
+class ArrayEngine:
+    # States follow the cell order of World.board; successors are shared with World.transitions.
+    def __init__(self, world):
+        board = world.board
+        self.world = world
+        self.board = board
+        self.size = board.size
+        self.probability = world.transitions.probability
+        self._rewards = board.rewards()
+        self._rewards_revision = board.revision
+        self.terminal = board.mask(Field.terminal)
+        self.forbidden = board.mask(Field.forbidden)
+        self.updatable = ~(self.terminal | self.forbidden)
+        self.successors = world.transitions.successors
+
+    @property
+    def gamma(self) -> float:
+        # Read from the world, which keeps its engines across solves.
+        return self.world.gamma
+
+    @property
+    def rewards(self) -> np.ndarray:
+        # Rebuilt after a reward was changed on the board, e.g. through Field.reward.
+        if self._rewards_revision != self.board.revision:
+            self._rewards = self.board.rewards()
+            self._rewards_revision = self.board.revision
+        return self._rewards
+
+    def initial_utilities(self, history, initial_utility: float) -> np.ndarray:
+        utilities = history.latest()
+        utilities[np.isnan(utilities)] = initial_utility
+        utilities[self.terminal] = self.rewards[self.terminal]
+        utilities[self.forbidden] = 0.0
+        return utilities
+
+    def action_values(self, utilities: np.ndarray) -> np.ndarray:
+        # Summed outcome by outcome so every backup matches World.pu_sum_for_action bit for bit.
+        values = self.probability[0] * utilities[self.successors[:, :, 0]]
+        for outcome in range(1, len(self.probability)):
+            values = values + self.probability[outcome] * utilities[self.successors[:, :, outcome]]
+        values[~self.updatable] = 0.0
+        return values
+
+    def backup(self, utilities: np.ndarray) -> np.ndarray:
+        new_utilities = self.rewards + self.gamma * self.action_values(utilities).max(axis=1)
+        new_utilities[self.forbidden] = 0.0
+        return new_utilities
+
+    def residual(self, old_utilities: np.ndarray, new_utilities: np.ndarray) -> float:
+        if not self.updatable.any():
+            return 0.0
+        return float(np.abs(new_utilities - old_utilities)[self.updatable].max())
+
+    def policy(self, utilities: np.ndarray) -> np.ndarray:
+        return self.action_values(utilities).argmax(axis=1)
+
+    def policy_successors(self, policy: np.ndarray) -> np.ndarray:
+        return self.successors[np.arange(self.size), policy]
+
+    def policy_backup(self, utilities: np.ndarray, policy: np.ndarray) -> np.ndarray:
+        successors = self.policy_successors(policy)
+        values = self.probability[0] * utilities[successors[:, 0]]
+        for outcome in range(1, len(self.probability)):
+            values = values + self.probability[outcome] * utilities[successors[:, outcome]]
+        new_utilities = self.rewards + self.gamma * values
+        new_utilities[self.terminal] = self.rewards[self.terminal]
+        new_utilities[self.forbidden] = 0.0
+        return new_utilities
+
+    def evaluate_exact(self, policy: np.ndarray) -> np.ndarray:
+        # Solves U = R + gamma * P_policy U over updatable states; terminal utilities are fixed rewards.
+        states = np.flatnonzero(self.updatable)
+        column_of = np.full(self.size, -1)
+        column_of[states] = np.arange(states.size)
+        successors = self.policy_successors(policy)[states]
+        matrix = np.eye(states.size)
+        constants = self.rewards[states].copy()
+        for outcome, probability in enumerate(self.probability):
+            targets = successors[:, outcome]
+            inside = self.updatable[targets]
+            np.add.at(matrix, (np.flatnonzero(inside), column_of[targets[inside]]), -self.gamma * probability)
+            constants[~inside] += self.gamma * probability * self.rewards[targets[~inside]]
+        solution = np.linalg.solve(matrix, constants)
+        if not np.all(np.isfinite(solution)) or not np.allclose(matrix @ solution, constants):
+            raise np.linalg.LinAlgError("Policy does not reach a terminal state")
+        utilities = np.zeros(self.size)
+        utilities[states] = solution
+        utilities[self.terminal] = self.rewards[self.terminal]
+        return utilities
+
+    def evaluate_iterative(self, policy: np.ndarray, utilities: np.ndarray,
+                           sweeps: int, termination_value: float = 0.0) -> np.ndarray:
+        for _ in range(sweeps):
+            new_utilities = self.policy_backup(utilities, policy)
+            residual = self.residual(utilities, new_utilities)
+            utilities = new_utilities
+            if residual < termination_value:
+                break
+        return utilities
+
+    def improve_policy(self, utilities: np.ndarray, policy: np.ndarray) -> np.ndarray:
+        values = self.action_values(utilities)
+        greedy = values.argmax(axis=1)
+        states = np.arange(self.size)
+        keep = values[states, policy] >= values[states, greedy]
+        return np.where(keep, policy, greedy)
@@ -0,0 +1,93 @@
+import numpy as np
+
+from markov_libs import Field, World
+
+
+class BatchQLearning:
+    # Advances `walkers` episodes in lockstep. Every walker learns into q_values[tables[walker]], so walkers can
+    # either own a table each (independent agents) or share one (parallel episodes of a single agent). Updates of
+    # the same (state, action) within one step are accumulated: with alpha = 1 / count, k updates towards targets
+    # t_1..t_k give Q + (sum(t) - k * Q) / (count + k), the same as applying them one after another.
+    initial_action = World.up
+    block_size = 1024
+
+    def __init__(self, world: World, q_values: np.ndarray, actions_count: np.ndarray, tables: np.ndarray,
+                 seed: int = None):
+        self.world = world
+        self.q_values = q_values
+        self.actions_count = actions_count
+        self.tables = tables
+        self.random = np.random.default_rng(seed)
+        self.terminal = world.board.mask(Field.terminal)
+        self.rewards = world.board.rewards()
+        self.successors = world.transitions.successors
+        self.thresholds = np.array(world.transitions.cumulative_probability)
+        self.start_index = world.field_index(world.start_field())
+        self._blocks = {}
+
+    @classmethod
+    def independent(cls, world: World, agents: int, seed: int = None) -> 'BatchQLearning':
+        board = world.board
+        terminal = board.mask(Field.terminal)
+        q_values = np.zeros((agents, board.size, len(World.actions)))
+        q_values[:, terminal] = board.rewards()[terminal, None]
+        actions_count = np.zeros(q_values.shape, dtype=np.int64)
+        return cls(world, q_values, actions_count, np.arange(agents), seed)
+
+    @classmethod
+    def shared(cls, agent, walkers: int, seed: int = None) -> 'BatchQLearning':
+        return cls(agent.world, agent.q_values[None], agent.actions_count[None], np.zeros(walkers, dtype=np.intp), seed)
+
+    def _draw(self, name: str, walkers: np.ndarray) -> np.ndarray:
+        # Random numbers are drawn a block of steps at a time and handed out one step (row) per call.
+        block, row = self._blocks.get(name, (None, self.block_size))
+        if row == self.block_size:
+            size = (self.block_size, self.tables.size)
+            if name == 'action':
+                block = self.random.integers(len(World.actions), size=size)
+            else:
+                block = self.random.random(size)
+            row = 0
+        self._blocks[name] = (block, row + 1)
+        return block[row, walkers]
+
+    def learning(self, iterations: int, per_walker: bool = True):
+        walkers = self.tables.size
+        if per_walker:
+            quota = np.full(walkers, iterations)
+        else:
+            quota = np.full(walkers, iterations // walkers)
+            quota[:iterations % walkers] += 1
+        n_states, n_actions = self.q_values.shape[1:]
+        flat_q = self.q_values.reshape(-1)
+        flat_count = self.actions_count.reshape(-1)
+        initial_action = World.action_ids[self.initial_action]
+        state = np.full(walkers, self.start_index)
+        optimal_action = np.full(walkers, initial_action)
+        episodes = np.zeros(walkers, dtype=np.int64)
+        active = np.flatnonzero(episodes < quota)
+        while active.size:
+            explore = self._draw('explore', active) < self.world.epsilon
+            action = np.where(explore, self._draw('action', active), optimal_action[active])
+            outcome = np.searchsorted(self.thresholds, self._draw('move', active), side='right')
+            current = state[active]
+            tables = self.tables[active]
+            next_state = self.successors[current, action, outcome]
+            next_q_values = self.q_values[tables, next_state]
+            targets = self.rewards[current] + self.world.gamma * next_q_values.max(axis=1)
+
+            cells = (tables * n_states + current) * n_actions + action
+            unique_cells, inverse, repeats = np.unique(cells, return_inverse=True, return_counts=True)
+            target_sums = np.bincount(inverse.ravel(), weights=targets)
+            counts = flat_count[unique_cells] + repeats
+            q_values = flat_q[unique_cells]
+            flat_q[unique_cells] = q_values + (target_sums - repeats * q_values) / counts
+            flat_count[unique_cells] = counts
+
+            optimal_action[active] = self.q_values[tables, next_state].argmax(axis=1)
+            state[active] = next_state
+            finished = active[self.terminal[next_state]]
+            episodes[finished] += 1
+            state[finished] = self.start_index
+            optimal_action[finished] = initial_action
+            active = np.flatnonzero(episodes < quota)
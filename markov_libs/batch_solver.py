@@ -0,0 +1,128 @@
+import itertools
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from markov_libs import Field, World
+
+
+class BatchResult:
+    def __init__(self, title: str, parameters: dict, utilities: np.ndarray, policy: List[List[str]], iterations: int):
+        self.title = title
+        self.parameters = parameters
+        self.utilities = utilities
+        self.policy = policy
+        self.iterations = iterations
+
+    def __repr__(self):
+        return "<BatchResult title:{} parameters:{} iterations:{}>".format(
+            self.title,
+            self.parameters,
+            self.iterations
+        )
+
+
+class BatchSolver:
+    # Solves many worlds as one stacked value iteration; worlds sharing a layout share one successor table.
+    def __init__(self, termination_value: float = 0.0001, max_iterations: int = 100000):
+        self.termination_value = termination_value
+        self.max_iterations = max_iterations
+
+    @staticmethod
+    def _layout_key(world: World) -> Tuple:
+        engine = world.array_engine()
+        return world.max_x + 1, world.max_y + 1, engine.terminal.tobytes(), engine.forbidden.tobytes()
+
+    def solve(self, worlds: Sequence[World]) -> List[BatchResult]:
+        groups = {}
+        for index, world in enumerate(worlds):
+            groups.setdefault(self._layout_key(world), []).append(index)
+        results = [None] * len(worlds)
+        for indices in groups.values():
+            group = [worlds[index] for index in indices]
+            engine = group[0].array_engine()
+            rewards = np.array([world.array_engine().rewards for world in group])
+            gammas = np.array([world.gamma for world in group], dtype=float)
+            probabilities = np.array([world.probability for world in group], dtype=float)
+            utilities, policy, iterations = self._solve_layout(engine, rewards, gammas, probabilities)
+            for row, (index, world) in enumerate(zip(indices, group)):
+                self._apply(world, utilities[row], policy[row])
+                results[index] = self._result(
+                    world, self._parameters(world.gamma, world.data['reward'], world.probability),
+                    utilities[row], policy[row], iterations[row]
+                )
+        return results
+
+    def solve_parameters(self, world: World, gamma: Sequence[float] = None, reward: Sequence[float] = None,
+                         probability: Sequence[Sequence[float]] = None) -> List[BatchResult]:
+        engine = world.array_engine()
+        default_reward = world.board.mask(Field.normal) | world.board.mask(Field.start)
+        variants = list(itertools.product(
+            gamma if gamma is not None else [world.gamma],
+            reward if reward is not None else [world.data['reward']],
+            probability if probability is not None else [world.probability]
+        ))
+        rewards = np.array([
+            np.where(default_reward, variant_reward, engine.rewards) for _, variant_reward, _ in variants
+        ])
+        gammas = np.array([variant_gamma for variant_gamma, _, _ in variants], dtype=float)
+        probabilities = np.array([variant_probability for _, _, variant_probability in variants], dtype=float)
+        utilities, policy, iterations = self._solve_layout(engine, rewards, gammas, probabilities)
+        return [
+            self._result(world, self._parameters(*variant), utilities[row], policy[row], iterations[row])
+            for row, variant in enumerate(variants)
+        ]
+
+    @staticmethod
+    def _parameters(gamma: float, reward: float, probability: Sequence[float]) -> Dict:
+        return {'gamma': gamma, 'reward': reward, 'probability': list(probability)}
+
+    def _solve_layout(self, engine, rewards: np.ndarray, gammas: np.ndarray,
+                      probabilities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        updatable = engine.updatable
+        utilities = np.where(engine.terminal, rewards, 0.0)
+        iterations = np.zeros(len(rewards), dtype=np.int64)
+        active = np.ones(len(rewards), dtype=bool)
+        while active.any() and iterations.max() < self.max_iterations:
+            rows = np.flatnonzero(active)
+            current = utilities[rows]
+            values = self._action_values(engine, current, probabilities[rows])
+            new_utilities = rewards[rows] + gammas[rows, None] * values.max(axis=2)
+            new_utilities[:, engine.forbidden] = 0.0
+            if updatable.any():
+                residual = np.abs(new_utilities - current)[:, updatable].max(axis=1)
+            else:
+                residual = np.zeros(rows.size)
+            utilities[rows] = new_utilities
+            iterations[rows] += 1
+            active[rows[residual < self.termination_value]] = False
+        policy = self._action_values(engine, utilities, probabilities).argmax(axis=2)
+        return utilities, policy, iterations
+
+    @staticmethod
+    def _action_values(engine, utilities: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        successors = engine.successors
+        values = probabilities[:, 0, None, None] * utilities[:, successors[:, :, 0]]
+        for outcome in range(1, probabilities.shape[1]):
+            values = values + probabilities[:, outcome, None, None] * utilities[:, successors[:, :, outcome]]
+        values[:, ~engine.updatable] = 0.0
+        return values
+
+    @staticmethod
+    def _apply(world: World, utilities: np.ndarray, policy: np.ndarray) -> None:
+        engine = world.array_engine()
+        world.history.append_row(utilities, np.flatnonzero(~engine.forbidden))
+        world.board.policy_ids[:] = np.where(engine.updatable, policy, world.board.no_policy)
+
+    @staticmethod
+    def _result(world: World, parameters: dict, utilities: np.ndarray, policy: np.ndarray,
+                iterations: int) -> BatchResult:
+        engine = world.array_engine()
+        shape = (world.max_y + 1, world.max_x + 1)
+        grid = np.where(engine.forbidden, np.nan, utilities).reshape(shape)
+        actions = [world.actions[action] if engine.updatable[i] else None for i, action in enumerate(policy)]
+        return BatchResult(
+            world.title, parameters, grid,
+            [actions[row * shape[1]:(row + 1) * shape[1]] for row in range(shape[0])],
+            int(iterations)
+        )
@@ -0,0 +1,195 @@
+from typing import List
+
+import numpy as np
+
+from markov_libs.utility_history import UtilityHistory
+
+
+class Board:
+    # Structure of arrays for a width x height grid, cell index = y * width + x. Rewards are stored as ids into
+    # reward_values, so every reward keeps the exact value (and int or float type) it was given. Field objects are
+    # views created on demand with field_class and cached, so a board only pays for the views it hands out.
+    normal = "N"
+    start = "S"
+    forbidden = "F"
+    terminal = "T"
+    special = "B"
+    states = (normal, start, forbidden, terminal, special)
+    normal_id, start_id, forbidden_id, terminal_id, special_id = range(len(states))
+
+    actions = ('^', '<', '>', 'v')
+
+    no_reward = -1
+    no_policy = -1
+
+    field_class = None
+
+    def __init__(self, width: int, height: int, reward: float = None, origin: tuple = (0, 0)):
+        size = width * height
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.state_ids = np.zeros(size, dtype=np.uint8)
+        self.reward_ids = np.full(size, self.no_reward if reward is None else 0, dtype=np.int32)
+        self.reward_values = [reward]
+        self._reward_ids = {(type(reward), reward): 0}
+        self.policy_ids = np.full(size, self.no_policy, dtype=np.int8)
+        # Bumped by set_cell, so arrays derived from states and rewards know when to rebuild.
+        self.revision = 0
+        self.history = None
+        self._q_values = None
+        self._actions_count = None
+        # Greedy actions cached by the learning agent, which decide ties between equal Q-values.
+        self.greedy_actions = None
+        self._views = [None] * size
+        self._fields = None
+
+    @classmethod
+    def from_arrays(cls, width: int, height: int, state_ids: np.ndarray, reward_ids: np.ndarray,
+                    reward_values: list) -> 'Board':
+        board = cls(width, height)
+        board.state_ids = state_ids.reshape(-1)
+        board.reward_ids = reward_ids.reshape(-1)
+        board.reward_values = list(reward_values)
+        board._reward_ids = {(type(value), value): i for i, value in enumerate(board.reward_values)}
+        return board
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y: int) -> list:
+        return [self.field(x, y) for x in range(self.width)]
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def field(self, x: int, y: int):
+        return self.field_at(y * self.width + x)
+
+    def field_at(self, index: int):
+        view = self._views[index]
+        if view is None:
+            view = self.field_class.view(self, index)
+            self._views[index] = view
+        return view
+
+    def fields(self) -> List:
+        if self._fields is None:
+            self._fields = [self.field_at(index) for index in range(self.size)]
+        return self._fields
+
+    def set_cell(self, x: int, y: int, state: str, reward: float = None) -> None:
+        index = self.index(x, y)
+        self.state_ids[index] = self.states.index(state)
+        self._set_reward_id(index, reward)
+        if self._q_values is not None:
+            self._clean_q_rows(np.array([index]))
+        if self._views[index] is not None:
+            self._views[index].refresh()
+
+    def set_reward(self, index: int, reward: float = None) -> None:
+        # Keeps the learned Q-values; only a terminal cell, whose Q-values are its reward, is cleaned.
+        self._set_reward_id(index, reward)
+        if self._q_values is not None and self.state_ids.item(index) == self.terminal_id:
+            self._clean_q_rows(np.array([index]))
+        if self._views[index] is not None:
+            self._views[index].refresh()
+
+    def _set_reward_id(self, index: int, reward: float = None) -> None:
+        if reward is None:
+            self.reward_ids[index] = self.no_reward
+        else:
+            key = (type(reward), reward)
+            if key not in self._reward_ids:
+                self._reward_ids[key] = len(self.reward_values)
+                self.reward_values.append(reward)
+            self.reward_ids[index] = self._reward_ids[key]
+        self.revision += 1
+
+    def state(self, index: int) -> str:
+        return self.states[self.state_ids.item(index)]
+
+    def reward(self, index: int):
+        reward_id = self.reward_ids.item(index)
+        return None if reward_id == self.no_reward else self.reward_values[reward_id]
+
+    def mask(self, state: str) -> np.ndarray:
+        return self.state_ids == self.states.index(state)
+
+    def rewards(self) -> np.ndarray:
+        # Float rewards per cell, 0.0 where a cell has no reward.
+        values = np.array([0.0 if value is None else value for value in self.reward_values] + [0.0], dtype=float)
+        return values[self.reward_ids]
+
+    def policy(self, index: int) -> str or None:
+        policy_id = self.policy_ids.item(index)
+        return None if policy_id == self.no_policy else self.actions[policy_id]
+
+    def set_policy(self, index: int, action: str or None) -> None:
+        self.policy_ids[index] = self.no_policy if action is None else self.actions.index(action)
+
+    def history_store(self) -> UtilityHistory:
+        if self.history is None:
+            self.history = UtilityHistory(self.size)
+        return self.history
+
+    def bind_history(self, history: UtilityHistory, carry_over: bool = True) -> None:
+        # Values already recorded on the board are carried over into the new history, unless it is attached
+        # read-only to the history of another process.
+        if carry_over and self.history is not None:
+            for index in np.flatnonzero(self.history.count).tolist():
+                for value in self.history.values(index):
+                    history.append(index, value)
+        self.history = history
+
+    @property
+    def q_values(self) -> np.ndarray:
+        if self._q_values is None:
+            self.bind_q_values(
+                np.zeros((self.size, len(self.actions))), np.zeros((self.size, len(self.actions)), dtype=np.int64)
+            )
+        return self._q_values
+
+    @property
+    def actions_count(self) -> np.ndarray:
+        if self._actions_count is None:
+            self.q_values
+        return self._actions_count
+
+    def bind_q_values(self, q_values: np.ndarray, actions_count: np.ndarray) -> None:
+        if self._q_values is None:
+            self._q_values = q_values
+            self._actions_count = actions_count
+            self.clean_q()
+            return
+        q_values[:] = self._q_values
+        actions_count[:] = self._actions_count
+        self._q_values = q_values
+        self._actions_count = actions_count
+
+    def attach_q_values(self, q_values: np.ndarray, actions_count: np.ndarray) -> None:
+        # Shows arrays written elsewhere, nothing is copied into them.
+        if q_values.shape != (self.size, len(self.actions)) or actions_count.shape != q_values.shape:
+            raise AttributeError("Q-table of shape {} does not fit a board of {} fields".format(
+                q_values.shape, self.size)
+            )
+        self._q_values = q_values
+        self._actions_count = actions_count
+
+    def clean_q(self) -> None:
+        self.q_values
+        self._clean_q_rows(np.arange(self.size))
+
+    def clean_q_row(self, index: int) -> None:
+        self.q_values
+        self._clean_q_rows(np.array([index]))
+
+    def _clean_q_rows(self, rows: np.ndarray) -> None:
+        terminal = self.state_ids[rows] == self.terminal_id
+        self._q_values[rows] = 0.0
+        self._q_values[rows[terminal]] = self.rewards()[rows[terminal], None]
+        self._actions_count[rows] = 0
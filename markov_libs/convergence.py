@@ -0,0 +1,89 @@
+from typing import Dict, Mapping
+
+import numpy as np
+
+from markov_libs import Field, World
+
+
+class QDeltaConvergence:
+    # Converged when no Q-value moved by more than `tolerance` over the last `window` episodes.
+    def __init__(self, tolerance: float, window: int = 1000):
+        self.tolerance = tolerance
+        self.window = window
+        self._snapshot = None
+        self._snapshot_episode = 0
+
+    def reset(self, agent) -> None:
+        self._snapshot = agent.q_values.copy()
+        self._snapshot_episode = agent.episode
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'snapshot': self._snapshot, 'snapshot_episode': np.array(self._snapshot_episode)}
+
+    def set_state(self, state: Mapping[str, np.ndarray]) -> None:
+        self._snapshot = np.array(state['snapshot'])
+        self._snapshot_episode = int(state['snapshot_episode'])
+
+    def check(self, agent, episode: int) -> bool:
+        if episode - self._snapshot_episode < self.window:
+            return False
+        delta = np.abs(agent.q_values - self._snapshot).max()
+        self._snapshot = agent.q_values.copy()
+        self._snapshot_episode = episode
+        return delta < self.tolerance
+
+
+class PolicyConvergence:
+    # Converged when the greedy policy did not change for `episodes` episodes. The policy is only compared at
+    # the checks, so a change that is undone between two checks goes unnoticed.
+    def __init__(self, episodes: int = 1000):
+        self.episodes = episodes
+        self._policy = None
+        self._stable_since = 0
+
+    @staticmethod
+    def _greedy_policy(agent) -> np.ndarray:
+        return agent.q_values.argmax(axis=1)[~np.array(agent.terminal)]
+
+    def reset(self, agent) -> None:
+        self._policy = self._greedy_policy(agent)
+        self._stable_since = agent.episode
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'policy': self._policy, 'stable_since': np.array(self._stable_since)}
+
+    def set_state(self, state: Mapping[str, np.ndarray]) -> None:
+        self._policy = np.array(state['policy'])
+        self._stable_since = int(state['stable_since'])
+
+    def check(self, agent, episode: int) -> bool:
+        policy = self._greedy_policy(agent)
+        if not np.array_equal(policy, self._policy):
+            self._policy = policy
+            self._stable_since = episode
+        return episode - self._stable_since >= self.episodes
+
+
+class MdpDistanceConvergence:
+    # Converged when max_a Q is within `tolerance` of the utilities of a world solved with World.mdp.
+    def __init__(self, solved_world: World, tolerance: float):
+        board = solved_world.board
+        self.updatable = ~(board.mask(Field.terminal) | board.mask(Field.forbidden))
+        self.utilities = np.where(self.updatable, solved_world.history.latest(), 0.0)
+        self.tolerance = tolerance
+
+    def reset(self, agent) -> None:
+        pass
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def set_state(self, state: Mapping[str, np.ndarray]) -> None:
+        pass
+
+    def distance(self, agent) -> float:
+        values = agent.q_values.max(axis=1)
+        return float(np.abs(values - self.utilities)[self.updatable].max())
+
+    def check(self, agent, episode: int) -> bool:
+        return self.distance(agent) < self.tolerance
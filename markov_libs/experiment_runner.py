@@ -0,0 +1,74 @@
+import concurrent.futures
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+from markov_libs import Field, World, QLearningAgent
+
+
+class AlgorithmUnknownException(Exception):
+    pass
+
+
+class Job:
+    mdp = 'mdp'
+    q_learning = 'qlearning'
+    algorithms = (mdp, q_learning)
+
+    def __init__(self, filename: str, algorithm: str, parameters: dict = None, seed: int = 0):
+        if algorithm not in self.algorithms:
+            raise AlgorithmUnknownException("Algorithm {} is unknown. Use one of algorithms: {}".format(
+                algorithm, self.algorithms)
+            )
+        self.filename = filename
+        self.algorithm = algorithm
+        self.parameters = parameters or {}
+        self.seed = seed
+
+    def __repr__(self):
+        return "<Job {} {} parameters:{} seed:{}>".format(self.algorithm, self.filename, self.parameters, self.seed)
+
+
+class JobResult:
+    def __init__(self, job: Job, output: str, values: np.ndarray, elapsed: float):
+        self.job = job
+        self.output = output
+        self.values = values
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "<JobResult {} elapsed:{:.3f}s>".format(self.job, self.elapsed)
+
+
+def run_job(job: Job) -> JobResult:
+    start = time.perf_counter()
+    world = World()
+    world.load(job.filename)
+    if job.algorithm == Job.mdp:
+        parameters = dict(job.parameters)
+        engine = parameters.get('engine', World.fields_engine)
+        if 'n' not in parameters and 'termination_value' not in parameters and 'max_error' not in parameters:
+            parameters['termination_value'] = 0.0001
+        world.mdp(**parameters)
+        world.calculate_policy(engine=engine)
+        output = str(world)
+        board = world.board
+        values = np.where(board.mask(Field.terminal), board.rewards(), world.history.latest())
+        values[board.mask(Field.forbidden)] = np.nan
+    else:
+        agent = QLearningAgent(world, seed=job.seed)
+        agent.learning(**job.parameters)
+        output = str(agent)
+        values = world.board.q_values.copy()
+    return JobResult(job, output, values, time.perf_counter() - start)
+
+
+class ExperimentRunner:
+    def __init__(self, max_workers: int = None, executor_class=concurrent.futures.ProcessPoolExecutor):
+        self.max_workers = max_workers
+        self.executor_class = executor_class
+
+    def run(self, jobs: Sequence[Job]) -> List[JobResult]:
+        with self.executor_class(max_workers=self.max_workers) as executor:
+            return list(executor.map(run_job, jobs))
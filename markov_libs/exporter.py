@@ -0,0 +1,136 @@
+import struct
+from typing import Iterable, List
+
+import numpy as np
+
+from markov_libs import Field
+
+
+class ExportFormatUnknownException(Exception):
+    pass
+
+
+def gnuplot_header(labels: Iterable[str]) -> str:
+    return 'iteration ' + ''.join(label + ' ' for label in labels) + '\n'
+
+
+def gnuplot_lines(iterations: Iterable[int], rows: Iterable[List[float]]) -> List[str]:
+    return [
+        str(iteration) + ' ' + ''.join([repr(value) + ' ' for value in row]) + '\n'
+        for iteration, row in zip(iterations, rows)
+    ]
+
+
+def write_npy_header(f, dtype: np.dtype, shape: tuple, size: int = 128) -> None:
+    # The header is padded to a fixed size so it can be rewritten with the final row count while rows are appended.
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': shape,
+    })
+    magic = np.lib.format.magic(1, 0)
+    length = size - len(magic) - 2
+    header = header.ljust(length - 1) + '\n'
+    position = f.tell()
+    f.seek(0)
+    f.write(magic + struct.pack('<H', length) + header.encode('latin1'))
+    if position:
+        f.seek(position)
+
+
+class StreamingExporter:
+    # Writes the utilities of every recorded iteration while the solver runs. Pass the exporter as the mdp
+    # callback; rows are collected in a preallocated block and written out a block at a time.
+    gnuplot = 'gnuplot'
+    csv = 'csv'
+    npy = 'npy'
+    formats = (gnuplot, csv, npy)
+
+    block_rows = 256
+    npy_header_size = 128
+
+    def __init__(self, world, filename: str, export_format: str = gnuplot, step: int = 1):
+        if export_format not in self.formats:
+            raise ExportFormatUnknownException("Export format {} is unknown. Use one of formats: {}".format(
+                export_format, self.formats)
+            )
+        if step < 1:
+            raise AttributeError("Export step has to be positive, got {}".format(step))
+        self.world = world
+        self.filename = filename
+        self.format = export_format
+        self.step = step
+        board = world.board
+        self.columns = np.flatnonzero(~board.mask(Field.forbidden))
+        self.labels = [
+            '({x},{y})'.format(x=x + 1, y=y + 1)
+            for x, y in zip((self.columns % board.width).tolist(), (self.columns // board.width).tolist())
+        ]
+        self.rows = 0
+        self._block = np.empty((self.block_rows, self.columns.size + 1))
+        self._block_index = 0
+        self._file = None
+
+    def open(self) -> 'StreamingExporter':
+        self._file = open(self.filename, 'wb' if self.format == self.npy else 'w')
+        if self.format == self.gnuplot:
+            self._file.write(gnuplot_header(self.labels))
+        elif self.format == self.csv:
+            self._file.write(','.join(['iteration'] + ['"{}"'.format(label) for label in self.labels]) + '\n')
+        else:
+            self._write_npy_header()
+        # Row 0 holds the values the solver starts from; fields without a value yet start at the initial utility.
+        values = self.world.history.latest()
+        missing = np.isnan(values)
+        terminal = self.world.board.mask(Field.terminal)
+        values[missing] = np.where(terminal, self.world.board.rewards(), self.world.initial_utility)[missing]
+        self._append(0, values)
+        return self
+
+    def __enter__(self) -> 'StreamingExporter':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __call__(self, iteration: int, residual: float) -> None:
+        if iteration % self.step == 0:
+            self._append(iteration, self.world.history.latest())
+
+    def _append(self, iteration: int, values: np.ndarray) -> None:
+        block = self._block[self._block_index]
+        block[0] = iteration
+        block[1:] = values[self.columns]
+        self._block_index += 1
+        if self._block_index == self.block_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        block = self._block[:self._block_index]
+        if self.format == self.npy:
+            self._file.write(block.tobytes())
+            self.rows += self._block_index
+            self._write_npy_header()
+        else:
+            iterations = block[:, 0].astype(np.int64).tolist()
+            rows = block[:, 1:].tolist()
+            if self.format == self.gnuplot:
+                self._file.writelines(gnuplot_lines(iterations, rows))
+            else:
+                self._file.writelines([
+                    ','.join([str(iteration)] + [repr(value) for value in row]) + '\n'
+                    for iteration, row in zip(iterations, rows)
+                ])
+            self.rows += self._block_index
+        self._block_index = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def _write_npy_header(self) -> None:
+        write_npy_header(self._file, self._block.dtype, (self.rows, self._block.shape[1]), self.npy_header_size)
@@ -1,3 +1,6 @@
+from markov_libs.board import Board
+
+
 class FieldStateUnknownException(Exception):
     pass
 
@@ -11,38 +14,83 @@ class EmptyUtilityHistoryException(Exception):
 
 
 class Field:
-    terminal = "T"
-    forbidden = "F"
-    normal = "N"
-    start = "S"
-    special = "B"
+    # A view of one cell of a Board. Fields created directly own a one-cell board; World hands out cached views
+    # of its board. State and reward are cached in the view and refreshed by the board, setting the reward
+    # writes it to the board. Checks compare the integer codes; state always returns one of the constants below,
+    # whatever string the field was created from.
+    __slots__ = ('_board', '_index', 'x', 'y', '_state_id', '_reward')
+
+    terminal = Board.terminal
+    forbidden = Board.forbidden
+    normal = Board.normal
+    start = Board.start
+    special = Board.special
     possible_states = [terminal, special, forbidden, normal, start]
 
+    terminal_id = Board.terminal_id
+    forbidden_id = Board.forbidden_id
+    normal_id = Board.normal_id
+    start_id = Board.start_id
+    special_id = Board.special_id
+
     up = '^'
     left = '<'
     right = '>'
     down = 'v'
 
     actions = (up, left, right, down)
+    action_ids = {up: 0, left: 1, right: 2, down: 3}
 
     def __init__(self, state: str, x: int, y: int, reward: float = None, utility: float = None):
-        if state not in self.possible_states:
+        self.validate(state, reward)
+        board = Board(1, 1, origin=(x, y))
+        board.set_cell(0, 0, state, reward)
+        self._bind(board, 0)
+        self.utility = utility
+
+    @classmethod
+    def validate(cls, state: str, reward: float = None) -> None:
+        if state not in cls.possible_states:
             raise FieldStateUnknownException("State {} is unknown. Use one of states: {}".format(
-                state, self.possible_states)
+                state, cls.possible_states)
             )
-        if state in [self.terminal, self.special, self.normal, self.start] and reward is None:
+        if state in [cls.terminal, cls.special, cls.normal, cls.start] and reward is None:
             raise FieldRequiresValueException("Field type {} has to have a reward value.".format(state))
-        self.state = state
-        self.reward = reward
-        self.x = x
-        self.y = y
-        self.utility_history = [utility] if utility is not None else []
-        self.policy = None
-        if state is self.terminal:
-            self.q_values = [reward, reward, reward, reward]
-        else:
-            self.q_values = [0.0, 0.0, 0.0, 0.0]
-        self.actions_count = [0, 0, 0, 0]
+
+    @classmethod
+    def view(cls, board: Board, index: int) -> 'Field':
+        field = cls.__new__(cls)
+        field._bind(board, index)
+        return field
+
+    def _bind(self, board: Board, index: int) -> None:
+        self._board = board
+        self._index = index
+        self.x = board.origin[0] + index % board.width
+        self.y = board.origin[1] + index // board.width
+        self.refresh()
+
+    def refresh(self) -> None:
+        self._state_id = self._board.state_ids.item(self._index)
+        self._reward = self._board.reward(self._index)
+
+    @property
+    def state_id(self) -> int:
+        return self._state_id
+
+    @property
+    def state(self) -> str:
+        return Board.states[self._state_id]
+
+    @property
+    def reward(self) -> float or None:
+        return self._reward
+
+    @reward.setter
+    def reward(self, value: float or None):
+        self.validate(self.state, value)
+        self._board.set_reward(self._index, value)
+        self.refresh()
 
     def __repr__(self):
         return "<Field state:{} x:{} y:{}, utility_history:{}".format(
@@ -52,27 +100,41 @@ class Field:
             self.utility_history
         )
 
+    @property
+    def utility_history(self) -> list:
+        if self._board.history is None:
+            return []
+        return self._board.history.values(self._index)
+
     @property
     def utility(self):
         try:
-            if self.state is self.terminal:
-                return self.reward
-            return self.utility_history[-1]
+            if self._state_id == self.terminal_id:
+                return self._reward
+            return self._board.history_store().last_value(self._index)
         except IndexError:
             raise EmptyUtilityHistoryException
 
     @utility.setter
     def utility(self, value):
         if value is not None:
-            self.utility_history.append(value)
+            self._board.history_store().append(self._index, value)
 
     @utility.deleter
     def utility(self):
         try:
-            self.utility_history.pop()
+            self._board.history_store().pop(self._index)
         except IndexError:
             raise EmptyUtilityHistoryException
 
+    @property
+    def policy(self) -> str or None:
+        return self._board.policy(self._index)
+
+    @policy.setter
+    def policy(self, action: str or None):
+        self._board.set_policy(self._index, action)
+
     @property
     def str_policy(self):
         if self.policy is None:
@@ -87,43 +149,59 @@ class Field:
         except EmptyUtilityHistoryException:
             return 'xxxxxxx'
 
+    @property
+    def q_values(self) -> list:
+        return self._board.q_values[self._index].tolist()
+
+    @q_values.setter
+    def q_values(self, values):
+        self._board.q_values[self._index] = values
+
+    @property
+    def actions_count(self) -> list:
+        return self._board.actions_count[self._index].tolist()
+
+    @actions_count.setter
+    def actions_count(self, values):
+        self._board.actions_count[self._index] = values
+
     def q_value(self, action: str) -> float:
-        index = self.actions.index(action)
-        return self.q_values[index]
+        return self._board.q_values.item(self._index, self.action_ids[action])
 
     def set_q_value(self, action: str, q_value: float) -> None:
-        index = self.actions.index(action)
-        self.q_values[index] = q_value
+        self._board.q_values[self._index, self.action_ids[action]] = q_value
 
     def str_q_value(self, action: str) -> str:
-        if self.state is self.forbidden:
+        if self._state_id == self.forbidden_id:
             return "xxxxx"
+        if self._state_id == self.terminal_id:
+            return '{: >5}'.format(str(self._reward)[:5])
         return '{: >5}'.format(str(self.q_value(action))[:5])
 
     def is_terminal(self) -> bool:
-        return self.state is self.terminal
+        return self._state_id == self.terminal_id
 
     def increment_action_counter(self, action: str):
-        index = self.actions.index(action)
-        self.actions_count[index] += 1
+        self._board.actions_count[self._index, self.action_ids[action]] += 1
 
     def get_action_counter_value(self, action: str) -> int:
-        index = self.actions.index(action)
-        return self.actions_count[index]
+        return self._board.actions_count.item(self._index, self.action_ids[action])
 
     def optimal_action(self) -> str:
-        index = self.q_values.index(max(self.q_values))
-        return self.actions[index]
+        q_values = self._board.q_values[self._index]
+        greedy_actions = self._board.greedy_actions
+        if greedy_actions is not None and q_values[greedy_actions[self._index]] == q_values.max():
+            return self.actions[greedy_actions[self._index]]
+        return self.actions[int(q_values.argmax())]
 
     def str_optimal_action(self):
-        if self.state in [self.terminal, self.forbidden]:
+        if self._state_id in (self.terminal_id, self.forbidden_id):
             return 'x'
         else:
             return self.optimal_action()
 
     def clean_q(self):
-        if self.state is self.terminal:
-            self.q_values = [self.reward, self.reward, self.reward, self.reward]
-        else:
-            self.q_values = [0.0, 0.0, 0.0, 0.0]
-        self.actions_count = [0, 0, 0, 0]
+        self._board.clean_q_row(self._index)
+
+
+Board.field_class = Field
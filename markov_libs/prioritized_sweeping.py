@@ -0,0 +1,98 @@
+import heapq
+from typing import Tuple
+
+import numpy as np
+
+from markov_libs import SparseEngine
+
+
+class PrioritizedSweeping:
+    # Asynchronous value iteration: states are backed up in order of their Bellman error. Each priority is an
+    # upper bound of the error, raised by gamma * P(state | predecessor, a) * change for every action a after a
+    # successor is backed up and taken as the largest of the actions, so an empty queue means every Bellman error
+    # is below the termination value. A backup also solves the wall bumps that bring an action back to its own
+    # state in closed form, (R + gamma * (Q_a - P_stay * U)) / (1 - gamma * P_stay), which a plain backup only
+    # approaches over many repeats. The tables stay numpy arrays that are indexed per popped state.
+    def __init__(self, engine: SparseEngine):
+        self.engine = engine
+        self.indptr, self.predecessors, self.actions, self.weights = self._predecessor_index(engine)
+        self.slots = self.predecessors * engine.successors.shape[1] + self.actions
+        self.stay, self.scale = self._stay_factors(engine)
+
+    @staticmethod
+    def _predecessor_index(engine: SparseEngine) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # For every state the (predecessor, action) pairs leading to it, with gamma times the probability.
+        # A state is not its own predecessor, its wall bumps are solved in the backup.
+        size = engine.size
+        targets = np.concatenate([matrix.indices.astype(np.int64) for matrix in engine.matrices])
+        sources = np.concatenate([
+            np.repeat(np.arange(size), np.diff(matrix.indptr)) for matrix in engine.matrices
+        ])
+        action_ids = np.concatenate([
+            np.full(matrix.nnz, action, dtype=np.int64) for action, matrix in enumerate(engine.matrices)
+        ])
+        probabilities = np.concatenate([matrix.data for matrix in engine.matrices])
+        moves = targets != sources
+        order = np.lexsort((action_ids[moves], sources[moves], targets[moves]))
+        targets = targets[moves][order]
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=size), out=indptr[1:])
+        return indptr, sources[moves][order], action_ids[moves][order], engine.gamma * probabilities[moves][order]
+
+    @staticmethod
+    def _stay_factors(engine: SparseEngine) -> Tuple[np.ndarray, np.ndarray]:
+        # gamma * P(state | state, a) and 1 / (1 - that). An action that cannot leave its state with gamma = 1
+        # keeps the plain backup.
+        states = np.arange(engine.size)[:, None, None]
+        stay = engine.gamma * ((engine.successors == states) * engine.probability).sum(axis=2)
+        stay[~engine.updatable] = 0.0
+        stay[stay >= 1] = 0.0
+        return stay, 1 / (1 - stay)
+
+    def run(self, utilities: np.ndarray, termination_value: float, max_backups: int = None) -> Tuple[np.ndarray, int]:
+        engine = self.engine
+        probability = engine.probability
+        successors = engine.successors
+        values = utilities.copy()
+        # The backup of action a is shift + slope * Q_a - stay * U, per state as (shift, slope, stay) rows.
+        shift = engine.rewards[:, None] * self.scale
+        slope = engine.gamma * self.scale
+        stay = self.stay * self.scale
+        factors = np.stack([shift, slope, stay], axis=2)
+        solved = (shift + slope * engine.action_values(values) - stay * values[:, None]).max(axis=1)
+        errors = np.abs(solved - values)
+        errors[~engine.updatable] = 0.0
+        # bounds[state, a] bounds the change of the backup through action a; its maximum is the priority.
+        bounds = np.repeat(errors[:, None], successors.shape[1], axis=1)
+        flat_bounds = bounds.reshape(-1)
+        priority = errors
+        queue = [(-error, state) for state, error in enumerate(errors.tolist()) if error >= termination_value]
+        heapq.heapify(queue)
+
+        indptr = self.indptr
+        backups = 0
+        while queue and (max_backups is None or backups < max_backups):
+            error, state = heapq.heappop(queue)
+            if -error != priority.item(state):
+                continue
+            value = values.item(state)
+            new_value = max(
+                shift + slope * action_value - stay * value
+                for (shift, slope, stay), action_value in zip(
+                    factors[state].tolist(), (values[successors[state]] @ probability).tolist()
+                )
+            )
+            change = abs(new_value - value)
+            values[state] = new_value
+            bounds[state] = 0.0
+            priority[state] = 0.0
+            backups += 1
+            start, end = indptr.item(state), indptr.item(state + 1)
+            sources = self.predecessors[start:end]
+            flat_bounds[self.slots[start:end]] += self.weights[start:end] * change
+            raised = bounds[sources].max(axis=1)
+            priority[sources] = raised
+            for predecessor, bound in zip(sources.tolist(), raised.tolist()):
+                if bound >= termination_value:
+                    heapq.heappush(queue, (-bound, predecessor))
+        return values, backups
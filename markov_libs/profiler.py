@@ -0,0 +1,115 @@
+import contextlib
+import cProfile
+import pstats
+import time
+from typing import Dict
+
+
+class ProfilerNotRecordingException(Exception):
+    pass
+
+
+class Profiler:
+    # Counters, observed values and phase timers for World and QLearningAgent. Instrumented objects keep a
+    # `profiler` attribute that is None unless profiling is on, so a disabled run only pays for that check, made
+    # once per phase, sweep loop or episode. A World created while a profiler is enabled (see enable or the
+    # context manager) picks it up; a QLearningAgent reports to its world's profiler.
+    active = None
+
+    def __init__(self, cprofile: bool = False):
+        self.counters = {}
+        self.observations = {}
+        self.phases = {}
+        self.profile = cProfile.Profile() if cprofile else None
+        self._previous = None
+
+    def enable(self) -> 'Profiler':
+        self._previous = Profiler.active
+        Profiler.active = self
+        if self.profile is not None:
+            self.profile.enable()
+        return self
+
+    def disable(self) -> None:
+        if self.profile is not None:
+            self.profile.disable()
+        Profiler.active = self._previous
+        self._previous = None
+
+    def __enter__(self) -> 'Profiler':
+        return self.enable()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        # Keeps count, total, minimum and maximum of the observed values.
+        statistics = self.observations.get(name)
+        if statistics is None:
+            self.observations[name] = [1, value, value, value]
+        else:
+            statistics[0] += 1
+            statistics[1] += value
+            statistics[2] = min(statistics[2], value)
+            statistics[3] = max(statistics[3], value)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        phase = self.phases.setdefault(name, [0, 0.0])
+        phase[0] += 1
+        phase[1] += seconds
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        self.counters = {}
+        self.observations = {}
+        self.phases = {}
+
+    def summary(self) -> Dict:
+        return {
+            'counters': dict(self.counters),
+            'observations': {
+                name: {'count': count, 'total': total, 'mean': total / count, 'min': minimum, 'max': maximum}
+                for name, (count, total, minimum, maximum) in self.observations.items()
+            },
+            'phases': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self.phases.items()}
+        }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = ['{:<24} {:>14}'.format(name, value) for name, value in sorted(summary['counters'].items())]
+        lines += [
+            '{:<24} mean {:.3f} min {} max {} over {}'.format(
+                name, values['mean'], values['min'], values['max'], values['count']
+            )
+            for name, values in sorted(summary['observations'].items())
+        ]
+        lines += [
+            '{:<24} {:>12.6f}s in {} calls'.format(name, values['seconds'], values['calls'])
+            for name, values in sorted(summary['phases'].items())
+        ]
+        return '\n'.join(lines)
+
+    def stats(self) -> pstats.Stats:
+        if self.profile is None:
+            raise ProfilerNotRecordingException("cProfile is only recorded by Profiler(cprofile=True)")
+        return pstats.Stats(self.profile)
+
+    def dump_stats(self, filename: str) -> None:
+        self.stats().dump_stats(filename)
+
+
+def profile_phase(profiler: Profiler or None, name: str):
+    # Phase timer that does nothing without a profiler.
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
@@ -1,43 +1,382 @@
+import json
+import os
+import time
+from typing import Sequence
+
 import numpy as np
 
-from markov_libs import World
+from markov_libs import Field, World, BatchQLearning, RandomStream, ReplayBuffer, EpisodeTelemetry, storage
+from markov_libs import profile_phase
+
+
+class TieBreakingUnknownException(Exception):
+    pass
 
 
 class QLearningAgent:
     initial_action = World.up
+    replay_capacity = 100000
+    check_every = 100
 
-    def __init__(self, world_to_learn: World):
+    first_tie = 'first'
+    random_tie = 'random'
+    tie_breakings = (first_tie, random_tie)
+
+    def __init__(self, world_to_learn: World, seed: int = None, planning_steps: int = 0, replay_capacity: int = None,
+                 directory: str = None, tie_breaking: str = first_tie, overwrite: bool = False):
+        # With a directory the Q-table and visit counts are memory-mapped .npy files there, which attach opens from
+        # another process; overwrite replaces them next to a recorded history. Tie breaking decides
+        # the greedy action among equal Q-values: the first action in World.actions order or a seeded random one.
+        if tie_breaking not in self.tie_breakings:
+            raise TieBreakingUnknownException("Tie breaking {} is unknown. Use one of: {}".format(
+                tie_breaking, self.tie_breakings)
+            )
         self.world = world_to_learn
+        self.tie_breaking = tie_breaking
+        self.directory = directory
+        self.planning_steps = planning_steps
+        if replay_capacity is None and planning_steps:
+            replay_capacity = self.replay_capacity
+        self.replay = ReplayBuffer(replay_capacity) if replay_capacity else None
+        self.converged_episode = None
+        self.episode = 0
+        # Convergence criteria state restored by load_checkpoint, taken up by learning with resume.
+        self.criteria_state = None
+        self.random = RandomStream(seed)
+        world_to_learn.random = self.random
         self.start_position = world_to_learn.start_field()
+        self.start_index = world_to_learn.field_index(self.start_position)
+        board = world_to_learn.board
+        self.q_values = storage.create_array(directory, 'q_values', (board.size, len(World.actions)),
+                                             overwrite=overwrite)
+        self.actions_count = storage.create_array(directory, 'actions_count', self.q_values.shape, np.int64,
+                                                  overwrite=overwrite)
+        board.bind_q_values(self.q_values, self.actions_count)
+        self.terminal = board.mask(Field.terminal).tolist()
+        self.rewards = board.rewards().tolist()
+        # Greedy action and maximal Q-value of every state, kept in step with the Q-table while learning.
+        self.greedy_actions = None
+        self.max_q_values = None
+        board.greedy_actions = None
+
+    @classmethod
+    def attach(cls, world_to_inspect: World, directory: str) -> 'QLearningAgent':
+        # Read-only agent on the Q-table and visit counts an agent in another process keeps in directory, for
+        # printing it or its world while learning goes on. It cannot learn.
+        agent = cls.__new__(cls)
+        agent.world = world_to_inspect
+        agent.directory = directory
+        agent.q_values = storage.open_array(directory, 'q_values')
+        agent.actions_count = storage.open_array(directory, 'actions_count')
+        world_to_inspect.board.attach_q_values(agent.q_values, agent.actions_count)
+        return agent
 
-    def learning(self, iterations: int):
-        for i in range(iterations):
-            optimal_action = self.initial_action
-            previous_position = self.start_position
-            while not previous_position.is_terminal():
-                selected_action = self.select_exploration_or_exploitation(optimal_action)
-                current_position = self.world.agent_move(previous_position, selected_action)
-                alpha = 1 / previous_position.get_action_counter_value(selected_action)
-                new_q_value = previous_position.q_value(selected_action) \
-                              + alpha \
-                              * (
-                                      previous_position.reward
-                                      + self.world.gamma * max(current_position.q_values)
-                                      - previous_position.q_value(selected_action)
-                              )
-                previous_position.set_q_value(selected_action, new_q_value)
+    def learning(self, iterations: int, parallel_episodes: int = 1, seed: int = None, criteria: Sequence = (),
+                 check_every: int = None, checkpoint_path: str = None, checkpoint_every: int = 10000,
+                 resume: bool = False, telemetry: EpisodeTelemetry = None) -> int:
+        # Returns the number of episodes run. With criteria, learning stops at the first check where all of them
+        # are met and that episode is stored in converged_episode; checks run every check_every episodes.
+        # With resume, learning continues from the episode restored by load_checkpoint. Telemetry records the
+        # steps, undiscounted return, largest Q-value change and epsilon of every episode; it is flushed when learning
+        # returns and, when it has a file that is not open, opened and closed around the run.
+        self.converged_episode = None
+        check_every = check_every or self.check_every
+        if not resume:
+            self.episode = 0
+        if resume and criteria and self.criteria_state is not None:
+            self._restore_criteria(criteria)
+        else:
+            # Criteria count their episodes from where this run starts, the restored episode when resuming from a
+            # checkpoint saved without them.
+            for criterion in criteria:
+                criterion.reset(self)
+        if parallel_episodes > 1:
+            if checkpoint_path is not None or resume:
+                raise AttributeError("Checkpoints are not supported with parallel episodes")
+            if telemetry is not None:
+                raise AttributeError("Episode telemetry is not supported with parallel episodes")
+            if self.tie_breaking != self.first_tie:
+                raise AttributeError("Random tie breaking is not supported with parallel episodes")
+            with profile_phase(self.world.profiler, 'learning'):
+                return self._parallel_learning(iterations, parallel_episodes, seed, criteria, check_every)
+        with profile_phase(self.world.profiler, 'learning'):
+            if telemetry is not None and telemetry.filename is not None and not telemetry.opened:
+                # Opened for this run only, so every recorded episode is in the file when learning returns.
+                with telemetry:
+                    return self._learning(iterations, criteria, check_every, checkpoint_path, checkpoint_every,
+                                          telemetry)
+            try:
+                return self._learning(iterations, criteria, check_every, checkpoint_path, checkpoint_every, telemetry)
+            finally:
+                if telemetry is not None:
+                    telemetry.flush()
+
+    def _learning(self, iterations: int, criteria: Sequence, check_every: int, checkpoint_path: str,
+                  checkpoint_every: int, telemetry: EpisodeTelemetry) -> int:
+        profiler = self.world.profiler
+        q_values = self.q_values
+        actions_count = self.actions_count
+        # Rewards may have been changed on the board since the agent was created.
+        self.rewards = self.world.board.rewards().tolist()
+        terminal = self.terminal
+        rewards = self.rewards
+        gamma = self.world.gamma
+        replay = self.replay
+        planning_steps = self.planning_steps
+        initial_action = World.action_ids[self.initial_action]
+        # The Q-table may have been changed outside learning, by a checkpoint or through the fields.
+        self.refresh_greedy()
+        greedy_actions = self.greedy_actions
+        max_q_values = self.max_q_values
+        update_greedy = self._update_greedy
+        for i in range(self.episode, iterations):
+            optimal_action = initial_action
+            previous_position = self.start_index
+            steps = 0
+            episode_return = 0.0
+            max_q_delta = 0.0
+            while not terminal[previous_position]:
+                steps += 1
+                selected_action = self._select_action_id(optimal_action)
+                actions_count[previous_position, selected_action] += 1
+                current_position = self.world.sample_move(previous_position, selected_action)
+                alpha = 1 / actions_count.item(previous_position, selected_action)
+                reward = rewards[previous_position]
+                q_value = q_values.item(previous_position, selected_action)
+                q_delta = alpha * (reward + gamma * max_q_values[current_position] - q_value)
+                q_values[previous_position, selected_action] = q_value + q_delta
+                update_greedy(previous_position, selected_action, q_value + q_delta)
+                episode_return += reward
+                if abs(q_delta) > max_q_delta:
+                    max_q_delta = abs(q_delta)
+                if replay is not None:
+                    replay.append(previous_position, selected_action, reward, current_position)
+                if planning_steps:
+                    self.plan(planning_steps)
 
                 previous_position = current_position
-                optimal_action = current_position.optimal_action()
+                optimal_action = greedy_actions[current_position]
+            self.episode = i + 1
+            if telemetry is not None:
+                telemetry.record(self.episode, steps, episode_return + rewards[previous_position], max_q_delta,
+                                 self.world.epsilon)
+            if profiler is not None:
+                profiler.count('episodes')
+                profiler.count('steps', steps)
+                profiler.observe('episode_steps', steps)
+            # Checked before saving, so the saved criteria state includes this episode's check.
+            converged = bool(criteria) and self.episode % check_every == 0 and self._converged(criteria, self.episode)
+            if checkpoint_path is not None and self.episode % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_path, criteria)
+            if converged:
+                return self.episode
+        return iterations
+
+    def _parallel_learning(self, iterations: int, parallel_episodes: int, seed, criteria: Sequence,
+                           check_every: int) -> int:
+        batch = BatchQLearning.shared(self, parallel_episodes, self.random.generator if seed is None else seed)
+        profiler = self.world.profiler
+        if profiler is not None:
+            steps = int(self.actions_count.sum())
+        if not criteria:
+            batch.learning(iterations, per_walker=False)
+            episode = iterations
+        else:
+            episode = 0
+            while episode < iterations:
+                chunk = min(check_every, iterations - episode)
+                batch.learning(chunk, per_walker=False)
+                episode += chunk
+                if self._converged(criteria, episode):
+                    break
+        if profiler is not None:
+            profiler.count('episodes', episode)
+            profiler.count('steps', int(self.actions_count.sum()) - steps)
+        return episode
+
+    def _converged(self, criteria: Sequence, episode: int) -> bool:
+        with profile_phase(self.world.profiler, 'convergence'):
+            converged = all([criterion.check(self, episode) for criterion in criteria])
+        if converged:
+            self.converged_episode = episode
+        return converged
+
+    def _restore_criteria(self, criteria: Sequence) -> None:
+        names, states = self.criteria_state
+        if names != [type(criterion).__name__ for criterion in criteria]:
+            raise AttributeError("Criteria {} do not match the checkpoint criteria {}".format(
+                [type(criterion).__name__ for criterion in criteria], names)
+            )
+        for criterion, state in zip(criteria, states):
+            criterion.set_state(state)
+
+    def save_checkpoint(self, path: str, criteria: Sequence = ()) -> None:
+        with profile_phase(self.world.profiler, 'checkpoint'):
+            self._save_checkpoint(path, criteria)
+
+    def _save_checkpoint(self, path: str, criteria: Sequence) -> None:
+        random_state = self.random.get_state()
+        uniforms, uniform_index = random_state['uniforms']
+        arrays = {
+            'q_values': self.q_values,
+            'actions_count': self.actions_count,
+            'episode': np.array(self.episode),
+            'generator': np.array(json.dumps(random_state['generator'])),
+            'uniforms': np.array(uniforms, dtype=float),
+            'uniform_index': np.array(uniform_index),
+        }
+        for high, (block, index) in random_state['integers'].items():
+            arrays['integers_{}'.format(high)] = np.array(block, dtype=np.int64)
+            arrays['integer_index_{}'.format(high)] = np.array(index)
+        if self.replay is not None:
+            arrays.update(self.replay.get_state())
+        if self.greedy_actions is not None:
+            arrays['greedy_actions'] = np.array(self.greedy_actions, dtype=np.int8)
+            arrays['max_q_values'] = np.array(self.max_q_values)
+        if criteria:
+            arrays['criteria'] = np.array([type(criterion).__name__ for criterion in criteria])
+            for i, criterion in enumerate(criteria):
+                for key, value in criterion.get_state().items():
+                    arrays['criterion_{}_{}'.format(i, key)] = value
+        # Written next to the target first, so a crash while saving keeps the previous checkpoint.
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary_path, path)
+
+    def load_checkpoint(self, path: str) -> None:
+        with np.load(path) as checkpoint:
+            self.q_values[:] = checkpoint['q_values']
+            self.actions_count[:] = checkpoint['actions_count']
+            self.episode = int(checkpoint['episode'])
+            integers = {}
+            for key in checkpoint.files:
+                if key.startswith('integers_'):
+                    high = key[len('integers_'):]
+                    integers[high] = (
+                        checkpoint[key].tolist(), int(checkpoint['integer_index_{}'.format(high)])
+                    )
+            self.random.set_state({
+                'generator': json.loads(str(checkpoint['generator'])),
+                'uniforms': (checkpoint['uniforms'].tolist(), int(checkpoint['uniform_index'])),
+                'integers': integers,
+            })
+            if self.replay is not None:
+                self.replay.set_state(checkpoint)
+            # The cached ties are part of the state, redrawing them would shift the random stream.
+            if 'greedy_actions' in checkpoint.files:
+                self.greedy_actions = checkpoint['greedy_actions'].tolist()
+                self.max_q_values = checkpoint['max_q_values'].tolist()
+            else:
+                self.greedy_actions = None
+                self.max_q_values = None
+            self.world.board.greedy_actions = self.greedy_actions
+            if 'criteria' in checkpoint.files:
+                names = checkpoint['criteria'].tolist()
+                states = [{} for _ in names]
+                for key in checkpoint.files:
+                    if key.startswith('criterion_'):
+                        i, name = key[len('criterion_'):].split('_', 1)
+                        states[int(i)][name] = checkpoint[key]
+                self.criteria_state = (names, states)
+            else:
+                self.criteria_state = None
+
+    def plan(self, steps: int) -> None:
+        # Dyna-Q planning on transitions sampled from the replay buffer, which is the empirical model of the
+        # world. The minibatch is applied at once; samples of the same (state, action) are averaged.
+        profiler = self.world.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        states, actions, rewards, next_states = self.replay.sample(steps, self.random.generator)
+        targets = rewards + self.world.gamma * self.q_values[next_states].max(axis=1)
+        cells = states * len(World.actions) + actions
+        unique_cells, inverse, repeats = np.unique(cells, return_inverse=True, return_counts=True)
+        mean_targets = np.bincount(inverse.ravel(), weights=targets) / repeats
+        flat_q = self.q_values.reshape(-1)
+        q_values = flat_q[unique_cells]
+        counts = np.maximum(self.actions_count.reshape(-1)[unique_cells], 1)
+        flat_q[unique_cells] = q_values + (mean_targets - q_values) / counts
+        if self.greedy_actions is not None:
+            self.refresh_greedy(np.unique(unique_cells // len(World.actions)))
+        if profiler is not None:
+            profiler.add_time('planning', time.perf_counter() - start)
+            profiler.count('planning_updates', steps)
+
+    def refresh_greedy(self, states: np.ndarray = None) -> None:
+        # Recomputes the greedy actions and maximal Q-values of the given states, of all states without them.
+        # A random tie is only drawn again when the cached action is no longer among the maxima, so refreshing
+        # a cache in step with the Q-table leaves the random stream untouched.
+        q_values = self.q_values if states is None else self.q_values[states]
+        max_q_values = q_values.max(axis=1)
+        greedy_actions = q_values.argmax(axis=1)
+        if self.tie_breaking == self.random_tie:
+            cached = self.greedy_actions
+            for row in np.flatnonzero((q_values == max_q_values[:, None]).sum(axis=1) > 1).tolist():
+                state = row if states is None else states.item(row)
+                max_q_value = max_q_values.item(row)
+                if cached is not None and q_values.item(row, cached[state]) == max_q_value:
+                    greedy_actions[row] = cached[state]
+                else:
+                    greedy_actions[row] = self._random_tie(q_values[row].tolist(), max_q_value)
+        if states is None:
+            self.greedy_actions = greedy_actions.tolist()
+            self.max_q_values = max_q_values.tolist()
+            self.world.board.greedy_actions = self.greedy_actions
+        else:
+            for state, action, value in zip(states.tolist(), greedy_actions.tolist(), max_q_values.tolist()):
+                self.greedy_actions[state] = action
+                self.max_q_values[state] = value
+
+    def _update_greedy(self, state: int, action: int, q_value: float) -> None:
+        # Called after Q(state, action) was set to q_value. Only a drop of the greedy action's value or a new tie
+        # under random tie breaking needs the row of the state again.
+        greedy_action = self.greedy_actions[state]
+        max_q_value = self.max_q_values[state]
+        if action == greedy_action:
+            if q_value >= max_q_value:
+                self.max_q_values[state] = q_value
+                return
+        elif q_value > max_q_value:
+            self.greedy_actions[state] = action
+            self.max_q_values[state] = q_value
+            return
+        elif q_value < max_q_value:
+            return
+        elif self.tie_breaking == self.first_tie:
+            self.greedy_actions[state] = min(action, greedy_action)
+            return
+        row = self.q_values[state].tolist()
+        max_q_value = max(row)
+        self.max_q_values[state] = max_q_value
+        if self.tie_breaking == self.first_tie:
+            self.greedy_actions[state] = row.index(max_q_value)
+        else:
+            self.greedy_actions[state] = self._random_tie(row, max_q_value)
+
+    def _random_tie(self, row: list, max_q_value: float) -> int:
+        tied = [action for action, q_value in enumerate(row) if q_value == max_q_value]
+        if len(tied) == 1:
+            return tied[0]
+        return tied[self.random.integers(len(tied))]
 
     def select_exploration_or_exploitation(self, optimal_action: str) -> str:
-        random_number = np.random.random()
+        random_number = self.random.random()
         if random_number < self.world.epsilon:
             return self.random_action()
         return optimal_action
 
+    def _select_action_id(self, optimal_action: int) -> int:
+        random_number = self.random.random()
+        if random_number < self.world.epsilon:
+            return self.random_action_id()
+        return optimal_action
+
     def random_action(self) -> str:
-        return np.random.choice(self.world.actions)
+        return self.world.actions[self.random_action_id()]
+
+    def random_action_id(self) -> int:
+        return self.random.integers(len(self.world.actions))
 
     def __str__(self):
         return_string = ""
@@ -0,0 +1,52 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+class RandomStream:
+    # Hands out scalars from blocks pre-drawn with a numpy Generator, so a learning step costs a list lookup
+    # instead of a call into numpy. Integers are buffered separately for every upper bound.
+    block_size = 4096
+
+    def __init__(self, seed: int = None, block_size: int = None):
+        if block_size is not None:
+            self.block_size = block_size
+        self.seed(seed)
+
+    def seed(self, seed: int = None) -> None:
+        self.generator = np.random.default_rng(seed)
+        self._uniforms = []
+        self._uniform_index = 0
+        self._integers = {}
+
+    def random(self) -> float:
+        if self._uniform_index == len(self._uniforms):
+            self._uniforms = self.generator.random(self.block_size).tolist()
+            self._uniform_index = 0
+        value = self._uniforms[self._uniform_index]
+        self._uniform_index += 1
+        return value
+
+    def integers(self, high: int) -> int:
+        block, index = self._integers.get(high, ([], 0))
+        if index == len(block):
+            block = self._integer_block(high)
+            index = 0
+        self._integers[high] = (block, index + 1)
+        return block[index]
+
+    def _integer_block(self, high: int) -> List[int]:
+        return self.generator.integers(high, size=self.block_size).tolist()
+
+    def get_state(self) -> Dict:
+        return {
+            'generator': self.generator.bit_generator.state,
+            'uniforms': (list(self._uniforms), self._uniform_index),
+            'integers': {high: (list(block), index) for high, (block, index) in self._integers.items()},
+        }
+
+    def set_state(self, state: Dict) -> None:
+        self.generator.bit_generator.state = state['generator']
+        uniforms, self._uniform_index = state['uniforms']
+        self._uniforms = list(uniforms)
+        self._integers = {int(high): (list(block), index) for high, (block, index) in state['integers'].items()}
@@ -0,0 +1,66 @@
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+
+class ReplayBufferEmptyException(Exception):
+    pass
+
+
+class ReplayBuffer:
+    # Fixed-capacity ring of (state, action, reward, next state) transitions; the oldest entries are overwritten.
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise AttributeError("Replay buffer capacity has to be positive, got {}".format(capacity))
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self._position = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, state: int, action: int, reward: float, next_state: int) -> None:
+        position = self._position
+        self.states[position] = state
+        self.actions[position] = action
+        self.rewards[position] = reward
+        self.next_states[position] = next_state
+        self._position = (position + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def sample(self, batch_size: int, generator: np.random.Generator) -> Tuple[np.ndarray, ...]:
+        if not self.size:
+            raise ReplayBufferEmptyException("Cannot sample from an empty replay buffer")
+        rows = generator.integers(self.size, size=batch_size)
+        return self.states[rows], self.actions[rows], self.rewards[rows], self.next_states[rows]
+
+    def clear(self) -> None:
+        self.size = 0
+        self._position = 0
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {
+            'replay_states': self.states,
+            'replay_actions': self.actions,
+            'replay_rewards': self.rewards,
+            'replay_next_states': self.next_states,
+            'replay_size': np.array(self.size),
+            'replay_position': np.array(self._position),
+        }
+
+    def set_state(self, state: Mapping[str, np.ndarray]) -> None:
+        if state['replay_states'].size != self.capacity:
+            raise AttributeError("Replay buffer capacity {} does not match saved capacity {}".format(
+                self.capacity, state['replay_states'].size)
+            )
+        self.states[:] = state['replay_states']
+        self.actions[:] = state['replay_actions']
+        self.rewards[:] = state['replay_rewards']
+        self.next_states[:] = state['replay_next_states']
+        self.size = int(state['replay_size'])
+        self._position = int(state['replay_position'])
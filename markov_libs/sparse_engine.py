@@ -0,0 +1,73 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from markov_libs import ArrayEngine
+
+
+class CsrMatrix:
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape: Tuple[int, int]):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+        self._filled = indptr[:-1] < indptr[1:]
+        self._starts = indptr[:-1][self._filled]
+
+    @classmethod
+    def from_outcomes(cls, successors: np.ndarray, probability: np.ndarray, rows: np.ndarray,
+                      size: int) -> 'CsrMatrix':
+        # successors is (states, outcomes); outcomes landing on the same state are summed into one entry.
+        outcomes = probability > 0
+        row_ids = np.repeat(rows, int(outcomes.sum())).astype(np.int64)
+        column_ids = successors[rows][:, outcomes].ravel().astype(np.int64)
+        keys, inverse = np.unique(row_ids * size + column_ids, return_inverse=True)
+        data = np.bincount(inverse.ravel(), weights=np.tile(probability[outcomes], rows.size))
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // size, minlength=size), out=indptr[1:])
+        return cls(data, (keys % size).astype(np.int32), indptr, (size, size))
+
+    @property
+    def nnz(self) -> int:
+        return self.data.size
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        result = np.zeros(self.shape[0])
+        if self.nnz:
+            result[self._filled] = np.add.reduceat(self.data * vector[self.indices], self._starts)
+        return result
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros(self.shape)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+    def to_scipy(self):
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+
+class SparseEngine(ArrayEngine):
+    # One CSR matrix per action; terminal and forbidden rows are empty so they contribute no future utility.
+    def __init__(self, world):
+        super().__init__(world)
+        rows = np.flatnonzero(self.updatable)
+        self.matrices = [
+            CsrMatrix.from_outcomes(self.successors[:, action], self.probability, rows, self.size)
+            for action in range(self.successors.shape[1])
+        ]
+
+    def action_values(self, utilities: np.ndarray) -> np.ndarray:
+        return np.stack([matrix.dot(utilities) for matrix in self.matrices], axis=1)
+
+    def backup(self, utilities: np.ndarray) -> np.ndarray:
+        best = self.matrices[0].dot(utilities)
+        for matrix in self.matrices[1:]:
+            np.maximum(best, matrix.dot(utilities), out=best)
+        new_utilities = self.rewards + self.gamma * best
+        new_utilities[self.forbidden] = 0.0
+        return new_utilities
+
+    def transition_matrices(self) -> List[CsrMatrix]:
+        return self.matrices
@@ -0,0 +1,57 @@
+import os
+from typing import Tuple
+
+import numpy as np
+
+
+class StorageInUseException(Exception):
+    pass
+
+
+# Written by UtilityHistory into its directory; arrays next to it may be followed by other processes.
+history_file = 'history.json'
+
+
+def array_path(directory: str, name: str) -> str:
+    return os.path.join(directory, name + '.npy')
+
+
+def create_array(directory: str, name: str, shape: Tuple[int, ...], dtype=float, fill=0,
+                 overwrite: bool = False) -> np.ndarray:
+    # Without a directory the array stays in memory; with one it is a .npy file mapped into memory, which other
+    # processes can open with open_array while it is being written. An existing file in a directory holding a
+    # history is only replaced with overwrite, as a run may still be writing it.
+    if directory is None:
+        return np.full(shape, fill, dtype=dtype)
+    os.makedirs(directory, exist_ok=True)
+    path = array_path(directory, name)
+    if not overwrite and os.path.exists(path) and os.path.exists(os.path.join(directory, history_file)):
+        raise StorageInUseException("{} belongs to a recorded history. Attach to it or pass overwrite.".format(path))
+    array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    array[...] = fill
+    return array
+
+
+def resize_rows(directory: str, name: str, array: np.ndarray, rows: int, fill=0) -> np.ndarray:
+    # Grows the first axis. A mapped file is rebuilt under a temporary name and moved into place, so readers
+    # always find a complete file.
+    if directory is None:
+        resized = np.full((rows,) + array.shape[1:], fill, dtype=array.dtype)
+        resized[:array.shape[0]] = array
+        return resized
+    temporary_name = name + '.resize'
+    resized = create_array(directory, temporary_name, (rows,) + array.shape[1:], array.dtype, fill, True)
+    resized[:array.shape[0]] = array
+    resized.flush()
+    os.replace(array_path(directory, temporary_name), array_path(directory, name))
+    return resized
+
+
+def open_array(directory: str, name: str, mode: str = 'r') -> np.ndarray:
+    return np.load(array_path(directory, name), mmap_mode=mode)
+
+
+def flush(*arrays: np.ndarray) -> None:
+    for array in arrays:
+        if isinstance(array, np.memmap):
+            array.flush()
@@ -0,0 +1,142 @@
+from typing import Dict
+
+import numpy as np
+
+from markov_libs import ExportFormatUnknownException, StreamingExporter, gnuplot_lines
+from markov_libs import write_npy_header
+
+
+class EpisodeTelemetry:
+    # Per-episode learning metrics in preallocated ring buffers that keep the last `capacity` episodes. With a
+    # filename the episodes are also appended to a gnuplot, CSV or .npy file every `write_every` episodes, so a
+    # learning curve can be followed while the agent runs. Pass it to QLearningAgent.learning.
+    gnuplot = StreamingExporter.gnuplot
+    csv = StreamingExporter.csv
+    npy = StreamingExporter.npy
+    formats = StreamingExporter.formats
+
+    columns = ('episode', 'steps', 'return', 'max_q_delta', 'epsilon')
+    capacity = 4096
+    npy_header_size = 128
+
+    def __init__(self, filename: str = None, export_format: str = csv, capacity: int = None,
+                 write_every: int = None):
+        if export_format not in self.formats:
+            raise ExportFormatUnknownException("Export format {} is unknown. Use one of formats: {}".format(
+                export_format, self.formats)
+            )
+        if capacity is not None:
+            self.capacity = capacity
+        write_every = write_every or self.capacity
+        if not 0 < write_every <= self.capacity:
+            raise AttributeError("Telemetry has to be written every 1 to {} episodes, got {}".format(
+                self.capacity, write_every)
+            )
+        self.filename = filename
+        self.format = export_format
+        self.write_every = write_every
+        self.episodes = np.zeros(self.capacity, dtype=np.int64)
+        self.steps = np.zeros(self.capacity, dtype=np.int64)
+        self.returns = np.zeros(self.capacity)
+        self.max_q_deltas = np.zeros(self.capacity)
+        self.epsilons = np.zeros(self.capacity)
+        self.count = 0
+        self.written = 0
+        self._file = None
+
+    @property
+    def opened(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> 'EpisodeTelemetry':
+        # Opened again after close, the file is continued with the episodes recorded since.
+        if self.written:
+            self._file = open(self.filename, 'r+b' if self.format == self.npy else 'a')
+            self._file.seek(0, 2)
+            return self
+        self._file = open(self.filename, 'wb' if self.format == self.npy else 'w')
+        if self.format == self.gnuplot:
+            self._file.write(''.join(column + ' ' for column in self.columns) + '\n')
+        elif self.format == self.csv:
+            self._file.write(','.join(self.columns) + '\n')
+        else:
+            write_npy_header(self._file, np.dtype(float), (0, len(self.columns)), self.npy_header_size)
+        self._file.flush()
+        return self
+
+    def __enter__(self) -> 'EpisodeTelemetry':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, episode: int, steps: int, episode_return: float, max_q_delta: float, epsilon: float) -> None:
+        row = self.count % self.capacity
+        self.episodes[row] = episode
+        self.steps[row] = steps
+        self.returns[row] = episode_return
+        self.max_q_deltas[row] = max_q_delta
+        self.epsilons[row] = epsilon
+        self.count += 1
+        if self._file is not None and self.count - self.written >= self.write_every:
+            self.flush()
+
+    def _table(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        rows = np.arange(start, stop) % self.capacity
+        return {
+            'episode': self.episodes[rows],
+            'steps': self.steps[rows],
+            'return': self.returns[rows],
+            'max_q_delta': self.max_q_deltas[rows],
+            'epsilon': self.epsilons[rows]
+        }
+
+    def recent(self) -> Dict[str, np.ndarray]:
+        # The episodes still held in the ring buffers, oldest first.
+        return self._table(max(0, self.count - self.capacity), self.count)
+
+    def flush(self) -> None:
+        if self._file is None or self.written == self.count:
+            return
+        table = self._table(self.written, self.count)
+        if self.format == self.npy:
+            self._file.write(np.column_stack([table[column] for column in self.columns]).astype(float).tobytes())
+            write_npy_header(self._file, np.dtype(float), (self.count, len(self.columns)), self.npy_header_size)
+        else:
+            episodes = table['episode'].tolist()
+            rows = zip(*[table[column].tolist() for column in self.columns[1:]])
+            if self.format == self.gnuplot:
+                self._file.writelines(gnuplot_lines(episodes, rows))
+            else:
+                self._file.writelines([
+                    ','.join([str(episode)] + [repr(value) for value in row]) + '\n'
+                    for episode, row in zip(episodes, rows)
+                ])
+        self.written = self.count
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    @classmethod
+    def read(cls, filename: str, export_format: str = csv) -> Dict[str, np.ndarray]:
+        # Columns of a written telemetry file, also while it is still being written.
+        if export_format not in cls.formats:
+            raise ExportFormatUnknownException("Export format {} is unknown. Use one of formats: {}".format(
+                export_format, cls.formats)
+            )
+        if export_format == cls.npy:
+            table = np.load(filename)
+        else:
+            with open(filename, 'r') as f:
+                lines = f.read().splitlines()[1:]
+            table = np.array([line.replace(',', ' ').split() for line in lines], dtype=float)
+        table = table.reshape(-1, len(cls.columns))
+        columns = {column: table[:, i] for i, column in enumerate(cls.columns)}
+        columns['episode'] = columns['episode'].astype(np.int64)
+        columns['steps'] = columns['steps'].astype(np.int64)
+        return columns
@@ -0,0 +1,60 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class TransitionTable:
+    # successors[state, action, outcome] is the index (y * width + x) of the state reached when
+    # `action` ends up front/left/right/back; wall and forbidden bumps point back to the state itself.
+    def __init__(self, successors: np.ndarray, probability: Sequence[float]):
+        self.successors = successors
+        self.probability = np.array(probability, dtype=float)
+        self.cumulative_probability = self._cumulative(probability)
+
+    @classmethod
+    def compile(cls, forbidden: np.ndarray, terminal: np.ndarray,
+                modifiers: Sequence[Sequence[Tuple[int, int]]], probability: Sequence[float]) -> 'TransitionTable':
+        height, width = forbidden.shape
+        y, x = np.divmod(np.arange(height * width), width)
+        blocked = forbidden.ravel()
+        stays = terminal.ravel() | blocked
+        successors = np.empty((height * width, len(modifiers), len(probability)), dtype=np.int32)
+        for action, outcomes in enumerate(modifiers):
+            for outcome, (x_modifier, y_modifier) in enumerate(outcomes):
+                target_x = x + x_modifier
+                target_y = y + y_modifier
+                inside = (target_x >= 0) & (target_x < width) & (target_y >= 0) & (target_y < height)
+                target = np.where(inside, target_y * width + target_x, 0)
+                allowed = inside & ~blocked[target] & ~stays
+                successors[:, action, outcome] = np.where(allowed, target, np.arange(height * width))
+        return cls(successors, probability)
+
+    @staticmethod
+    def _cumulative(probability: Sequence[float]) -> List[float]:
+        thresholds = []
+        total = 0
+        for p in probability[:-1]:
+            total += p
+            thresholds.append(total)
+        return thresholds
+
+    @property
+    def size(self) -> int:
+        return self.successors.shape[0]
+
+    def bumps(self, states: np.ndarray) -> int:
+        # Number of (action, outcome) pairs of the given states that bump into a wall or forbidden cell.
+        return int((self.successors[states] == states[:, None, None]).sum())
+
+    def outcomes(self, state: int, action: int) -> List[int]:
+        # One row at a time; converting the whole table to lists costs gigabytes on large worlds.
+        return self.successors[state, action].tolist()
+
+    def successor(self, state: int, action: int, outcome: int) -> int:
+        return self.successors.item(state, action, outcome)
+
+    def sample_outcome(self, random_number: float) -> int:
+        for outcome, threshold in enumerate(self.cumulative_probability):
+            if random_number < threshold:
+                return outcome
+        return len(self.cumulative_probability)
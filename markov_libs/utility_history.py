@@ -0,0 +1,162 @@
+import json
+import os
+from typing import List
+
+import numpy as np
+
+from markov_libs import storage
+
+
+class HistoryModeUnknownException(Exception):
+    pass
+
+
+class HistoryNotRecordedException(Exception):
+    pass
+
+
+class UtilityHistory:
+    # Utilities of `size` fields kept column-wise: the last two values of every field are always
+    # available, the trace keeps every value (full), every step-th value (every) or nothing (last).
+    full = 'full'
+    every = 'every'
+    last = 'last'
+    modes = (full, every, last)
+
+    initial_rows = 4
+    metadata_file = storage.history_file
+
+    def __init__(self, size: int, mode: str = full, step: int = 1, directory: str = None, overwrite: bool = False):
+        if mode not in self.modes:
+            raise HistoryModeUnknownException("History mode {} is unknown. Use one of modes: {}".format(
+                mode, self.modes)
+            )
+        if step < 1:
+            raise HistoryModeUnknownException("History step has to be positive, got {}.".format(step))
+        self.size = size
+        self.mode = mode
+        self.step = step if mode == self.every else 1
+        # With a directory every array below is a memory-mapped .npy file in it (see markov_libs.storage).
+        # A directory that already holds a history is only reused with overwrite; attach reads it instead.
+        self.directory = directory
+        self.count = storage.create_array(directory, 'count', (size,), np.int64, overwrite=overwrite)
+        self.trace_count = storage.create_array(directory, 'trace_count', (size,), np.int64, overwrite=overwrite)
+        self._recent = storage.create_array(directory, 'recent', (2, size), fill=np.nan, overwrite=overwrite)
+        self._latest = storage.create_array(directory, 'latest', (size,), fill=np.nan, overwrite=overwrite)
+        self._trace = None
+        if mode != self.last:
+            self._trace = storage.create_array(directory, 'trace', (self.initial_rows, size), fill=np.nan,
+                                               overwrite=overwrite)
+        if directory is not None:
+            with open(os.path.join(directory, self.metadata_file), 'w') as f:
+                json.dump({'size': size, 'mode': mode, 'step': self.step}, f)
+
+    @classmethod
+    def attach(cls, directory: str, mode: str = 'r') -> 'UtilityHistory':
+        # Opens a history written by another process. Values written in place show up live; after the writer grew
+        # the trace, attach again to see the new rows.
+        with open(os.path.join(directory, cls.metadata_file)) as f:
+            metadata = json.load(f)
+        history = cls.__new__(cls)
+        history.size = metadata['size']
+        history.mode = metadata['mode']
+        history.step = metadata['step']
+        history.directory = directory
+        history.count = storage.open_array(directory, 'count', mode)
+        history.trace_count = storage.open_array(directory, 'trace_count', mode)
+        history._recent = storage.open_array(directory, 'recent', mode)
+        history._latest = storage.open_array(directory, 'latest', mode)
+        history._trace = None if history.mode == cls.last else storage.open_array(directory, 'trace', mode)
+        return history
+
+    def flush(self) -> None:
+        storage.flush(self.count, self.trace_count, self._recent, self._latest, self._trace)
+
+    @property
+    def records_trace(self) -> bool:
+        return self._trace is not None
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self._trace.shape[0]:
+            return
+        new_rows = max(rows, 2 * self._trace.shape[0])
+        self._trace = storage.resize_rows(self.directory, 'trace', self._trace, new_rows, np.nan)
+
+    def append(self, index: int, value: float) -> None:
+        position = self.count.item(index)
+        self._recent[position % 2, index] = value
+        self._latest[index] = value
+        if self.records_trace and position % self.step == 0:
+            row = int(self.trace_count[index])
+            self._reserve(row + 1)
+            self._trace[row, index] = value
+            self.trace_count[index] += 1
+        self.count[index] += 1
+
+    def append_row(self, values: np.ndarray, columns: np.ndarray) -> None:
+        positions = self.count[columns]
+        self._recent[positions % 2, columns] = values[columns]
+        self._latest[columns] = values[columns]
+        if self.records_trace:
+            recorded = columns[positions % self.step == 0]
+            if recorded.size:
+                rows = self.trace_count[recorded]
+                self._reserve(int(rows.max()) + 1)
+                self._trace[rows, recorded] = values[recorded]
+                self.trace_count[recorded] += 1
+        self.count[columns] += 1
+
+    def _recorded_value(self, index: int, position: int) -> float:
+        if position < 0 or not self.records_trace or position % self.step:
+            return np.nan
+        return self._trace[position // self.step, index]
+
+    def last_value(self, index: int) -> float:
+        value = self._latest.item(index)
+        if value != value:
+            raise IndexError
+        return value
+
+    def previous_value(self, index: int) -> float:
+        position = int(self.count[index]) - 2
+        if position < 0 or np.isnan(self._recent[position % 2, index]):
+            raise IndexError
+        return float(self._recent[position % 2, index])
+
+    def pop(self, index: int) -> float:
+        value = self.last_value(index)
+        position = int(self.count[index]) - 1
+        if self.records_trace and position % self.step == 0:
+            self.trace_count[index] -= 1
+            self._trace[self.trace_count[index], index] = np.nan
+        self._recent[position % 2, index] = self._recorded_value(index, position - 2)
+        self._latest[index] = self._recent[(position - 1) % 2, index] if position else np.nan
+        self.count[index] -= 1
+        return value
+
+    def latest(self) -> np.ndarray:
+        return self._latest.copy()
+
+    def differences(self, columns: np.ndarray) -> np.ndarray:
+        counts = self.count[columns]
+        last = self._recent[(counts - 1) % 2, columns]
+        previous = self._recent[counts % 2, columns]
+        differences = np.abs(last - previous)
+        differences[(counts < 2) | np.isnan(differences)] = np.inf
+        return differences
+
+    def values(self, index: int) -> List[float]:
+        if self.records_trace:
+            return self._trace[:self.trace_count[index], index].tolist()
+        count = int(self.count[index])
+        values = [self._recent[position % 2, index].item() for position in range(max(count - 2, 0), count)]
+        return [value for value in values if not np.isnan(value)]
+
+    def trace(self, columns: np.ndarray) -> np.ndarray:
+        if not self.records_trace:
+            raise HistoryNotRecordedException("History mode {} does not record a trace.".format(self.mode))
+        rows = int(self.trace_count[columns].min()) if len(columns) else 0
+        return self._trace[:rows, columns]
+
+    def iterations(self, rows: int) -> np.ndarray:
+        return np.arange(rows) * self.step
@@ -1,11 +1,11 @@
-import functools
 import numpy as np
-import operator
-from typing import List, Tuple, Iterable
+from typing import Callable, List, Tuple, Iterable
 
 import toml
 
-from markov_libs import WorldFactory, Field, EmptyUtilityHistoryException
+from markov_libs import Board, WorldFactory, Field, EmptyUtilityHistoryException, ArrayEngine, TransitionTable
+from markov_libs import UtilityHistory, CsrMatrix, SparseEngine, PrioritizedSweeping, RandomStream
+from markov_libs import gnuplot_header, gnuplot_lines, WorldCache, WorldCacheException, Profiler, profile_phase
 
 
 class BoardEmptyException(Exception):
@@ -31,6 +31,12 @@ class World:
     down = 'v'
 
     actions = (up, left, right, down)
+    action_ids = Field.action_ids
+
+    front_outcome = 0
+    left_outcome = 1
+    right_outcome = 2
+    back_outcome = 3
 
     x_modifier_front = {up: 0, left: -1, right: 1, down: 0}
     y_modifier_front = {up: 1, left: 0, right: 0, down: -1}
@@ -44,6 +50,14 @@ class World:
     x_modifier_back = {up: 0, left: 1, right: -1, down: 0}
     y_modifier_back = {up: -1, left: 0, right: 0, down: 1}
 
+    fields_engine = 'fields'
+    numpy_engine = 'numpy'
+    sparse_engine = 'sparse'
+    engines = (fields_engine, numpy_engine, sparse_engine)
+
+    exact_evaluation_states = 2500
+    iterative_evaluation_sweeps = 1000
+
     def __init__(self):
         self.data = None
         self._board = []
@@ -52,6 +66,17 @@ class World:
         self.epsilon = None
         self.probability = []
         self.initial_utility = 0.0
+        self._array_engines = {}
+        self._start = None
+        self._updatable_columns = np.array([], dtype=np.intp)
+        self.transitions = None
+        self.history_mode = UtilityHistory.full
+        self.history_step = 1
+        self.history_directory = None
+        self.history_overwrite = False
+        self.history = None
+        self.random = RandomStream()
+        self.profiler = Profiler.active
 
     @property
     def front_probability(self):
@@ -69,126 +94,311 @@ class World:
     def backward_probability(self):
         return self.probability[3]
 
-    def load(self, filename: str):
-        self._parse_toml(filename)
-        self._set_values()
+    def load(self, filename: str, cache: bool = False):
+        # With cache the world is read from the compiled file next to it, which is (re)built when the source changed.
+        world_cache = None
+        with profile_phase(self.profiler, 'parse'):
+            if cache:
+                world_cache = self._load_cache(filename)
+            else:
+                self._parse_toml(filename)
+        with profile_phase(self.profiler, 'build'):
+            self._set_values(world_cache)
+
+    def load_compiled(self, world_cache: WorldCache):
+        # Sets the world up from arrays that are already compiled, e.g. by WorldGenerator, without any text.
+        self.data = world_cache.data()
+        with profile_phase(self.profiler, 'build'):
+            self._set_values(world_cache)
+
+    def _load_cache(self, filename: str) -> WorldCache:
+        with open(filename, 'rb') as f:
+            source = f.read()
+        source_hash = WorldCache.source_hash(source)
+        path = WorldCache.path_for(filename)
+        try:
+            world_cache = WorldCache.read(path, source_hash)
+        except (OSError, ValueError, WorldCacheException):
+            self.data = toml.loads(source.decode('utf8'))
+            world_cache = WorldCache.compile(self.data, source_hash)
+            try:
+                world_cache.write(path)
+            except OSError:
+                # A read-only directory only costs the cache; the compiled arrays are still used.
+                pass
+        else:
+            self.data = world_cache.data()
+        return world_cache
 
     def _parse_toml(self, filename):
         with open(filename, 'r') as f:
             data = toml.loads(f.read())
         self.data = data
 
-    def _set_values(self):
+    def _set_values(self, world_cache: WorldCache = None):
         self.title = self.data['title']
         self.gamma = self.data['gamma']
         self.epsilon = self.data['epsilon']
         self.probability = self.data['probability']
         world_factory = WorldFactory(self.data)
-        world_factory.board_generator()
+        if world_cache is None:
+            world_factory.board_generator()
+        else:
+            world_factory.board_from_cache(world_cache)
         self._board = world_factory.board
+        self._start = world_factory.start
+        self._updatable_columns = np.flatnonzero(
+            ~(self._board.mask(Field.terminal) | self._board.mask(Field.forbidden))
+        )
+        self.transitions = self._compile_transitions()
+        self._bind_history()
+        self._array_engines = {}
+
+    def set_history_mode(self, mode: str, step: int = 1, directory: str = None, overwrite: bool = False) -> None:
+        # With a directory the history is kept in memory-mapped files there, which attach_history opens from
+        # another process. A directory holding the history of another run is only replaced with overwrite.
+        size = self._board.size if self._board else 0
+        if size and self._owns_history(directory):
+            # The files are recreated below, so the recorded values move to memory first to be carried over.
+            self._board.bind_history(UtilityHistory(size))
+            overwrite = True
+        history = UtilityHistory(size, mode, step, directory if size else None, overwrite)
+        self.history_mode = mode
+        self.history_step = step
+        self.history_directory = directory
+        self.history_overwrite = overwrite
+        if size:
+            self._bind_history(history)
+
+    def _owns_history(self, directory: str) -> bool:
+        return directory is not None and self.history is not None and self.history.directory == directory
+
+    def _bind_history(self, history: UtilityHistory = None) -> None:
+        if history is None:
+            history = UtilityHistory(
+                self._board.size, self.history_mode, self.history_step, self.history_directory,
+                self.history_overwrite or self._owns_history(self.history_directory)
+            )
+        self._board.bind_history(history)
+        self.history = history
+
+    def attach_history(self, directory: str) -> None:
+        # Read-only view of the history another World records in directory, so generate_gnuplot_file and
+        # printing follow a long run while it goes. Nothing is written to directory.
+        history = UtilityHistory.attach(directory)
+        if not self._board or history.size != self._board.size:
+            raise AttributeError("History of {} fields does not fit the loaded world".format(history.size))
+        self._board.bind_history(history, carry_over=False)
+        self.history = history
+
+    def _compile_transitions(self) -> TransitionTable:
+        shape = (self._board.height, self._board.width)
+        forbidden = self._board.mask(Field.forbidden).reshape(shape)
+        terminal = self._board.mask(Field.terminal).reshape(shape)
+        modifiers = [
+            (
+                (self.x_modifier_front[action], self.y_modifier_front[action]),
+                (self.x_modifier_left[action], self.y_modifier_left[action]),
+                (self.x_modifier_right[action], self.y_modifier_right[action]),
+                (self.x_modifier_back[action], self.y_modifier_back[action])
+            )
+            for action in self.actions
+        ]
+        return TransitionTable.compile(forbidden, terminal, modifiers, self.probability)
+
+    @property
+    def board(self) -> Board:
+        return self._board
 
     def field(self, x: int, y: int) -> Field:
-        return self._board[y][x]
+        return self._board.field(x, y)
 
     def start_field(self) -> Field:
-        fields_data = self.data['state']
-        position = None
-        for field_data in fields_data:
-            if field_data['s_type'] == Field.start:
-                position = field_data['position']
-                break
-        return self.field(position[0], position[1])
+        return self.field(*self._start)
 
     def field_allowed(self, x: int, y: int) -> Field:
         if x < 0 or y < 0 or x > self.max_x or y > self.max_y:
             raise FieldDoesNotExistException
-        field = self._board[y][x]
-        if field.state is Field.forbidden:
+        field = self._board.field(x, y)
+        if field.state_id == Field.forbidden_id:
             raise FieldForbiddenException
         return field
 
     @property
     def max_x(self) -> int:
-        return len(self._board[0]) - 1
+        return self._board.width - 1
 
     @property
     def max_y(self) -> int:
-        return len(self._board) - 1
+        return self._board.height - 1
 
     def fields_around(self, field: Field, action: str) -> Tuple[Field, Field, Field, Field]:
-        return (
-            self.position_front(field, action),
-            self.position_left(field, action),
-            self.position_right(field, action),
-            self.position_back(field, action)
-        )
+        outcomes = self.transitions.outcomes(self.field_index(field), self.action_ids[action])
+        return tuple(self._board.field_at(index) for index in outcomes)
+
+    def field_index(self, field: Field) -> int:
+        return field.y * (self.max_x + 1) + field.x
+
+    def _position(self, field: Field, action: str, outcome: int) -> Field:
+        index = self.transitions.successor(self.field_index(field), self.action_ids[action], outcome)
+        return self._board.field_at(index)
 
     def position_front(self, field: Field, action: str) -> Field:
-        if field.state is Field.terminal:
-            return field
-        try:
-            x_in_front = field.x + self.x_modifier_front[action]
-            y_in_front = field.y + self.y_modifier_front[action]
-            return self.field_allowed(x=x_in_front, y=y_in_front)
-        except (FieldDoesNotExistException, FieldForbiddenException):
-            return field
+        return self._position(field, action, self.front_outcome)
 
     def position_left(self, field: Field, action: str) -> Field:
-        if field.state is Field.terminal:
-            return field
-        try:
-            x_on_left = field.x + self.x_modifier_left[action]
-            y_on_left = field.y + self.y_modifier_left[action]
-            return self.field_allowed(x=x_on_left, y=y_on_left)
-        except (FieldDoesNotExistException, FieldForbiddenException):
-            return field
+        return self._position(field, action, self.left_outcome)
 
     def position_right(self, field: Field, action: str) -> Field:
-        if field.state is Field.terminal:
-            return field
-        try:
-            x_on_right = field.x + self.x_modifier_right[action]
-            y_on_right = field.y + self.y_modifier_right[action]
-            return self.field_allowed(x=x_on_right, y=y_on_right)
-        except (FieldDoesNotExistException, FieldForbiddenException):
-            return field
+        return self._position(field, action, self.right_outcome)
 
     def position_back(self, field: Field, action: str) -> Field:
-        if field.state is Field.terminal:
-            return field
-        try:
-            x_in_back = field.x + self.x_modifier_back[action]
-            y_in_back = field.y + self.y_modifier_back[action]
-            return self.field_allowed(x=x_in_back, y=y_in_back)
-        except (FieldDoesNotExistException, FieldForbiddenException):
-            return field
+        return self._position(field, action, self.back_outcome)
 
-    def mdp(self, n: int = None, termination_value: float = None):
-        if n is not None:
-            for _ in range(n):
-                for field in self.all_fields():
-                    if field.state is not Field.forbidden:
-                        field.utility = field.reward + self.gamma * self.max_of_all_actions(field)
-        elif termination_value is not None:
-            while not self._mdp_stop(termination_value):
-                for field in self.all_fields():
-                    if field.state is not Field.forbidden:
-                        field.utility = field.reward + self.gamma * self.max_of_all_actions(field)
-        else:
+    def mdp(self, n: int = None, termination_value: float = None, engine: str = fields_engine,
+            max_error: float = None, callback: Callable[[int, float], None] = None) -> int:
+        self._check_engine(engine)
+        threshold = self._termination_threshold(termination_value, max_error)
+        if n is None and threshold is None:
             raise AttributeError("Provide either maximum iterations or difference termination value")
+        if engine == self.fields_engine:
+            sweep = self._sweep
+        else:
+            sweep = self._array_sweep(self.array_engine(engine))
+        if n is not None:
+            with profile_phase(self.profiler, 'sweeps'):
+                for iteration in range(1, n + 1):
+                    residual = sweep()
+                    if callback is not None:
+                        callback(iteration, residual)
+            self._count_sweeps(n)
+            return n
+        iteration = 0
+        with profile_phase(self.profiler, 'residual'):
+            residual = self._residual()
+        with profile_phase(self.profiler, 'sweeps'):
+            while not residual < threshold:
+                residual = sweep()
+                iteration += 1
+                if callback is not None:
+                    callback(iteration, residual)
+        self._count_sweeps(iteration)
+        return iteration
+
+    def _count_sweeps(self, sweeps: int) -> None:
+        # Every sweep backs up each allowed field and resolves the wall bumps of every updatable one.
+        if self.profiler is None:
+            return
+        self.profiler.count('sweeps', sweeps)
+        self.profiler.count('backups', sweeps * int((~self._board.mask(Field.forbidden)).sum()))
+        self.profiler.count('wall_bumps', sweeps * self.transitions.bumps(self._updatable_columns))
+
+    def _termination_threshold(self, termination_value: float = None, max_error: float = None) -> float or None:
+        if termination_value is not None and max_error is not None:
+            raise ValueError("Provide either termination_value or max_error, not both")
+        if max_error is None:
+            return termination_value
+        if self.gamma >= 1:
+            raise AttributeError("Error bound max_error * (1 - gamma) / gamma requires gamma < 1")
+        if self.gamma == 0:
+            return float('inf')
+        return max_error * (1 - self.gamma) / self.gamma
+
+    def _check_engine(self, engine: str) -> None:
+        if engine not in self.engines:
+            raise AttributeError("Engine {} is unknown. Use one of engines: {}".format(engine, self.engines))
+
+    def array_engine(self, engine: str = numpy_engine) -> ArrayEngine:
+        if engine not in self._array_engines:
+            self._array_engines[engine] = SparseEngine(self) if engine == self.sparse_engine else ArrayEngine(self)
+        return self._array_engines[engine]
+
+    def transition_matrices(self) -> List[CsrMatrix]:
+        return self.array_engine(self.sparse_engine).transition_matrices()
+
+    def _sweep(self) -> float:
+        residual = 0.0
+        for field in self._board.fields():
+            if field.state_id == Field.forbidden_id:
+                continue
+            utility = field.reward + self.gamma * self.max_of_all_actions(field)
+            if field.state_id != Field.terminal_id:
+                try:
+                    residual = max(residual, abs(utility - field.utility))
+                except EmptyUtilityHistoryException:
+                    residual = float('inf')
+            field.utility = utility
+        return residual
+
+    def _start_array_solve(self, engine: ArrayEngine) -> np.ndarray:
+        utilities = engine.initial_utilities(self.history, self.initial_utility)
+        self.history.append_row(utilities, np.flatnonzero(engine.updatable & (self.history.count == 0)))
+        return utilities
+
+    def _array_sweep(self, engine: ArrayEngine) -> Callable[[], float]:
+        history = self.history
+        utilities = self._start_array_solve(engine)
+        columns = np.flatnonzero(~engine.forbidden)
+
+        def sweep() -> float:
+            nonlocal utilities
+            new_utilities = engine.backup(utilities)
+            residual = engine.residual(utilities, new_utilities)
+            utilities = new_utilities
+            history.append_row(utilities, columns)
+            return residual
+
+        return sweep
+
+    def _residual(self) -> float:
+        if not self._updatable_columns.size:
+            return 0.0
+        return float(self.history.differences(self._updatable_columns).max())
+
+    def policy_iteration(self, evaluation_sweeps: int = None, termination_value: float = 1e-10,
+                         max_iterations: int = 1000, exact_max_states: int = exact_evaluation_states) -> int:
+        engine = self.array_engine()
+        history = self.history
+        utilities = self._start_array_solve(engine)
+        columns = np.flatnonzero(~engine.forbidden)
+        exact = evaluation_sweeps is None and int(engine.updatable.sum()) <= exact_max_states
+        policy = engine.policy(utilities)
+        iteration = 0
+        while iteration < max_iterations:
+            utilities = self._evaluate_policy(engine, policy, utilities, evaluation_sweeps, termination_value, exact)
+            history.append_row(utilities, columns)
+            iteration += 1
+            new_policy = engine.improve_policy(utilities, policy)
+            stable = np.array_equal(new_policy, policy)
+            policy = new_policy
+            if stable and engine.residual(utilities, engine.backup(utilities)) < termination_value:
+                break
+        self._set_policy(engine, policy)
+        return iteration
+
+    def prioritized_sweeping(self, termination_value: float, max_backups: int = None) -> int:
+        engine = self.array_engine(self.sparse_engine)
+        utilities = self._start_array_solve(engine)
+        utilities, backups = PrioritizedSweeping(engine).run(utilities, termination_value, max_backups)
+        self.history.append_row(utilities, np.flatnonzero(~engine.forbidden))
+        return backups
+
+    def _evaluate_policy(self, engine: ArrayEngine, policy: np.ndarray, utilities: np.ndarray,
+                         evaluation_sweeps: int, termination_value: float, exact: bool) -> np.ndarray:
+        if exact:
+            try:
+                return engine.evaluate_exact(policy)
+            except np.linalg.LinAlgError:
+                return engine.evaluate_iterative(policy, utilities, self.iterative_evaluation_sweeps)
+        if evaluation_sweeps is not None:
+            return engine.evaluate_iterative(policy, utilities, evaluation_sweeps)
+        return engine.evaluate_iterative(policy, utilities, self.iterative_evaluation_sweeps, termination_value)
 
     def _mdp_stop(self, termination_value: float) -> bool:
-        differences = []
-        for field in self.all_fields():
-            if field.state not in [Field.terminal, Field.forbidden]:
-                try:
-                    differences.append(abs(field.utility_history[-2] - field.utility_history[-1]))
-                except IndexError:
-                    differences.append(float('inf'))
-        return max(differences) < termination_value
+        return self._residual() < termination_value
 
     def all_fields(self) -> List[Field]:
-        return functools.reduce(operator.iconcat, self._board, [])
+        return self._board.fields()
 
     def max_of_all_actions(self, field: Field) -> float:
         results = []
@@ -197,7 +407,7 @@ class World:
         return max(results)
 
     def pu_sum_for_action(self, field: Field, action: str) -> float:
-        if field.state is Field.terminal:
+        if field.state_id == Field.terminal_id:
             return 0.0
         fields_around = self.fields_around(field, action)
         fields_utilities = self._get_utilities_for_fields(fields_around)
@@ -213,11 +423,22 @@ class World:
                 field.utility = self.initial_utility
         return return_list
 
-    def calculate_policy(self):
-        fields = self.all_fields()
-        for field in fields:
-            if field.state not in [Field.terminal, Field.forbidden]:
-                field.policy = self._calculate_policy_for_field(field)
+    def calculate_policy(self, engine: str = fields_engine):
+        self._check_engine(engine)
+        with profile_phase(self.profiler, 'policy'):
+            if engine != self.fields_engine:
+                self._calculate_policy_array(self.array_engine(engine))
+                return
+            fields = self.all_fields()
+            for field in fields:
+                if field.state_id not in (Field.terminal_id, Field.forbidden_id):
+                    field.policy = self._calculate_policy_for_field(field)
+
+    def _calculate_policy_array(self, engine: ArrayEngine):
+        self._set_policy(engine, engine.policy(engine.initial_utilities(self.history, self.initial_utility)))
+
+    def _set_policy(self, engine: ArrayEngine, policy: np.ndarray) -> None:
+        self._board.policy_ids[engine.updatable] = policy[engine.updatable]
 
     def _calculate_policy_for_field(self, field) -> str:
         utilities = []
@@ -227,51 +448,46 @@ class World:
         return self.actions[utilities.index(max_value)]
 
     def generate_gnuplot_file(self, filename: str):
-        fields = self.all_fields()
-        utilities_length = len(fields[0].utility_history)-1
+        columns = np.flatnonzero(~self._board.mask(Field.forbidden))
+        trace = self.history.trace(columns)
+        iterations = self.history.iterations(trace.shape[0])
+        labels = [
+            '({x},{y})'.format(x=x + 1, y=y + 1)
+            for x, y in zip((columns % self._board.width).tolist(), (columns // self._board.width).tolist())
+        ]
         with open(filename, 'w') as f:
-            f.write('iteration ')
-            for field in fields:
-                if field.state is not Field.forbidden:
-                    f.write('({x},{y}) '.format(x=field.x+1, y=field.y+1))
-            f.write('\n')
-            for i in range(utilities_length):
-                line = "{} ".format(str(i))
-                for field in fields:
-                    if field.state is not Field.forbidden:
-                        line += "{} ".format(field.utility_history[i])
-                line += '\n'
-                f.write(line)
+            f.write(gnuplot_header(labels))
+            f.write(''.join(gnuplot_lines(iterations.tolist(), trace.tolist())))
 
     def __str__(self):
         return_string = ""
         for j in range(self.max_y, -1, -1):
             return_string += ("--------"*(self.max_x+1) + "-\n")
             for i in range(0, self.max_x+1):
-                return_string += ("|{}     {}".format(self._board[j][i].str_policy, self._board[j][i].state))
+                return_string += ("|{}     {}".format(self.field(i, j).str_policy, self.field(i, j).state))
             return_string += "|\n"
             for i in range(0, self.max_x+1):
-                return_string += ("|{}".format(self._board[j][i].str_utility))
+                return_string += ("|{}".format(self.field(i, j).str_utility))
             return_string += "|\n"
         return_string += ("--------" * (self.max_x + 1) + "-\n")
         return return_string
 
     def agent_move(self, current_position: Field, intended_action: str) -> Field:
         self.update_actions_counter(current_position, intended_action)
-        random_number = np.random.random()
-        if random_number < self.front_probability:
-            return self.position_front(current_position, intended_action)
-        elif random_number < self.front_probability + self.left_probability:
-            return self.position_left(current_position, intended_action)
-        elif random_number < self.front_probability + self.left_probability + self.right_probability:
-            return self.position_right(current_position, intended_action)
-        else:
-            return self.position_back(current_position, intended_action)
+        state = self.field_index(current_position)
+        index = self.sample_move(state, self.action_ids[intended_action])
+        if self.profiler is not None:
+            self.profiler.count('agent_moves')
+            self.profiler.count('agent_wall_bumps', index == state)
+        return self._board.field_at(index)
+
+    def sample_move(self, state: int, action: int) -> int:
+        outcome = self.transitions.sample_outcome(self.random.random())
+        return self.transitions.successor(state, action, outcome)
 
     @staticmethod
     def update_actions_counter(field: Field, action: str) -> None:
         field.increment_action_counter(action)
 
     def clean_q(self):
-        for field in self.all_fields():
-            field.clean_q()
+        self._board.clean_q()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+from markov_libs import Board, Field
+
+
+class WorldCacheException(Exception):
+    pass
+
+
+class WorldCache:
+    # Compiled form of a world file: a JSON header with the parameters and the hash of the source, followed by
+    # the state code and reward id of every cell as arrays that are memory-mapped on load. Reward ids index the
+    # header's reward list, so rewards keep the exact values (and int or float type) of the source.
+    suffix = '.cache'
+    magic = b'MDPWORLD'
+    version = 1
+    alignment = 64
+    state_codes = Board.states
+    parameters = ('title', 'size', 'reward', 'gamma', 'epsilon', 'probability')
+
+    def __init__(self, header: dict, states: np.ndarray, reward_ids: np.ndarray):
+        self.header = header
+        self.states = states
+        self.reward_ids = reward_ids
+
+    @classmethod
+    def path_for(cls, filename: str) -> str:
+        return filename + cls.suffix
+
+    @staticmethod
+    def source_hash(source: bytes) -> str:
+        return hashlib.sha256(source).hexdigest()
+
+    @classmethod
+    def compile(cls, data: dict, source_hash: str) -> 'WorldCache':
+        width, height = data['size']
+        states = np.zeros((height, width), dtype=np.uint8)
+        reward_ids = np.zeros((height, width), dtype=np.int32)
+        rewards = [data.get('reward')]
+        for state in data['state']:
+            x, y = state['position']
+            state_type = state['s_type']
+            states[y, x] = cls.state_codes.index(state_type)
+            if state_type == Field.forbidden:
+                reward_ids[y, x] = -1
+            elif state_type in [Field.terminal, Field.special]:
+                rewards.append(state['value'])
+                reward_ids[y, x] = len(rewards) - 1
+            else:
+                reward_ids[y, x] = 0
+        start = [state['position'] for state in data['state'] if state['s_type'] == Field.start]
+        header = {parameter: data.get(parameter) for parameter in cls.parameters}
+        header.update({'hash': source_hash, 'rewards': rewards, 'start': start[0] if start else None})
+        return cls(header, states, reward_ids)
+
+    def data(self) -> dict:
+        # The parsed-TOML layout World.data has always had; state entries are only built for special cells.
+        data = {parameter: self.header[parameter] for parameter in self.parameters}
+        rewards = self.header['rewards']
+        ys, xs = np.nonzero(self.states)
+        states = []
+        for x, y, code, reward_id in zip(xs.tolist(), ys.tolist(), self.states[ys, xs].tolist(),
+                                         self.reward_ids[ys, xs].tolist()):
+            state = {'s_type': self.state_codes[code], 'position': [x, y]}
+            if state['s_type'] in [Field.terminal, Field.special]:
+                state['value'] = rewards[reward_id]
+            states.append(state)
+        data['state'] = states
+        return data
+
+    def write(self, path: str) -> None:
+        arrays = self._layout()
+        header = dict(self.header, arrays={
+            name: [offset, array.dtype.str, list(array.shape)] for name, (offset, array) in arrays.items()
+        })
+        encoded = json.dumps(header).encode('utf8')
+        start = self._arrays_start(len(encoded))
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            f.write(self.magic + struct.pack('<II', self.version, len(encoded)) + encoded)
+            for offset, array in arrays.values():
+                f.write(b'\0' * (start + offset - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temporary_path, path)
+
+    def _layout(self) -> Dict[str, Tuple[int, np.ndarray]]:
+        reward_offset = -(-self.states.nbytes // self.alignment) * self.alignment
+        return {'states': (0, self.states), 'reward_ids': (reward_offset, self.reward_ids)}
+
+    @classmethod
+    def _arrays_start(cls, header_length: int) -> int:
+        end = len(cls.magic) + 8 + header_length
+        return -(-end // cls.alignment) * cls.alignment
+
+    @classmethod
+    def read(cls, path: str, source_hash: str = None) -> 'WorldCache':
+        with open(path, 'rb') as f:
+            prefix = f.read(len(cls.magic) + 8)
+            if len(prefix) < len(cls.magic) + 8 or prefix[:len(cls.magic)] != cls.magic:
+                raise WorldCacheException("{} is not a world cache".format(path))
+            version, header_length = struct.unpack('<II', prefix[len(cls.magic):])
+            if version != cls.version:
+                raise WorldCacheException("World cache version {} is not supported".format(version))
+            header = json.loads(f.read(header_length).decode('utf8'))
+        if source_hash is not None and header['hash'] != source_hash:
+            raise WorldCacheException("World cache {} does not match its source".format(path))
+        start = cls._arrays_start(header_length)
+        arrays = {
+            name: np.memmap(path, dtype=np.dtype(dtype), mode='r', offset=start + offset, shape=tuple(shape))
+            for name, (offset, dtype, shape) in header.pop('arrays').items()
+        }
+        return cls(header, arrays['states'], arrays['reward_ids'])
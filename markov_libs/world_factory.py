@@ -1,6 +1,6 @@
 from typing import List
 
-from markov_libs import Field
+from markov_libs import Board, Field
 
 
 class BoardEmptyException(Exception):
@@ -15,6 +15,7 @@ class WorldFactory:
     def __init__(self, data: dict):
         self.data = data
         self.board = []
+        self.start = None
 
     def board_generator(self):
         size = self._get_board_size()
@@ -37,14 +38,12 @@ class WorldFactory:
     def _generate_table_for_board(x: int, y: int) -> List[List[None]]:
         return [[None] * x for _ in range(y)]
 
-    def _fill_board_with_default(self, board: List[List[None]]) -> List[List[Field]]:
+    def _fill_board_with_default(self, board: List[List[None]]) -> Board:
         if not board:
             raise BoardEmptyException("Board is empty, use _generate_table_for_board first.")
         reward = self._get_default_reward()
-        for y in range(len(board)):
-            for x in range(len(board[0])):
-                board[y][x] = Field(Field.normal, x=x, y=y, reward=reward)
-        return board
+        Field.validate(Field.normal, reward)
+        return Board(len(board[0]), len(board), reward)
 
     def _add_state_fields(self):
         for state_field in self.data['state']:
@@ -52,19 +51,26 @@ class WorldFactory:
             y = state_field['position'][1]
             field_type = state_field.get('s_type')
             field_reward = self._get_reward_for_field(state_field)
-            field = Field(
-                state=field_type,
-                x=x, y=y,
-                reward=field_reward
-            )
-            self.board[y][x] = field
+            Field.validate(field_type, field_reward)
+            self.board.set_cell(x, y, field_type, field_reward)
+            if field_type == Field.start and self.start is None:
+                self.start = (x, y)
+
+    def board_from_cache(self, world_cache) -> None:
+        height, width = world_cache.states.shape
+        self.board = Board.from_arrays(
+            width, height, world_cache.states, world_cache.reward_ids, world_cache.header['rewards']
+        )
+        if not self.board.size:
+            raise BoardEmptyException("Board is empty.")
+        self.start = tuple(world_cache.header['start']) if world_cache.header['start'] is not None else None
 
     def _get_reward_for_field(self, state_dict: dict) -> int or None:
         field_type = state_dict['s_type']
         default_reward = self.data['reward']
-        if field_type is Field.start:
+        if field_type == Field.start:
             return default_reward
-        elif field_type is Field.special or field_type is Field.terminal:
+        elif field_type == Field.special or field_type == Field.terminal:
             return state_dict['value']
         else:
             return None
@@ -0,0 +1,168 @@
+from collections import deque
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import toml
+
+from markov_libs import Board, RandomStream, WorldCache
+
+
+class WorldLayoutUnknownException(Exception):
+    pass
+
+
+class WorldGenerator:
+    # Seeded random worlds of any size. The open layout scatters forbidden cells with the given density, the maze
+    # layout carves one-cell corridors between walls. Start, terminals and special cells are placed on distinct
+    # cells reachable from the start, so every episode can end. The result is compiled straight into arrays
+    # (a WorldCache), which World.load_compiled uses without any text; data() and write() give the TOML form.
+    open_layout = 'open'
+    maze_layout = 'maze'
+    layouts = (open_layout, maze_layout)
+
+    def __init__(self, width: int, height: int, seed: int = None, layout: str = open_layout,
+                 forbidden_density: float = 0.1, terminals: int = 2, specials: int = 0, reward: float = -0.04,
+                 terminal_rewards: Sequence[float] = (1, -1), special_reward: float = -0.5, gamma: float = 0.9,
+                 epsilon: float = 0.1, probability: Sequence[float] = (0.8, 0.1, 0.1, 0.0), title: str = None):
+        if layout not in self.layouts:
+            raise WorldLayoutUnknownException("Layout {} is unknown. Use one of layouts: {}".format(
+                layout, self.layouts)
+            )
+        if width < 1 or height < 1:
+            raise AttributeError("World size has to be positive, got {}x{}".format(width, height))
+        if terminals < 1:
+            raise AttributeError("A world needs at least one terminal, got {}".format(terminals))
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.layout = layout
+        self.forbidden_density = forbidden_density
+        self.terminals = terminals
+        self.specials = specials
+        self.reward = reward
+        self.terminal_rewards = list(terminal_rewards)
+        self.special_reward = special_reward
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.probability = list(probability)
+        self.title = title or '{}{}x{}'.format(layout, width, height)
+
+    def compile(self) -> WorldCache:
+        random = np.random.default_rng(self.seed)
+        states = np.full((self.height, self.width), Board.normal_id, dtype=np.uint8)
+        if self.layout == self.maze_layout:
+            open_cells = self._maze(random)
+        else:
+            open_cells = random.random(states.shape) >= self.forbidden_density
+        open_indices = np.flatnonzero(open_cells)
+        if not open_indices.size:
+            raise AttributeError("Forbidden density {} leaves no open cell".format(self.forbidden_density))
+        start, reachable = self._place_start(random, open_cells.reshape(-1), open_indices)
+        placed = random.permutation(reachable)[:self.terminals + self.specials]
+        terminal_cells, special_cells = placed[:self.terminals], placed[self.terminals:]
+
+        flat_states = states.reshape(-1)
+        flat_states[~open_cells.reshape(-1)] = Board.forbidden_id
+        flat_states[start] = Board.start_id
+        flat_states[terminal_cells] = Board.terminal_id
+        flat_states[special_cells] = Board.special_id
+        rewards = [self.reward] + self.terminal_rewards + [self.special_reward]
+        reward_ids = np.zeros(states.shape, dtype=np.int32)
+        flat_reward_ids = reward_ids.reshape(-1)
+        flat_reward_ids[flat_states == Board.forbidden_id] = Board.no_reward
+        flat_reward_ids[terminal_cells] = 1 + np.arange(self.terminals) % len(self.terminal_rewards)
+        flat_reward_ids[special_cells] = len(rewards) - 1
+        header = {
+            'title': self.title,
+            'size': [self.width, self.height],
+            'reward': self.reward,
+            'gamma': self.gamma,
+            'epsilon': self.epsilon,
+            'probability': self.probability,
+            'hash': None,
+            'rewards': rewards,
+            'start': [start % self.width, start // self.width]
+        }
+        return WorldCache(header, states, reward_ids)
+
+    def _maze(self, random: np.random.Generator) -> np.ndarray:
+        # Depth-first carving on the cells with both coordinates even; the cell between two carved cells becomes
+        # the corridor joining them.
+        width = self.width
+        rooms_x = (width + 1) // 2
+        rooms_y = (self.height + 1) // 2
+        open_cells = bytearray(width * self.height)
+        visited = bytearray(rooms_x * rooms_y)
+        stream = RandomStream(random)
+        steps = ((0, 1), (0, -1), (1, 0), (-1, 0))
+        x, y = stream.integers(rooms_x), stream.integers(rooms_y)
+        visited[y * rooms_x + x] = 1
+        open_cells[2 * y * width + 2 * x] = 1
+        stack = [(x, y)]
+        while stack:
+            x, y = stack[-1]
+            neighbours = [
+                (x + dx, y + dy) for dx, dy in steps
+                if 0 <= x + dx < rooms_x and 0 <= y + dy < rooms_y and not visited[(y + dy) * rooms_x + x + dx]
+            ]
+            if not neighbours:
+                stack.pop()
+                continue
+            next_x, next_y = neighbours[stream.integers(len(neighbours))]
+            visited[next_y * rooms_x + next_x] = 1
+            open_cells[(y + next_y) * width + x + next_x] = 1
+            open_cells[2 * next_y * width + 2 * next_x] = 1
+            stack.append((next_x, next_y))
+        return np.frombuffer(bytes(open_cells), dtype=np.uint8).reshape(self.height, width).astype(bool)
+
+    def _place_start(self, random: np.random.Generator, open_cells: np.ndarray,
+                     open_indices: np.ndarray) -> Tuple[int, np.ndarray]:
+        # Returns the start and the other cells reachable from it. Starts are tried in random order until one
+        # has room for every terminal and special cell; regions already explored are not tried again.
+        needed = self.terminals + self.specials
+        if self.layout == self.maze_layout:
+            # A carved maze is connected by construction.
+            start = int(random.choice(open_indices))
+            reachable = open_indices[open_indices != start]
+            if reachable.size >= needed:
+                return start, reachable
+        else:
+            open_list = open_cells.tolist()
+            seen = bytearray(open_cells.size)
+            for start in random.permutation(open_indices).tolist():
+                if seen[start]:
+                    continue
+                region = self._reachable(open_list, start, seen)
+                if len(region) > needed:
+                    return start, np.array(region[1:], dtype=np.intp)
+        raise AttributeError("No open region has room for {} terminals and {} specials".format(
+            self.terminals, self.specials)
+        )
+
+    def _reachable(self, open_cells: Sequence[bool], start: int, seen: bytearray = None) -> List[int]:
+        # Breadth-first order of the open cells connected to start, start first.
+        width = self.width
+        size = len(open_cells)
+        if seen is None:
+            seen = bytearray(size)
+        seen[start] = 1
+        order = [start]
+        queue = deque(order)
+        while queue:
+            index = queue.popleft()
+            x = index % width
+            for neighbour, inside in ((index - width, index >= width), (index + width, index + width < size),
+                                      (index - 1, x > 0), (index + 1, x < width - 1)):
+                if inside and open_cells[neighbour] and not seen[neighbour]:
+                    seen[neighbour] = 1
+                    order.append(neighbour)
+                    queue.append(neighbour)
+        return order
+
+    def data(self) -> dict:
+        return self.compile().data()
+
+    def write(self, filename: str) -> str:
+        with open(filename, 'w') as f:
+            f.write(toml.dumps(self.data()))
+        return filename
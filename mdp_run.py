@@ -1,6 +1,11 @@
 import subprocess
+import sys
 
-from markov_libs import World
+from markov_libs import World, Profiler
+
+# With a file name argument (python mdp_run.py results/mdp.pstats) the run is profiled: phase timings and counters
+# are printed and the cProfile statistics are written to that file.
+profiler = Profiler(cprofile=True).enable() if len(sys.argv) > 1 else None
 
 # Markov Decision Problem - default world
 world = World()
@@ -46,3 +51,8 @@ world5.calculate_policy()
 print(world5)
 world5.generate_gnuplot_file('results/default5')
 subprocess.run(["./plotter.sh", "results/default5"])
+
+if profiler is not None:
+    profiler.disable()
+    print(profiler.format_summary())
+    profiler.dump_stats(sys.argv[1])
@@ -1,39 +1,32 @@
-from markov_libs import World, QLearningAgent
-
-world02 = World()
-world02.load('worlds/default2q02.toml')
-qla02 = QLearningAgent(world02)
-
-world005 = World()
-world005.load('worlds/default2q005.toml')
-qla005 = QLearningAgent(world005)
-
-print("Q-learning: 10 000 iterations, epsilon: 0.2")
-qla02.learning(iterations=10000)
-print(qla02)
-world02.clean_q()
-
-print("Q-learning: 10 000 iterations, epsilon: 0.05")
-qla005.learning(iterations=10000)
-print(qla005)
-world005.clean_q()
-
-print("Q-learning: 100 000 iterations, epsilon: 0.2")
-qla02.learning(iterations=100000)
-print(qla02)
-world02.clean_q()
-
-print("Q-learning: 100 000 iterations, epsilon: 0.05")
-qla005.learning(iterations=100000)
-print(qla005)
-world005.clean_q()
-
-print("Q-learning: 1 000 000 iterations, epsilon: 0.2")
-qla02.learning(iterations=1000000)
-print(qla02)
-world02.clean_q()
-
-print("Q-learning: 1 000 000 iterations, epsilon: 0.05")
-qla005.learning(iterations=1000000)
-print(qla005)
-world005.clean_q()
+import sys
+
+from markov_libs import ExperimentRunner, Job, Profiler, run_job
+
+experiments = [
+    ("Q-learning: 10 000 iterations, epsilon: 0.2", 'worlds/default2q02.toml', 10000),
+    ("Q-learning: 10 000 iterations, epsilon: 0.05", 'worlds/default2q005.toml', 10000),
+    ("Q-learning: 100 000 iterations, epsilon: 0.2", 'worlds/default2q02.toml', 100000),
+    ("Q-learning: 100 000 iterations, epsilon: 0.05", 'worlds/default2q005.toml', 100000),
+    ("Q-learning: 1 000 000 iterations, epsilon: 0.2", 'worlds/default2q02.toml', 1000000),
+    ("Q-learning: 1 000 000 iterations, epsilon: 0.05", 'worlds/default2q005.toml', 1000000),
+]
+
+if __name__ == '__main__':
+    jobs = [
+        Job(filename, Job.q_learning, {'iterations': iterations}, seed=seed)
+        for seed, (_, filename, iterations) in enumerate(experiments)
+    ]
+    if len(sys.argv) > 1:
+        # Profiled runs (python qlearning_run.py results/qlearning.pstats) stay in this process, so cProfile sees
+        # them; phase timings and counters are printed and the cProfile statistics written to the given file.
+        with Profiler(cprofile=True) as profiler:
+            results = [run_job(job) for job in jobs]
+    else:
+        profiler = None
+        results = ExperimentRunner().run(jobs)
+    for (description, _, _), result in zip(experiments, results):
+        print(description)
+        print(result.output)
+    if profiler is not None:
+        print(profiler.format_summary())
+        profiler.dump_stats(sys.argv[1])
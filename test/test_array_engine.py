@@ -0,0 +1,190 @@
+import os
+import unittest.mock
+
+import numpy as np
+
+from markov_libs import ArrayEngine
+from markov_libs import Field
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+converging_worlds = [
+    'default.toml', 'default2.toml', 'default2q005.toml', 'default2q02.toml',
+    'default3.toml', 'default4.toml', 'default5.toml'
+]
+
+
+class TestArrayEngine(unittest.TestCase):
+    mock_file_content = """
+        title = "default"
+        size = [4, 3]
+        reward = -0.04
+        gamma = 1
+        epsilon = 0
+        probability = [0.8, 0.1, 0.1, 0.0]
+
+        [[state]]
+            s_type = 'S'
+            position = [0, 0]
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 2]
+            value = 1
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 1]
+            value = -1
+
+        [[state]]
+            s_type = 'F'
+            position = [1, 1]
+        """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = World()
+        self.world.load('/dev/null')
+        self.engine = ArrayEngine(self.world)
+
+    def test_successors_follow_fields_around(self):
+        fields = self.world.all_fields()
+        for i, field in enumerate(fields):
+            for a, action in enumerate(World.actions):
+                expected = [fields.index(around) for around in self.world.fields_around(field, action)]
+                self.assertEqual(expected, self.engine.successors[i, a].tolist())
+
+    def test_masks_describe_board(self):
+        self.assertTrue(self.engine.terminal[11])
+        self.assertTrue(self.engine.terminal[7])
+        self.assertTrue(self.engine.forbidden[5])
+        self.assertEqual(9, int(self.engine.updatable.sum()))
+
+    def test_backup_matches_field_backup(self):
+        self.world.field(0, 0).utility = 0.1
+        self.world.field(0, 1).utility = 0.2
+        self.world.field(1, 0).utility = 0.3
+        utilities = self.engine.initial_utilities(self.world.history, self.world.initial_utility)
+        field = self.world.field(0, 0)
+        expected = field.reward + self.world.gamma * self.world.max_of_all_actions(field)
+        self.assertEqual(expected, self.engine.backup(utilities)[0])
+
+    def test_mdp_numpy_calculates_mdp_correctly(self):
+        self.world.mdp(termination_value=0.0001, engine=World.numpy_engine)
+        expected_utilities = [0.705, 0.655, 0.611, 0.388, 0.762, 0.0, 0.660, -1, 0.812, 0.868, 0.918, 1]
+        calculated_utilities = self.world._get_utilities_for_fields(self.world.all_fields())
+        for calculated, expected in zip(calculated_utilities, expected_utilities):
+            self.assertAlmostEqual(expected, calculated, places=3)
+
+    def test_mdp_numpy_records_utility_history(self):
+        self.world.mdp(n=5, engine=World.numpy_engine)
+        self.assertEqual(6, len(self.world.field(0, 0).utility_history))
+        self.assertEqual([], self.world.field(1, 1).utility_history)
+
+    def test_mdp_numpy_reports_residual_through_callback(self):
+        residuals = []
+        iterations = self.world.mdp(
+            termination_value=0.0001, engine=World.numpy_engine,
+            callback=lambda iteration, residual: residuals.append(residual)
+        )
+        self.assertEqual(iterations, len(residuals))
+        self.assertLess(residuals[-1], 0.0001)
+
+    def test_evaluate_exact_gives_fixed_point_of_policy_backup(self):
+        policy = np.zeros(self.engine.size, dtype=np.intp)
+        utilities = self.engine.evaluate_exact(policy)
+        self.assertTrue(np.allclose(utilities, self.engine.policy_backup(utilities, policy)))
+
+    def test_evaluate_iterative_approaches_exact_evaluation(self):
+        policy = np.zeros(self.engine.size, dtype=np.intp)
+        expected = self.engine.evaluate_exact(policy)
+        calculated = self.engine.evaluate_iterative(policy, np.zeros(self.engine.size), 10000, 1e-12)
+        self.assertTrue(np.allclose(expected, calculated))
+
+    def test_evaluate_exact_raises_exception_when_policy_never_terminates(self):
+        policy = np.full(self.engine.size, World.action_ids[World.left], dtype=np.intp)
+        self.engine.probability = np.array([1.0, 0.0, 0.0, 0.0])
+        self.assertRaises(np.linalg.LinAlgError, self.engine.evaluate_exact, policy)
+
+    def test_improve_policy_keeps_action_on_tie(self):
+        utilities = np.zeros(self.engine.size)
+        policy = np.full(self.engine.size, World.action_ids[World.down], dtype=np.intp)
+        improved = self.engine.improve_policy(utilities, policy)
+        self.assertEqual(World.action_ids[World.down], improved[0])
+
+    def test_mdp_raises_exception_for_unknown_engine(self):
+        self.assertRaises(AttributeError, self.world.mdp, n=1, engine='unknown')
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def test_cached_engines_follow_gamma_changes(self):
+        utilities = {}
+        for engine in World.engines:
+            world = World()
+            world.load('/dev/null')
+            world.mdp(n=1, engine=engine)
+            world.gamma = 0.5
+            world.mdp(termination_value=1e-9, engine=engine)
+            utilities[engine] = world.field(0, 0).utility
+        self.assertAlmostEqual(-0.0620, utilities[World.fields_engine], places=4)
+        for engine in World.engines:
+            self.assertAlmostEqual(utilities[World.fields_engine], utilities[engine], places=6)
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def test_engines_agree_after_field_reward_changes(self):
+        utilities = {}
+        for engine in World.engines:
+            world = World()
+            world.load('/dev/null')
+            world.mdp(n=1, engine=engine)
+            world.field(0, 0).reward = -2.0
+            world.mdp(termination_value=1e-9, engine=engine)
+            self.assertEqual(-2.0, world.board.reward(0))
+            utilities[engine] = [field.utility for field in world.all_fields() if field.state is not Field.forbidden]
+        for engine in World.engines:
+            self.assertTrue(np.allclose(utilities[World.fields_engine], utilities[engine], atol=1e-6))
+
+
+class TestArrayEngineBundledWorlds(unittest.TestCase):
+    @staticmethod
+    def solve(filename: str, engine: str) -> World:
+        world = World()
+        world.load(os.path.join(worlds_directory, filename))
+        world.mdp(termination_value=1e-9, engine=engine)
+        world.calculate_policy(engine=engine)
+        return world
+
+    def test_numpy_engine_gives_same_utilities_and_policy(self):
+        for filename in converging_worlds:
+            with self.subTest(world=filename):
+                expected = self.solve(filename, World.fields_engine)
+                calculated = self.solve(filename, World.numpy_engine)
+                for expected_field, calculated_field in zip(expected.all_fields(), calculated.all_fields()):
+                    self.assertEqual(expected_field.policy, calculated_field.policy)
+                    if expected_field.state is not Field.forbidden:
+                        self.assertTrue(np.isclose(expected_field.utility, calculated_field.utility, atol=1e-6))
+
+    def test_policy_iteration_gives_same_utilities_and_policy(self):
+        for filename in converging_worlds:
+            for options in [{}, {'evaluation_sweeps': 5}, {'exact_max_states': 0}]:
+                with self.subTest(world=filename, **options):
+                    expected = self.solve(filename, World.fields_engine)
+                    calculated = World()
+                    calculated.load(os.path.join(worlds_directory, filename))
+                    calculated.policy_iteration(**options)
+                    for expected_field, calculated_field in zip(expected.all_fields(), calculated.all_fields()):
+                        self.assertEqual(expected_field.policy, calculated_field.policy)
+                        if expected_field.state is not Field.forbidden:
+                            self.assertTrue(np.isclose(expected_field.utility, calculated_field.utility, atol=1e-6))
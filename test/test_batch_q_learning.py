@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from markov_libs import world, BatchQLearning, QLearningAgent
+
+
+class TestBatchQLearning(unittest.TestCase):
+    mock_file_content = """
+           title = "default"
+           size = [4, 3]
+           reward = -0.04
+           gamma = 0.99
+           epsilon = 0.2
+           probability = [0.8, 0.1, 0.1, 0.0]
+
+           [[state]]
+               s_type = 'S'
+               position = [0, 0]
+
+           [[state]]
+               s_type = 'T'
+               position = [3, 2]
+               value = 1
+
+           [[state]]
+               s_type = 'T'
+               position = [3, 1]
+               value = -1
+
+           [[state]]
+               s_type = 'F'
+               position = [1, 1]
+           """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = world.World()
+        self.world.load('/dev/null')
+
+    def test_independent_agents_own_tables(self):
+        batch = BatchQLearning.independent(self.world, 5, seed=0)
+        self.assertEqual((5, 12, 4), batch.q_values.shape)
+        self.assertEqual((5, 12, 4), batch.actions_count.shape)
+        self.assertEqual([1.0] * 4, batch.q_values[3, 11].tolist())
+        self.assertEqual([-1.0] * 4, batch.q_values[3, 7].tolist())
+
+    def test_learning_runs_episodes_per_walker(self):
+        batch = BatchQLearning.independent(self.world, 4, seed=0)
+        batch.learning(10)
+        # Every episode starts at the start field and ends with a move into a terminal.
+        start = self.world.field_index(self.world.start_field())
+        for agent in range(4):
+            self.assertGreaterEqual(batch.actions_count[agent, start].sum(), 10)
+            self.assertEqual(0, batch.actions_count[agent, [5, 7, 11]].sum())
+            self.assertEqual([1.0] * 4, batch.q_values[agent, 11].tolist())
+
+    def test_learning_is_reproducible_with_seed(self):
+        first = BatchQLearning.independent(self.world, 3, seed=7)
+        first.learning(50)
+        second = BatchQLearning.independent(self.world, 3, seed=7)
+        second.learning(50)
+        np.testing.assert_array_equal(first.q_values, second.q_values)
+        np.testing.assert_array_equal(first.actions_count, second.actions_count)
+
+    def test_q_values_are_sample_averages(self):
+        batch = BatchQLearning.independent(self.world, 8, seed=3)
+        batch.learning(20)
+        # With alpha = 1 / count a visited Q-value never leaves the range of its targets.
+        self.assertTrue(np.all(batch.q_values <= 1.0))
+        self.assertTrue(np.all(batch.q_values >= -1.0 - 0.04 * 100))
+
+    def test_shared_walkers_learn_into_agent_table(self):
+        agent = QLearningAgent(self.world)
+        batch = BatchQLearning.shared(agent, 16, seed=0)
+        batch.learning(64, per_walker=False)
+        self.assertIs(agent.q_values, batch.q_values.base)
+        start = self.world.field_index(self.world.start_field())
+        self.assertGreaterEqual(agent.actions_count[start].sum(), 64)
+        self.assertNotEqual(0.0, self.world.start_field().q_values[0])
+
+    def test_parallel_episodes_learn_mdp_policy(self):
+        agent = QLearningAgent(self.world)
+        agent.learning(4000, parallel_episodes=32, seed=0)
+        expected = self.world.__class__()
+        with mock.patch('builtins.open', mock.mock_open(read_data=self.mock_file_content), create=True):
+            expected.load('/dev/null')
+        expected.mdp(termination_value=0.0001)
+        expected.calculate_policy()
+        fields = [
+            (learned, solved) for learned, solved in zip(self.world.all_fields(), expected.all_fields())
+            if solved.policy is not None
+        ]
+        matching = sum(learned.optimal_action() == solved.policy for learned, solved in fields)
+        self.assertGreaterEqual(matching, len(fields) - 2)
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+import numpy as np
+
+from markov_libs import BatchResult
+from markov_libs import BatchSolver
+from markov_libs import Field
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+batch_worlds = ['default.toml', 'default2.toml', 'default3.toml', 'default4.toml', 'default5.toml']
+
+
+def load_world(filename: str) -> World:
+    world = World()
+    world.load(os.path.join(worlds_directory, filename))
+    return world
+
+
+class TestBatchSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = BatchSolver(termination_value=0.0001)
+
+    def test_solve_returns_result_per_world_in_order(self):
+        worlds = [load_world(filename) for filename in batch_worlds]
+        results = self.solver.solve(worlds)
+        self.assertEqual(len(worlds), len(results))
+        for world, result in zip(worlds, results):
+            self.assertIsInstance(result, BatchResult)
+            self.assertEqual(world.title, result.title)
+            self.assertEqual((world.max_y + 1, world.max_x + 1), result.utilities.shape)
+
+    def test_solve_gives_same_result_as_numpy_mdp(self):
+        results = self.solver.solve([load_world(filename) for filename in batch_worlds])
+        for filename, result in zip(batch_worlds, results):
+            with self.subTest(world=filename):
+                world = load_world(filename)
+                iterations = world.mdp(termination_value=0.0001, engine=World.numpy_engine)
+                world.calculate_policy(engine=World.numpy_engine)
+                self.assertEqual(iterations, result.iterations)
+                for field in world.all_fields():
+                    self.assertEqual(field.policy, result.policy[field.y][field.x])
+                    if field.state is not Field.forbidden:
+                        self.assertEqual(field.utility, result.utilities[field.y, field.x])
+
+    def test_solve_writes_utilities_and_policy_to_worlds(self):
+        world = load_world('default.toml')
+        self.solver.solve([world])
+        self.assertEqual(World.up, world.field(0, 0).policy)
+        self.assertAlmostEqual(0.705, world.field(0, 0).utility, places=3)
+        self.assertTrue(np.isnan(self.solver.solve([load_world('default.toml')])[0].utilities[1, 1]))
+
+    def test_solve_parameters_solves_every_combination(self):
+        world = load_world('default2.toml')
+        results = self.solver.solve_parameters(world, gamma=[0.5, 0.99], reward=[-1, -0.1])
+        self.assertEqual(
+            [(0.5, -1), (0.5, -0.1), (0.99, -1), (0.99, -0.1)],
+            [(result.parameters['gamma'], result.parameters['reward']) for result in results]
+        )
+
+    def test_solve_parameters_matches_world_with_same_parameters(self):
+        world = load_world('default2.toml')
+        variant = load_world('default5.toml')
+        result = self.solver.solve_parameters(world, gamma=[variant.gamma])[0]
+        variant.mdp(termination_value=0.0001, engine=World.numpy_engine)
+        for field in variant.all_fields():
+            if field.state is not Field.forbidden:
+                self.assertEqual(field.utility, result.utilities[field.y, field.x])
+
+    def test_solve_parameters_changes_probability(self):
+        world = load_world('default2.toml')
+        result = self.solver.solve_parameters(world, probability=[[0.4, 0.4, 0.2, 0.0]])[0]
+        expected = load_world('default4.toml')
+        expected.mdp(termination_value=0.0001, engine=World.numpy_engine)
+        self.assertEqual(expected.field(0, 0).utility, result.utilities[0, 0])
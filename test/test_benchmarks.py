@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import BenchmarkCaseUnknownException
+from benchmarks import BenchmarkResult
+from benchmarks import BenchmarkSuite
+from benchmarks import compare
+from benchmarks import load_results
+from benchmarks import save_results
+from benchmarks import scaled_world_data
+from benchmarks import scaling
+from benchmarks import write_world
+from markov_libs import Field
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+
+
+class TestScaledWorld(unittest.TestCase):
+    def test_scaled_world_loads(self):
+        data = scaled_world_data(20, forbidden_density=0.3, seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            world = World()
+            world.load(write_world(data, os.path.join(directory, 'scaled.toml')))
+        self.assertEqual('scaled20x20', world.title)
+        self.assertEqual((19, 19), (world.max_x, world.max_y))
+        self.assertIs(Field.start, world.start_field().state)
+        self.assertEqual(2, world.board.mask(Field.terminal).sum())
+        self.assertGreater(world.board.mask(Field.forbidden).sum(), 0)
+
+    def test_scaled_world_depends_on_seed(self):
+        self.assertEqual(scaled_world_data(10, seed=1), scaled_world_data(10, seed=1))
+        self.assertNotEqual(scaled_world_data(10, seed=1), scaled_world_data(10, seed=2))
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def setUp(self):
+        self.suite = BenchmarkSuite(sizes=(4,), repeat=2, worlds_directory=None)
+        self.suite.moves = 100
+        self.suite.episodes = 2
+
+    def test_unknown_case_raises_exception(self):
+        self.assertRaises(BenchmarkCaseUnknownException, BenchmarkSuite, ['sarsa'])
+
+    def test_run_measures_every_case(self):
+        results = self.suite.run()
+        self.assertEqual([
+            'load', 'load_cached', 'mdp_n:fields', 'mdp_n:numpy', 'mdp_termination:fields', 'mdp_termination:numpy',
+            'calculate_policy:fields', 'calculate_policy:numpy', 'agent_move', 'q_learning'
+        ], [result.case for result in results])
+        for result in results:
+            self.assertEqual('scaled4x4', result.world)
+            self.assertEqual(16, result.states)
+            self.assertEqual(2, len(result.runs))
+            self.assertEqual(min(result.runs), result.seconds)
+            self.assertGreater(result.operations, 0)
+            self.assertGreater(result.peak_memory, 0)
+        mdp_n = results[2]
+        forbidden = [state for state in scaled_world_data(4)['state'] if state['s_type'] == Field.forbidden]
+        self.assertEqual(BenchmarkSuite.sweeps * (16 - len(forbidden)), mdp_n.operations)
+        self.assertEqual('backups/s', mdp_n.unit)
+        self.assertEqual(100, results[8].operations)
+
+    def test_large_worlds_skip_python_cases(self):
+        self.suite.fields_engine_states = 10
+        self.suite.q_learning_states = 10
+        cases = [result.case for result in self.suite.run()]
+        self.assertNotIn('mdp_n:fields', cases)
+        self.assertNotIn('q_learning', cases)
+        self.assertIn('mdp_n:numpy', cases)
+
+    def test_bundled_worlds_are_benchmarked_from_a_copy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shutil.copy(os.path.join(worlds_directory, 'default.toml'), directory)
+            suite = BenchmarkSuite([BenchmarkSuite.load_cached], sizes=(), repeat=1, worlds_directory=directory)
+            self.assertEqual(['default'], [result.world for result in suite.run()])
+            self.assertEqual(['default.toml'], os.listdir(directory))
+
+    def test_diverging_world_is_skipped_in_termination_mode(self):
+        suite = BenchmarkSuite([BenchmarkSuite.mdp_termination], sizes=(), repeat=1, worlds_directory=None)
+        suite.max_sweeps = 50
+        results = suite.run_world('world2', os.path.join(worlds_directory, 'world2.toml'))
+        self.assertEqual([], results)
+
+
+class TestBenchmarkReport(unittest.TestCase):
+    def result(self, case: str, world: str, states: int, seconds: float) -> BenchmarkResult:
+        return BenchmarkResult(case, world, states, seconds, 100, 'steps/s', 1024, [seconds])
+
+    def test_results_round_trip_through_json(self):
+        results = [self.result('load', 'default', 12, 0.5)]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'results', 'benchmark.json')
+            save_results(results, filename)
+            loaded = load_results(filename)
+        self.assertEqual([result.to_dict() for result in results], [result.to_dict() for result in loaded])
+        self.assertEqual(200, loaded[0].throughput)
+
+    def test_compare_reports_slower_cases(self):
+        baseline = [self.result('load', 'default', 12, 1.0), self.result('mdp_n:numpy', 'default', 12, 1.0)]
+        results = [
+            self.result('load', 'default', 12, 1.2),
+            self.result('mdp_n:numpy', 'default', 12, 1.5),
+            self.result('q_learning', 'default', 12, 9.0)
+        ]
+        regressions = compare(results, baseline, threshold=0.25)
+        self.assertEqual([('mdp_n:numpy', 'default')], [(r.case, r.world) for r in regressions])
+        self.assertAlmostEqual(1.5, regressions[0].ratio)
+
+    def test_compare_ignores_cases_below_min_seconds(self):
+        baseline = [self.result('load', 'default4', 12, 0.0027)]
+        results = [self.result('load', 'default4', 12, 0.0047)]
+        self.assertEqual([], compare(results, baseline))
+        self.assertEqual(1, len(compare(results, baseline, min_seconds=0.001)))
+
+    def test_scaling_fits_exponent_on_generated_worlds(self):
+        results = [
+            self.result('load', 'scaled10x10', 100, 0.01),
+            self.result('load', 'scaled100x100', 10000, 1.0),
+            self.result('load', 'default', 12, 5.0),
+            self.result('q_learning', 'scaled10x10', 100, 0.01)
+        ]
+        curves = scaling(results)
+        points, exponent = curves['load']
+        self.assertEqual([(100, 0.01), (10000, 1.0)], points)
+        self.assertAlmostEqual(1.0, exponent)
+        self.assertIsNone(curves['q_learning'][1])
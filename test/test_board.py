@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from markov_libs import Board
+from markov_libs import Field
+from markov_libs import UtilityHistory
+
+
+class TestBoard(unittest.TestCase):
+    def setUp(self):
+        self.board = Board(4, 3, -0.04)
+        self.board.set_cell(0, 0, Field.start, -0.04)
+        self.board.set_cell(3, 2, Field.terminal, 1)
+        self.board.set_cell(3, 1, Field.terminal, -1)
+        self.board.set_cell(1, 1, Field.forbidden)
+
+    def test_cells_are_stored_in_arrays(self):
+        self.assertEqual(12, self.board.size)
+        self.assertEqual((12,), self.board.state_ids.shape)
+        self.assertEqual(Field.terminal, self.board.state(11))
+        self.assertEqual([False] * 5 + [True] + [False] * 6, self.board.mask(Field.forbidden).tolist())
+        self.assertEqual(1, self.board.reward(11))
+        self.assertIsInstance(self.board.reward(11), int)
+        self.assertIsNone(self.board.reward(5))
+        self.assertEqual(0.0, self.board.rewards()[5])
+        self.assertEqual(-1.0, self.board.rewards()[7])
+
+    def test_views_are_created_once(self):
+        field = self.board.field(3, 2)
+        self.assertIs(field, self.board.field(3, 2))
+        self.assertIs(field, self.board.field_at(11))
+        self.assertIs(field, self.board[2][3])
+        self.assertIs(field, self.board.fields()[11])
+        self.assertEqual((3, 2, Field.terminal, 1), (field.x, field.y, field.state, field.reward))
+
+    def test_set_cell_updates_existing_view(self):
+        field = self.board.field(2, 1)
+        self.board.set_cell(2, 1, Field.special, 2)
+        self.assertIs(Field.special, field.state)
+        self.assertEqual(2, field.reward)
+
+    def test_policy_is_stored_as_action_id(self):
+        self.board.field(0, 0).policy = Field.right
+        self.assertEqual(2, self.board.policy_ids[0])
+        self.assertEqual(Field.right, self.board.field(0, 0).policy)
+        self.board.field(0, 0).policy = None
+        self.assertIsNone(self.board.field(0, 0).policy)
+
+    def test_q_arrays_start_clean(self):
+        self.assertEqual((12, 4), self.board.q_values.shape)
+        self.assertEqual([1.0] * 4, self.board.q_values[11].tolist())
+        self.assertEqual([-1.0] * 4, self.board.q_values[7].tolist())
+        self.assertEqual(0, self.board.actions_count.sum())
+
+    def test_bind_q_values_keeps_current_values(self):
+        self.board.field(0, 0).set_q_value(Field.up, 0.5)
+        q_values = np.zeros((12, 4))
+        actions_count = np.zeros((12, 4), dtype=np.int64)
+        self.board.bind_q_values(q_values, actions_count)
+        self.assertIs(q_values, self.board.q_values)
+        self.assertEqual(0.5, q_values[0, 0])
+        self.board.field(0, 0).increment_action_counter(Field.down)
+        self.assertEqual(1, actions_count[0, 3])
+
+    def test_bind_history_keeps_recorded_values(self):
+        self.board.field(0, 0).utility = 0.5
+        self.board.field(0, 0).utility = 0.7
+        history = UtilityHistory(12)
+        self.board.bind_history(history)
+        self.assertIs(history, self.board.history)
+        self.assertEqual([0.5, 0.7], history.values(0))
+        self.assertEqual(0.7, self.board.field(0, 0).utility)
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from markov_libs import world, Field, MdpDistanceConvergence, PolicyConvergence, QDeltaConvergence, QLearningAgent
+
+
+class TestConvergence(unittest.TestCase):
+    mock_file_content = """
+           title = "default"
+           size = [4, 3]
+           reward = -0.04
+           gamma = 0.99
+           epsilon = 0.2
+           probability = [0.8, 0.1, 0.1, 0.0]
+
+           [[state]]
+               s_type = 'S'
+               position = [0, 0]
+
+           [[state]]
+               s_type = 'T'
+               position = [3, 2]
+               value = 1
+
+           [[state]]
+               s_type = 'T'
+               position = [3, 1]
+               value = -1
+
+           [[state]]
+               s_type = 'F'
+               position = [1, 1]
+           """
+
+    def _load_world(self):
+        loaded_world = world.World()
+        with mock.patch('builtins.open', mock.mock_open(read_data=self.mock_file_content), create=True):
+            loaded_world.load('/dev/null')
+        return loaded_world
+
+    def setUp(self):
+        self.world = self._load_world()
+        self.agent = QLearningAgent(self.world, seed=0)
+
+    def test_learning_without_criteria_runs_all_episodes(self):
+        self.assertEqual(30, self.agent.learning(iterations=30))
+        self.assertIsNone(self.agent.converged_episode)
+
+    def test_q_delta_waits_for_window(self):
+        criterion = QDeltaConvergence(0.1, window=200)
+        criterion.reset(self.agent)
+        self.assertFalse(criterion.check(self.agent, 100))
+        self.assertTrue(criterion.check(self.agent, 200))
+        self.agent.q_values[0, 0] = 5.0
+        self.assertFalse(criterion.check(self.agent, 400))
+
+    def test_policy_must_be_stable_for_episodes(self):
+        criterion = PolicyConvergence(episodes=300)
+        criterion.reset(self.agent)
+        self.assertFalse(criterion.check(self.agent, 200))
+        self.agent.q_values[0, 2] = 1.0
+        self.assertFalse(criterion.check(self.agent, 300))
+        self.assertFalse(criterion.check(self.agent, 500))
+        self.assertTrue(criterion.check(self.agent, 600))
+
+    def test_mdp_distance_compares_max_q_with_utilities(self):
+        solved = self._load_world()
+        solved.mdp(termination_value=0.0001)
+        criterion = MdpDistanceConvergence(solved, 0.01)
+        utilities = [0.0 if field.state == Field.forbidden else field.utility for field in solved.all_fields()]
+        self.agent.q_values[:] = np.array(utilities)[:, None]
+        self.assertTrue(criterion.check(self.agent, 100))
+        self.agent.q_values[0] -= 0.02
+        self.assertAlmostEqual(0.02, criterion.distance(self.agent))
+        self.assertFalse(criterion.check(self.agent, 200))
+
+    def test_learning_stops_when_policy_converges(self):
+        episodes = self.agent.learning(iterations=100000, criteria=[PolicyConvergence(episodes=500)], check_every=100)
+        self.assertLess(episodes, 100000)
+        self.assertEqual(episodes, self.agent.converged_episode)
+        self.assertEqual(0, episodes % 100)
+
+    def test_resumed_learning_counts_criteria_from_restored_episode(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'agent.npz')
+        self.agent.learning(iterations=500, checkpoint_path=path, checkpoint_every=500)
+        for criterion in [PolicyConvergence(episodes=300), QDeltaConvergence(100.0, window=300)]:
+            with self.subTest(criterion=type(criterion).__name__):
+                resumed = QLearningAgent(self.world, seed=0)
+                resumed.load_checkpoint(path)
+                episodes = resumed.learning(iterations=10000, criteria=[criterion], check_every=100, resume=True)
+                self.assertGreaterEqual(episodes, 800)
+                if isinstance(criterion, QDeltaConvergence):
+                    self.assertEqual(800, episodes)
+
+    def test_resumed_learning_continues_criteria_from_checkpoint(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'agent.npz')
+        expected = QLearningAgent(self._load_world(), seed=0).learning(
+            iterations=100000, criteria=[PolicyConvergence(episodes=500), QDeltaConvergence(1.0, window=200)],
+            check_every=100
+        )
+        self.agent.learning(
+            iterations=300, criteria=[PolicyConvergence(episodes=500), QDeltaConvergence(1.0, window=200)],
+            check_every=100, checkpoint_path=path, checkpoint_every=100
+        )
+        resumed = QLearningAgent(self._load_world(), seed=0)
+        resumed.load_checkpoint(path)
+        episodes = resumed.learning(
+            iterations=100000, criteria=[PolicyConvergence(episodes=500), QDeltaConvergence(1.0, window=200)],
+            check_every=100, resume=True
+        )
+        self.assertGreater(expected, 300)
+        self.assertEqual(expected, episodes)
+
+    def test_resume_rejects_other_criteria_than_checkpoint(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'agent.npz')
+        self.agent.learning(iterations=100, criteria=[PolicyConvergence()], checkpoint_path=path, checkpoint_every=100)
+        resumed = QLearningAgent(self.world, seed=0)
+        resumed.load_checkpoint(path)
+        with self.assertRaises(AttributeError):
+            resumed.learning(iterations=200, criteria=[QDeltaConvergence(1.0)], resume=True)
+
+    def test_parallel_learning_checks_criteria_between_chunks(self):
+        episodes = self.agent.learning(
+            iterations=100000, parallel_episodes=16, criteria=[PolicyConvergence(episodes=500)], check_every=100
+        )
+        self.assertLess(episodes, 100000)
+        self.assertEqual(episodes, self.agent.converged_episode)
@@ -0,0 +1,53 @@
+import concurrent.futures
+import os
+import unittest
+
+import numpy as np
+
+from markov_libs import AlgorithmUnknownException
+from markov_libs import ExperimentRunner
+from markov_libs import Job
+from markov_libs import JobResult
+from markov_libs import World
+from markov_libs import run_job
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+default_world = os.path.join(worlds_directory, 'default.toml')
+q_learning_world = os.path.join(worlds_directory, 'default2q02.toml')
+
+
+class TestExperimentRunner(unittest.TestCase):
+    def test_unknown_algorithm_raises_exception(self):
+        self.assertRaises(AlgorithmUnknownException, Job, default_world, 'sarsa')
+
+    def test_run_job_solves_mdp(self):
+        result = run_job(Job(default_world, Job.mdp, {'termination_value': 0.0001}))
+        world = World()
+        world.load(default_world)
+        world.mdp(termination_value=0.0001)
+        world.calculate_policy()
+        self.assertIsInstance(result, JobResult)
+        self.assertEqual(str(world), result.output)
+        self.assertAlmostEqual(0.705, result.values[0], places=3)
+        self.assertTrue(np.isnan(result.values[5]))
+
+    def test_run_job_is_reproducible_for_seed(self):
+        job = Job(q_learning_world, Job.q_learning, {'iterations': 50}, seed=3)
+        first = run_job(job)
+        second = run_job(job)
+        self.assertEqual(first.output, second.output)
+        self.assertTrue(np.array_equal(first.values, second.values))
+
+    def test_process_pool_gives_same_results_as_serial_run(self):
+        jobs = [
+            Job(q_learning_world, Job.q_learning, {'iterations': 50}, seed=seed) for seed in range(4)
+        ] + [Job(default_world, Job.mdp, {'n': 10, 'engine': World.numpy_engine}, seed=4)]
+        results = ExperimentRunner(max_workers=2).run(jobs)
+        self.assertEqual([job.seed for job in jobs], [result.job.seed for result in results])
+        for job, result in zip(jobs, results):
+            self.assertEqual(run_job(job).output, result.output)
+
+    def test_runner_accepts_other_executors(self):
+        jobs = [Job(default_world, Job.mdp, {'n': 5})]
+        results = ExperimentRunner(executor_class=concurrent.futures.ThreadPoolExecutor).run(jobs)
+        self.assertEqual(run_job(jobs[0]).output, results[0].output)
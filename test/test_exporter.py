@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from markov_libs import ExportFormatUnknownException
+from markov_libs import Field
+from markov_libs import StreamingExporter
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+
+
+class TestStreamingExporter(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.world = World()
+        self.world.load(os.path.join(worlds_directory, 'default.toml'))
+        self.columns = np.array([
+            i for i, field in enumerate(self.world.all_fields()) if field.state is not Field.forbidden
+        ])
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        with open(self._path(name)) as f:
+            return f.read().splitlines(keepends=True)
+
+    def test_unknown_format_raises_exception(self):
+        self.assertRaises(ExportFormatUnknownException, StreamingExporter, self.world, self._path('out'), 'xls')
+
+    def test_gnuplot_stream_matches_generated_file(self):
+        for engine in [World.fields_engine, World.numpy_engine]:
+            with self.subTest(engine=engine):
+                world = World()
+                world.load(os.path.join(worlds_directory, 'default.toml'))
+                with StreamingExporter(world, self._path('stream')) as exporter:
+                    iterations = world.mdp(termination_value=0.0001, engine=engine, callback=exporter)
+                world.generate_gnuplot_file(self._path('generated'))
+                streamed = self._read('stream')
+                generated = self._read('generated')
+                # The stream also holds the row of the last iteration.
+                self.assertEqual(generated, streamed[:-1])
+                self.assertEqual(iterations + 2, len(streamed))
+                self.assertTrue(streamed[-1].startswith('{} '.format(iterations)))
+
+    def test_csv_stream(self):
+        with StreamingExporter(self.world, self._path('stream.csv'), StreamingExporter.csv) as exporter:
+            self.world.mdp(n=3, callback=exporter)
+        lines = self._read('stream.csv')
+        self.assertEqual('iteration,"(1,1)","(2,1)"', lines[0][:len('iteration,"(1,1)","(2,1)"')])
+        self.assertEqual(['0', '1', '2', '3'], [line.split(',')[0] for line in lines[1:]])
+        self.assertEqual(self.world.field(0, 0).utility, float(lines[-1].split(',')[1]))
+
+    def test_npy_stream_holds_trace(self):
+        exporter = StreamingExporter(self.world, self._path('stream.npy'), StreamingExporter.npy)
+        exporter.block_rows = 4
+        with exporter:
+            self.world.mdp(n=10, engine=World.numpy_engine, callback=exporter)
+            self.assertEqual((8, self.columns.size + 1), np.load(self._path('stream.npy')).shape)
+        stream = np.load(self._path('stream.npy'))
+        self.assertEqual((11, self.columns.size + 1), stream.shape)
+        self.assertEqual(list(range(11)), stream[:, 0].tolist())
+        np.testing.assert_array_equal(self.world.history.trace(self.columns), stream[:-1, 1:])
+
+    def test_step_skips_iterations(self):
+        with StreamingExporter(self.world, self._path('stream'), step=2) as exporter:
+            self.world.mdp(n=5, callback=exporter)
+        self.assertEqual(['0', '2', '4'], [line.split()[0] for line in self._read('stream')[1:]])
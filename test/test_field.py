@@ -162,3 +162,33 @@ class TestField(unittest.TestCase):
         field = Field(Field.forbidden, x=0, y=0,)
         field.q_values = [-0.02, -0.04, -0.06, -0.08]
         self.assertEqual('x', field.str_optimal_action())
+
+    def test_field_has_no_instance_dict(self):
+        field = Field(Field.normal, x=0, y=1, reward=-0.04)
+        self.assertFalse(hasattr(field, '__dict__'))
+        with self.assertRaises(AttributeError):
+            field.color = 'red'
+
+    def test_reward_is_written_to_board(self):
+        field = Field(Field.terminal, x=0, y=0, reward=1)
+        field.reward = 2
+        self.assertEqual(2, field._board.reward(0))
+        self.assertEqual(2, field.utility)
+        self.assertRaises(FieldRequiresValueException, setattr, field, 'reward', None)
+        with self.assertRaises(AttributeError):
+            field.state_id = Field.normal_id
+
+    def test_state_codes(self):
+        self.assertEqual(Field.terminal_id, Field(Field.terminal, x=0, y=0, reward=1).state_id)
+        self.assertEqual(Field.forbidden_id, Field(Field.forbidden, x=0, y=0).state_id)
+        self.assertEqual(5, len({Field.terminal_id, Field.forbidden_id, Field.normal_id, Field.start_id,
+                                 Field.special_id}))
+
+    def test_action_codes(self):
+        self.assertEqual([0, 1, 2, 3], [Field.action_ids[action] for action in Field.actions])
+
+    def test_state_built_at_runtime_is_recognised(self):
+        field = Field(''.join(['T']), x=0, y=0, reward=1)
+        self.assertTrue(field.is_terminal())
+        self.assertIs(Field.terminal, field.state)
+        self.assertEqual('x', field.str_optimal_action())
@@ -0,0 +1,133 @@
+import os
+import unittest.mock
+
+import numpy as np
+
+from markov_libs import PrioritizedSweeping
+from markov_libs import SparseEngine
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+converging_worlds = [
+    'default.toml', 'default2.toml', 'default2q005.toml', 'default2q02.toml',
+    'default3.toml', 'default4.toml', 'default5.toml'
+]
+
+
+class TestPrioritizedSweeping(unittest.TestCase):
+    mock_file_content = """
+        title = "default"
+        size = [4, 3]
+        reward = -0.04
+        gamma = 1
+        epsilon = 0
+        probability = [0.8, 0.1, 0.1, 0.0]
+
+        [[state]]
+            s_type = 'S'
+            position = [0, 0]
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 2]
+            value = 1
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 1]
+            value = -1
+
+        [[state]]
+            s_type = 'F'
+            position = [1, 1]
+        """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = World()
+        self.world.load('/dev/null')
+        self.sweeping = PrioritizedSweeping(SparseEngine(self.world))
+
+    def entries_of(self, state: int) -> list:
+        start, end = self.sweeping.indptr[state], self.sweeping.indptr[state + 1]
+        return list(zip(
+            self.sweeping.predecessors[start:end].tolist(),
+            self.sweeping.actions[start:end].tolist(),
+            self.sweeping.weights[start:end].tolist()
+        ))
+
+    def predecessors_of(self, state: int) -> set:
+        return {predecessor for predecessor, _, _ in self.entries_of(state)}
+
+    def test_predecessor_index_follows_transition_rules(self):
+        self.assertEqual({1, 4}, self.predecessors_of(0))
+        self.assertEqual({10}, self.predecessors_of(11))
+
+    def test_terminal_and_forbidden_states_have_no_successors_in_index(self):
+        for state in range(12):
+            self.assertNotIn(11, self.predecessors_of(state))
+            self.assertNotIn(5, self.predecessors_of(state))
+
+    def test_predecessor_weight_is_transition_probability_of_action(self):
+        entries = self.entries_of(11)
+        actions = [World.action_ids[action] for action in (World.up, World.right, World.down)]
+        self.assertEqual([(10, action) for action in actions], [entry[:2] for entry in entries])
+        self.assertTrue(np.allclose([0.1, 0.8, 0.1], [entry[2] for entry in entries]))
+
+    def test_wall_bumps_are_not_in_predecessor_index(self):
+        self.assertNotIn(0, self.predecessors_of(0))
+        self.assertEqual([0.1, 0.9, 0.1, 0.9], self.sweeping.stay[0].tolist())
+
+    def test_prioritized_sweeping_calculates_correct_policy_for_default_map(self):
+        self.world.prioritized_sweeping(termination_value=1e-6)
+        self.world.calculate_policy()
+        expected_policy = [World.up, World.left, World.left, World.left,
+                           World.up, None, World.up, None,
+                           World.right, World.right, World.right, None]
+        self.assertEqual(expected_policy, [field.policy for field in self.world.all_fields()])
+
+    def test_max_backups_limits_backups(self):
+        self.assertEqual(5, self.world.prioritized_sweeping(termination_value=1e-6, max_backups=5))
+
+    def test_bellman_error_is_below_termination_value(self):
+        self.world.prioritized_sweeping(termination_value=1e-6)
+        engine = self.world.array_engine()
+        utilities = engine.initial_utilities(self.world.history, self.world.initial_utility)
+        self.assertLess(engine.residual(utilities, engine.backup(utilities)), 1e-6)
+
+
+class TestPrioritizedSweepingWorlds(unittest.TestCase):
+    @staticmethod
+    def utilities(world: World) -> np.ndarray:
+        return world.array_engine().initial_utilities(world.history, world.initial_utility)
+
+    def test_prioritized_sweeping_gives_same_policy_as_mdp(self):
+        for filename in converging_worlds:
+            with self.subTest(world=filename):
+                expected = World()
+                expected.load(os.path.join(worlds_directory, filename))
+                expected.mdp(termination_value=1e-9)
+                expected.calculate_policy()
+                calculated = World()
+                calculated.load(os.path.join(worlds_directory, filename))
+                calculated.prioritized_sweeping(termination_value=1e-9)
+                calculated.calculate_policy()
+                for expected_field, calculated_field in zip(expected.all_fields(), calculated.all_fields()):
+                    self.assertEqual(expected_field.policy, calculated_field.policy)
+
+    def test_prioritized_sweeping_needs_fewer_backups_than_mdp(self):
+        for filename in converging_worlds:
+            with self.subTest(world=filename):
+                expected = World()
+                expected.load(os.path.join(worlds_directory, filename))
+                iterations = expected.mdp(termination_value=1e-6)
+                calculated = World()
+                calculated.load(os.path.join(worlds_directory, filename))
+                backups = calculated.prioritized_sweeping(termination_value=1e-6)
+                updatable = calculated.array_engine().updatable
+                self.assertLess(backups, iterations * int(updatable.sum()))
+                self.assertTrue(np.allclose(self.utilities(expected), self.utilities(calculated), atol=1e-4))
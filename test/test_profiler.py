@@ -0,0 +1,130 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from markov_libs import Profiler
+from markov_libs import ProfilerNotRecordingException
+from markov_libs import QLearningAgent
+from markov_libs import World
+from markov_libs import profile_phase
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+default_world = os.path.join(worlds_directory, 'default.toml')
+
+
+class TestProfiler(unittest.TestCase):
+    def test_counters_observations_and_phases(self):
+        profiler = Profiler()
+        profiler.count('sweeps')
+        profiler.count('sweeps', 4)
+        profiler.observe('episode_steps', 3)
+        profiler.observe('episode_steps', 7)
+        with profiler.phase('parse'):
+            pass
+        with profile_phase(profiler, 'parse'):
+            pass
+        summary = profiler.summary()
+        self.assertEqual({'sweeps': 5}, summary['counters'])
+        self.assertEqual({'count': 2, 'total': 10, 'mean': 5.0, 'min': 3, 'max': 7},
+                         summary['observations']['episode_steps'])
+        self.assertEqual(2, summary['phases']['parse']['calls'])
+        self.assertGreaterEqual(summary['phases']['parse']['seconds'], 0.0)
+        self.assertIn('sweeps', profiler.format_summary())
+        profiler.reset()
+        self.assertEqual({'counters': {}, 'observations': {}, 'phases': {}}, profiler.summary())
+
+    def test_phase_without_profiler_does_nothing(self):
+        with profile_phase(None, 'parse'):
+            pass
+
+    def test_worlds_are_not_profiled_by_default(self):
+        world = World()
+        world.load(default_world)
+        self.assertIsNone(world.profiler)
+
+    def test_context_manager_enables_and_restores(self):
+        with Profiler() as outer:
+            with Profiler() as inner:
+                self.assertIs(inner, World().profiler)
+            self.assertIs(outer, World().profiler)
+        self.assertIsNone(Profiler.active)
+
+    def test_world_phases_and_counters(self):
+        with Profiler() as profiler:
+            world = World()
+            world.load(default_world)
+        world.mdp(n=3)
+        world.mdp(termination_value=0.0001, engine=World.numpy_engine)
+        world.calculate_policy()
+        summary = profiler.summary()
+        sweeps = summary['counters']['sweeps']
+        self.assertGreater(sweeps, 3)
+        self.assertEqual(11 * sweeps, summary['counters']['backups'])
+        self.assertEqual(sweeps * world.transitions.bumps(world._updatable_columns), summary['counters']['wall_bumps'])
+        self.assertEqual(['build', 'parse', 'policy', 'residual', 'sweeps'], sorted(summary['phases']))
+        self.assertEqual(2, summary['phases']['sweeps']['calls'])
+
+    def test_wall_bumps_of_default_world(self):
+        world = World()
+        world.load(default_world)
+        # Corner (0, 0) bumps on up/left/right/down outcomes: left and down walls, 2 outcomes for each action.
+        self.assertEqual(8, world.transitions.bumps(world._updatable_columns[:1]))
+
+    def test_agent_moves_are_counted(self):
+        world = World()
+        world.load(default_world)
+        world.profiler = Profiler()
+        for _ in range(20):
+            world.agent_move(world.field(0, 0), World.down)
+        counters = world.profiler.summary()['counters']
+        self.assertEqual(20, counters['agent_moves'])
+        self.assertGreater(counters['agent_wall_bumps'], 0)
+
+    def test_learning_counts_episodes_and_steps(self):
+        world = World()
+        world.load(default_world)
+        world.profiler = Profiler()
+        agent = QLearningAgent(world, seed=0, planning_steps=4)
+        self.assertEqual(30, agent.learning(30))
+        summary = world.profiler.summary()
+        self.assertEqual(30, summary['counters']['episodes'])
+        self.assertEqual(agent.actions_count.sum(), summary['counters']['steps'])
+        self.assertEqual(30, summary['observations']['episode_steps']['count'])
+        self.assertEqual(summary['counters']['steps'], summary['observations']['episode_steps']['total'])
+        self.assertEqual(4 * summary['counters']['steps'], summary['counters']['planning_updates'])
+        self.assertEqual(1, summary['phases']['learning']['calls'])
+        self.assertEqual(summary['counters']['steps'], summary['phases']['planning']['calls'])
+
+    def test_parallel_learning_counts_steps(self):
+        world = World()
+        world.load(default_world)
+        world.profiler = Profiler()
+        agent = QLearningAgent(world, seed=0)
+        agent.learning(40, parallel_episodes=4)
+        counters = world.profiler.summary()['counters']
+        self.assertEqual(40, counters['episodes'])
+        self.assertEqual(agent.actions_count.sum(), counters['steps'])
+
+    def test_profiled_learning_matches_unprofiled(self):
+        results = []
+        for profiler in (None, Profiler()):
+            world = World()
+            world.load(default_world)
+            world.profiler = profiler
+            agent = QLearningAgent(world, seed=3)
+            agent.learning(50)
+            results.append(str(agent))
+        self.assertEqual(results[0], results[1])
+
+    def test_cprofile_statistics(self):
+        self.assertRaises(ProfilerNotRecordingException, Profiler().stats)
+        with Profiler(cprofile=True) as profiler:
+            world = World()
+            world.load(default_world)
+            world.mdp(n=2)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'mdp.pstats')
+            profiler.dump_stats(filename)
+            functions = [function for _, _, function in pstats.Stats(filename).stats]
+        self.assertIn('_sweep', functions)
@@ -1,7 +1,11 @@
+import os
+import tempfile
 import unittest
 from unittest import mock
 
-from markov_libs import world, QLearningAgent, World
+import numpy as np
+
+from markov_libs import world, QLearningAgent, World, TieBreakingUnknownException
 
 
 class TestQLearningAgent(unittest.TestCase):
@@ -48,4 +52,198 @@ class TestQLearningAgent(unittest.TestCase):
             self.agent.select_exploration_or_exploitation(World.up)
         self.assertAlmostEqual(200, random_action_mock.call_count, delta=40)
 
+    def test_agent_owns_q_table_and_counts(self):
+        self.assertEqual((12, 4), self.agent.q_values.shape)
+        self.assertEqual((12, 4), self.agent.actions_count.shape)
+        self.assertEqual([1.0] * 4, self.agent.q_values[11].tolist())
+        self.assertEqual([0.0] * 4, self.agent.q_values[0].tolist())
+
+    def test_fields_show_agent_q_table(self):
+        self.agent.q_values[0] = [0.1, 0.2, 0.3, 0.4]
+        self.assertEqual([0.1, 0.2, 0.3, 0.4], self.world.field(0, 0).q_values)
+        self.assertEqual(World.down, self.world.field(0, 0).optimal_action())
+        self.world.field(0, 0).set_q_value(World.up, 0.5)
+        self.assertEqual(0.5, self.agent.q_values[0, 0])
+
+    def test_agent_move_counts_actions_in_agent_table(self):
+        self.world.agent_move(self.world.field(0, 0), World.right)
+        self.assertEqual(1, self.agent.actions_count[0, World.action_ids[World.right]])
+
+    def test_learning_updates_q_table_and_counts(self):
+        self.agent.random.seed(0)
+        self.agent.learning(iterations=20)
+        self.assertGreater(self.agent.actions_count.sum(), 0)
+        self.assertEqual(0, self.agent.actions_count[11].sum())
+        visited = self.agent.actions_count > 0
+        self.assertTrue(np.all(self.agent.q_values[visited] != 0.0))
+
+    def test_clean_q_resets_agent_table(self):
+        self.agent.random.seed(0)
+        self.agent.learning(iterations=20)
+        self.world.clean_q()
+        self.assertEqual(0, self.agent.actions_count.sum())
+        self.assertEqual([0.0] * 4, self.agent.q_values[0].tolist())
+        self.assertEqual([1.0] * 4, self.agent.q_values[11].tolist())
+
+    def test_learning_is_reproducible_for_seed(self):
+        self.agent.random.seed(1)
+        self.agent.learning(iterations=50)
+        expected = self.agent.q_values.copy()
+        self.world.clean_q()
+        self.agent.random.seed(1)
+        self.agent.learning(iterations=50)
+        self.assertTrue(np.array_equal(expected, self.agent.q_values))
+
+    def test_agent_shares_random_stream_with_world(self):
+        self.assertIs(self.agent.random, self.world.random)
+
+    def test_learning_is_reproducible_for_agent_seed(self):
+        QLearningAgent(self.world, seed=4).learning(iterations=30)
+        expected = self.world.start_field().q_values
+        self.world.clean_q()
+        QLearningAgent(self.world, seed=4).learning(iterations=30)
+        self.assertEqual(expected, self.world.start_field().q_values)
+
+    def test_agent_without_planning_has_no_replay_buffer(self):
+        self.assertIsNone(self.agent.replay)
+        self.assertEqual(64, QLearningAgent(self.world, replay_capacity=64).replay.capacity)
+
+    def test_learning_records_transitions_in_replay_buffer(self):
+        agent = QLearningAgent(self.world, seed=0, replay_capacity=100000)
+        agent.learning(iterations=5)
+        self.assertEqual(agent.actions_count.sum(), len(agent.replay))
+        self.assertTrue(np.all(agent.actions_count[agent.replay.states, agent.replay.actions] > 0))
+
+    def test_dyna_q_planning_keeps_real_visit_counts(self):
+        agent = QLearningAgent(self.world, seed=0, planning_steps=10)
+        agent.learning(iterations=20)
+        self.assertEqual(agent.actions_count.sum(), len(agent.replay))
+        self.assertEqual([1.0] * 4, agent.q_values[11].tolist())
+
+    def test_dyna_q_planning_propagates_values_faster(self):
+        planning = QLearningAgent(self.world, seed=0, planning_steps=20)
+        planning.learning(iterations=30)
+        planned = planning.q_values[0].max()
+        self.world.clean_q()
+        QLearningAgent(self.world, seed=0).learning(iterations=30)
+        self.assertGreater(planned, self.world.start_field().q_value(self.world.start_field().optimal_action()))
+
+    def test_greedy_cache_follows_q_table(self):
+        for planning_steps in [0, 5]:
+            with self.subTest(planning_steps=planning_steps):
+                self.world.clean_q()
+                agent = QLearningAgent(self.world, seed=4, planning_steps=planning_steps)
+                agent.learning(iterations=50)
+                self.assertEqual(agent.q_values.argmax(axis=1).tolist(), agent.greedy_actions)
+                self.assertEqual(agent.q_values.max(axis=1).tolist(), agent.max_q_values)
+
+    def test_first_tie_breaking_takes_first_action(self):
+        self.agent.refresh_greedy()
+        self.agent._update_greedy(0, 2, 0.0)
+        self.assertEqual(0, self.agent.greedy_actions[0])
+        self.agent.q_values[0, 0] = -0.5
+        self.agent._update_greedy(0, 0, -0.5)
+        self.assertEqual(1, self.agent.greedy_actions[0])
+        self.assertEqual(0.0, self.agent.max_q_values[0])
+
+    def test_random_tie_breaking_is_seeded(self):
+        picks = []
+        for _ in range(2):
+            agent = QLearningAgent(self.world, seed=5, tie_breaking=QLearningAgent.random_tie)
+            agent.refresh_greedy()
+            picks.append(list(agent.greedy_actions))
+        self.assertEqual(picks[0], picks[1])
+        self.assertGreater(len(set(picks[0])), 1)
+        agent.learning(iterations=50)
+        q_values = agent.q_values
+        for state, action in enumerate(agent.greedy_actions):
+            self.assertEqual(q_values[state].max(), q_values[state, action])
+
+    def test_printed_policy_follows_random_tie_breaking(self):
+        agent = QLearningAgent(self.world, seed=5, tie_breaking=QLearningAgent.random_tie)
+        agent.refresh_greedy()
+        actions = [World.actions.index(field.optimal_action()) for field in self.world.all_fields()]
+        self.assertEqual(agent.greedy_actions, actions)
+        agent.q_values[0, 3] = 1.0
+        self.assertEqual(World.down, self.world.field(0, 0).optimal_action())
+
+    def test_refresh_keeps_random_ties_in_step_with_q_table(self):
+        agent = QLearningAgent(self.world, seed=5, tie_breaking=QLearningAgent.random_tie)
+        agent.refresh_greedy()
+        greedy_actions = list(agent.greedy_actions)
+        random_state = agent.random.get_state()
+        agent.refresh_greedy()
+        self.assertEqual(greedy_actions, agent.greedy_actions)
+        self.assertEqual(random_state, agent.random.get_state())
+
+    def test_unknown_tie_breaking(self):
+        self.assertRaises(TieBreakingUnknownException, QLearningAgent, self.world, tie_breaking='last')
+
+    def test_parallel_learning_rejects_random_tie_breaking(self):
+        agent = QLearningAgent(self.world, tie_breaking=QLearningAgent.random_tie)
+        self.assertRaises(AttributeError, agent.learning, 10, parallel_episodes=4)
+
+    def _checkpoint_path(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return os.path.join(directory.name, 'agent.npz')
+
+    def test_checkpoint_restores_learning_state(self):
+        path = self._checkpoint_path()
+        agent = QLearningAgent(self.world, seed=2)
+        agent.learning(iterations=30, checkpoint_path=path, checkpoint_every=10)
+        self.assertEqual(30, agent.episode)
+        restored = QLearningAgent(self.world, seed=9)
+        restored.load_checkpoint(path)
+        self.assertEqual(30, restored.episode)
+        self.assertTrue(np.array_equal(agent.q_values, restored.q_values))
+        self.assertTrue(np.array_equal(agent.actions_count, restored.actions_count))
+
+    def test_resumed_learning_matches_uninterrupted_run(self):
+        for planning_steps, tie_breaking in [(0, QLearningAgent.first_tie), (5, QLearningAgent.first_tie),
+                                             (0, QLearningAgent.random_tie), (5, QLearningAgent.random_tie)]:
+            with self.subTest(planning_steps=planning_steps, tie_breaking=tie_breaking):
+                path = self._checkpoint_path()
+                self.world.clean_q()
+                QLearningAgent(self.world, seed=6, planning_steps=planning_steps, tie_breaking=tie_breaking).learning(
+                    iterations=60, checkpoint_path=path, checkpoint_every=25
+                )
+                expected = np.array([field.q_values for field in self.world.all_fields()])
+                self.world.clean_q()
+                resumed = QLearningAgent(self.world, seed=0, planning_steps=planning_steps, tie_breaking=tie_breaking)
+                resumed.load_checkpoint(path)
+                self.assertEqual(50, resumed.episode)
+                self.assertEqual(60, resumed.learning(iterations=60, resume=True))
+                self.assertTrue(np.array_equal(expected, resumed.q_values))
+
+    def test_parallel_learning_rejects_checkpoints(self):
+        self.assertRaises(
+            AttributeError, self.agent.learning, 10, parallel_episodes=4, checkpoint_path=self._checkpoint_path()
+        )
+
+    def test_attached_agent_shows_running_q_table(self):
+        directory = os.path.dirname(self._checkpoint_path())
+        running = QLearningAgent(self.world, seed=3, directory=directory)
+        running.learning(iterations=20)
+        inspected_world = world.World()
+        with mock.patch('builtins.open', mock.mock_open(read_data=self.mock_file_content), create=True):
+            inspected_world.load('/dev/null')
+        attached = QLearningAgent.attach(inspected_world, directory)
+        self.assertEqual(str(running), str(attached))
+        self.assertTrue(np.array_equal(running.actions_count, attached.actions_count))
+        running.learning(iterations=40, resume=True)
+        self.assertEqual(str(running), str(attached))
+        self.assertFalse(attached.q_values.flags.writeable)
 
+    def test_mapped_q_table_gives_same_results(self):
+        QLearningAgent(self.world, seed=3).learning(iterations=20)
+        in_memory = np.array([field.q_values for field in self.world.all_fields()])
+        directory = os.path.dirname(self._checkpoint_path())
+        self.world.clean_q()
+        agent = QLearningAgent(self.world, seed=3, directory=directory)
+        agent.learning(iterations=20)
+        self.assertIsInstance(agent.q_values, np.memmap)
+        self.assertTrue(np.array_equal(in_memory, agent.q_values))
+        agent.q_values.flush()
+        mapped = np.load(os.path.join(directory, 'q_values.npy'), mmap_mode='r')
+        self.assertTrue(np.array_equal(in_memory, mapped))
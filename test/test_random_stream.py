@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from markov_libs import RandomStream
+
+
+class TestRandomStream(unittest.TestCase):
+    def test_uniforms_follow_generator_across_blocks(self):
+        stream = RandomStream(seed=5, block_size=3)
+        expected = np.random.default_rng(5).random(6).tolist()
+        self.assertEqual(expected, [stream.random() for _ in range(6)])
+
+    def test_integers_are_buffered_per_upper_bound(self):
+        stream = RandomStream(seed=2, block_size=8)
+        actions = [stream.integers(4) for _ in range(100)]
+        self.assertEqual({0, 1, 2, 3}, set(actions))
+        self.assertTrue(all(isinstance(action, int) for action in actions))
+        self.assertTrue(all(0 <= stream.integers(2) < 2 for _ in range(20)))
+
+    def test_same_seed_gives_same_stream(self):
+        first = RandomStream(seed=11)
+        second = RandomStream(seed=11)
+        self.assertEqual([first.random() for _ in range(10)], [second.random() for _ in range(10)])
+        self.assertEqual([first.integers(4) for _ in range(10)], [second.integers(4) for _ in range(10)])
+
+    def test_seed_restarts_stream(self):
+        stream = RandomStream(seed=3)
+        expected = [stream.random() for _ in range(5)] + [stream.integers(4) for _ in range(5)]
+        stream.seed(3)
+        self.assertEqual(expected, [stream.random() for _ in range(5)] + [stream.integers(4) for _ in range(5)])
+
+    def test_state_restores_buffered_stream(self):
+        stream = RandomStream(seed=8, block_size=16)
+        [stream.random() for _ in range(5)]
+        [stream.integers(4) for _ in range(7)]
+        state = stream.get_state()
+        expected = [stream.random() for _ in range(40)] + [stream.integers(4) for _ in range(40)]
+        restored = RandomStream(seed=0, block_size=16)
+        restored.set_state(state)
+        self.assertEqual(expected, [restored.random() for _ in range(40)] + [restored.integers(4) for _ in range(40)])
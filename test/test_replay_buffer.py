@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from markov_libs import ReplayBuffer, ReplayBufferEmptyException
+
+
+class TestReplayBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = ReplayBuffer(3)
+
+    def test_non_positive_capacity_raises_exception(self):
+        self.assertRaises(AttributeError, ReplayBuffer, 0)
+
+    def test_append_fills_preallocated_arrays(self):
+        self.buffer.append(1, 2, -0.04, 5)
+        self.assertEqual(1, len(self.buffer))
+        self.assertEqual((3,), self.buffer.states.shape)
+        self.assertEqual([1, 2, -0.04, 5], [
+            self.buffer.states[0], self.buffer.actions[0], self.buffer.rewards[0], self.buffer.next_states[0]
+        ])
+
+    def test_append_overwrites_oldest_transition(self):
+        for state in range(5):
+            self.buffer.append(state, 0, 0.0, state + 1)
+        self.assertEqual(3, len(self.buffer))
+        self.assertEqual([3, 4, 2], self.buffer.states.tolist())
+
+    def test_sample_returns_stored_transitions(self):
+        for state in range(3):
+            self.buffer.append(state, state, state / 10, state + 1)
+        states, actions, rewards, next_states = self.buffer.sample(50, np.random.default_rng(0))
+        self.assertEqual((50,), states.shape)
+        self.assertEqual(actions.tolist(), states.tolist())
+        self.assertEqual((states + 1).tolist(), next_states.tolist())
+        self.assertTrue(np.allclose(states / 10, rewards))
+
+    def test_sample_from_empty_buffer_raises_exception(self):
+        self.assertRaises(ReplayBufferEmptyException, self.buffer.sample, 1, np.random.default_rng(0))
+        self.buffer.append(0, 0, 0.0, 0)
+        self.buffer.clear()
+        self.assertRaises(ReplayBufferEmptyException, self.buffer.sample, 1, np.random.default_rng(0))
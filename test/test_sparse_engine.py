@@ -0,0 +1,119 @@
+import os
+import unittest.mock
+
+import numpy as np
+
+from markov_libs import ArrayEngine
+from markov_libs import CsrMatrix
+from markov_libs import Field
+from markov_libs import SparseEngine
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+
+
+class TestCsrMatrix(unittest.TestCase):
+    def setUp(self):
+        successors = np.array([[1, 0, 2, 0], [1, 1, 1, 1], [2, 1, 2, 2]])
+        probability = np.array([0.8, 0.1, 0.1, 0.0])
+        self.matrix = CsrMatrix.from_outcomes(successors, probability, np.array([0, 2]), 3)
+
+    def test_from_outcomes_merges_duplicate_outcomes(self):
+        expected = [
+            [0.1, 0.8, 0.1],
+            [0.0, 0.0, 0.0],
+            [0.0, 0.1, 0.9]
+        ]
+        self.assertTrue(np.allclose(expected, self.matrix.toarray()))
+        self.assertEqual(5, self.matrix.nnz)
+
+    def test_indptr_describes_rows(self):
+        self.assertEqual([0, 3, 3, 5], self.matrix.indptr.tolist())
+
+    def test_dot_matches_dense_product(self):
+        vector = np.array([1.0, -2.0, 3.0])
+        self.assertTrue(np.allclose(self.matrix.toarray() @ vector, self.matrix.dot(vector)))
+
+
+class TestSparseEngine(unittest.TestCase):
+    mock_file_content = """
+        title = "default"
+        size = [4, 3]
+        reward = -0.04
+        gamma = 1
+        epsilon = 0
+        probability = [0.8, 0.1, 0.1, 0.0]
+
+        [[state]]
+            s_type = 'S'
+            position = [0, 0]
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 2]
+            value = 1
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 1]
+            value = -1
+
+        [[state]]
+            s_type = 'F'
+            position = [1, 1]
+        """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = World()
+        self.world.load('/dev/null')
+
+    def test_transition_matrices_have_one_matrix_per_action(self):
+        matrices = self.world.transition_matrices()
+        self.assertEqual(len(World.actions), len(matrices))
+        for matrix in matrices:
+            self.assertEqual((12, 12), matrix.shape)
+            self.assertLessEqual(np.diff(matrix.indptr).max(), 4)
+
+    def test_transition_matrix_rows_follow_fields_around(self):
+        fields = self.world.all_fields()
+        up = self.world.transition_matrices()[World.action_ids[World.up]].toarray()
+        expected = np.zeros(len(fields))
+        fields_around = self.world.fields_around(self.world.field(0, 0), World.up)
+        for probability, around in zip(self.world.probability, fields_around):
+            expected[fields.index(around)] += probability
+        self.assertTrue(np.allclose(expected, up[0]))
+
+    def test_terminal_and_forbidden_rows_are_empty(self):
+        for matrix in self.world.transition_matrices():
+            self.assertEqual(0, matrix.indptr[12] - matrix.indptr[11])
+            self.assertEqual(0, matrix.indptr[6] - matrix.indptr[5])
+
+    def test_sparse_backup_matches_array_backup(self):
+        utilities = np.linspace(-1, 1, 12)
+        expected = ArrayEngine(self.world).backup(utilities)
+        calculated = SparseEngine(self.world).backup(utilities)
+        self.assertTrue(np.allclose(expected, calculated))
+
+    def test_mdp_sparse_calculates_correct_policy_for_default_map(self):
+        self.world.mdp(termination_value=0.0001, engine=World.sparse_engine)
+        self.world.calculate_policy(engine=World.sparse_engine)
+        expected_policy = [World.up, World.left, World.left, World.left,
+                           World.up, None, World.up, None,
+                           World.right, World.right, World.right, None]
+        self.assertEqual(expected_policy, [field.policy for field in self.world.all_fields()])
+
+    def test_sparse_engine_gives_same_utilities_as_numpy_engine_on_bundled_world(self):
+        expected = World()
+        expected.load(os.path.join(worlds_directory, 'default4.toml'))
+        expected.mdp(termination_value=1e-9, engine=World.numpy_engine)
+        calculated = World()
+        calculated.load(os.path.join(worlds_directory, 'default4.toml'))
+        calculated.mdp(termination_value=1e-9, engine=World.sparse_engine)
+        for expected_field, calculated_field in zip(expected.all_fields(), calculated.all_fields()):
+            if expected_field.state is not Field.forbidden:
+                self.assertAlmostEqual(expected_field.utility, calculated_field.utility, places=9)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from markov_libs import EpisodeTelemetry
+from markov_libs import ExportFormatUnknownException
+from markov_libs import QLearningAgent
+from markov_libs import World
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+
+
+class TestEpisodeTelemetry(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _agent(self, filename='default.toml'):
+        world = World()
+        world.load(os.path.join(worlds_directory, filename))
+        return QLearningAgent(world, seed=2)
+
+    def test_unknown_format_raises_exception(self):
+        self.assertRaises(ExportFormatUnknownException, EpisodeTelemetry, self._path('out'), 'xls')
+        self.assertRaises(ExportFormatUnknownException, EpisodeTelemetry.read, self._path('out'), 'xls')
+
+    def test_write_schedule_has_to_fit_ring_buffer(self):
+        self.assertRaises(AttributeError, EpisodeTelemetry, capacity=8, write_every=9)
+        self.assertRaises(AttributeError, EpisodeTelemetry, capacity=8, write_every=-1)
+
+    def test_ring_buffer_keeps_latest_episodes(self):
+        telemetry = EpisodeTelemetry(capacity=4)
+        for episode in range(1, 7):
+            telemetry.record(episode, episode * 10, -episode, 0.5 / episode, 0.1)
+        recent = telemetry.recent()
+        self.assertEqual([3, 4, 5, 6], recent['episode'].tolist())
+        self.assertEqual([30, 40, 50, 60], recent['steps'].tolist())
+        self.assertEqual([-3.0, -4.0, -5.0, -6.0], recent['return'].tolist())
+        self.assertEqual(6, telemetry.count)
+
+    def test_rows_are_written_on_schedule(self):
+        telemetry = EpisodeTelemetry(self._path('episodes.csv'), capacity=4, write_every=2).open()
+        telemetry.record(1, 5, -0.2, 0.5, 0.1)
+        self.assertEqual([], EpisodeTelemetry.read(self._path('episodes.csv'))['episode'].tolist())
+        telemetry.record(2, 7, 0.7, 0.25, 0.1)
+        telemetry.record(3, 9, 0.6, 0.125, 0.1)
+        self.assertEqual([1, 2], EpisodeTelemetry.read(self._path('episodes.csv'))['episode'].tolist())
+        telemetry.close()
+        written = EpisodeTelemetry.read(self._path('episodes.csv'))
+        self.assertEqual([1, 2, 3], written['episode'].tolist())
+        self.assertEqual([5, 7, 9], written['steps'].tolist())
+        self.assertEqual([0.5, 0.25, 0.125], written['max_q_delta'].tolist())
+
+    def test_streams_match_ring_buffer(self):
+        for export_format in EpisodeTelemetry.formats:
+            with self.subTest(export_format=export_format):
+                filename = self._path('episodes.' + export_format)
+                agent = self._agent()
+                with EpisodeTelemetry(filename, export_format, capacity=64, write_every=16) as telemetry:
+                    agent.learning(50, telemetry=telemetry)
+                    recent = telemetry.recent()
+                written = EpisodeTelemetry.read(filename, export_format)
+                for column in EpisodeTelemetry.columns:
+                    self.assertTrue(np.array_equal(recent[column], written[column]), column)
+
+    def test_wrapped_ring_buffer_writes_every_episode(self):
+        agent = self._agent()
+        with EpisodeTelemetry(self._path('episodes.npy'), EpisodeTelemetry.npy, capacity=8) as telemetry:
+            agent.learning(30, telemetry=telemetry)
+        written = EpisodeTelemetry.read(self._path('episodes.npy'), EpisodeTelemetry.npy)
+        self.assertEqual(list(range(1, 31)), written['episode'].tolist())
+        self.assertEqual(agent.actions_count.sum(), written['steps'].sum())
+
+    def test_learning_opens_and_closes_telemetry_file(self):
+        for export_format in EpisodeTelemetry.formats:
+            with self.subTest(export_format=export_format):
+                filename = self._path('episodes.' + export_format)
+                agent = self._agent()
+                telemetry = EpisodeTelemetry(filename, export_format, capacity=64)
+                agent.learning(20, telemetry=telemetry)
+                self.assertFalse(telemetry.opened)
+                self.assertEqual(list(range(1, 21)), EpisodeTelemetry.read(filename, export_format)['episode'].tolist())
+                agent.learning(30, telemetry=telemetry, resume=True)
+                written = EpisodeTelemetry.read(filename, export_format)
+                self.assertEqual(list(range(1, 31)), written['episode'].tolist())
+                self.assertEqual(agent.actions_count.sum(), written['steps'].sum())
+
+    def test_learning_flushes_open_telemetry(self):
+        agent = self._agent()
+        with EpisodeTelemetry(self._path('episodes.csv'), capacity=64) as telemetry:
+            agent.learning(20, telemetry=telemetry)
+            self.assertTrue(telemetry.opened)
+            self.assertEqual(20, len(EpisodeTelemetry.read(self._path('episodes.csv'))['episode']))
+
+    def test_learning_records_episode_metrics(self):
+        agent = self._agent()
+        telemetry = EpisodeTelemetry()
+        self.assertEqual(40, agent.learning(40, telemetry=telemetry))
+        recent = telemetry.recent()
+        self.assertEqual(list(range(1, 41)), recent['episode'].tolist())
+        self.assertEqual(agent.actions_count.sum(), recent['steps'].sum())
+        # default.toml: -0.04 for every step, then +1 or -1 on the terminal.
+        terminal_rewards = recent['return'] + 0.04 * recent['steps']
+        self.assertTrue(np.allclose(np.abs(terminal_rewards), 1.0))
+        self.assertTrue(np.all(recent['epsilon'] == agent.world.epsilon))
+        self.assertGreater(recent['max_q_delta'][0], 0.0)
+        self.assertTrue(np.all(recent['max_q_delta'] >= 0.0))
+
+    def test_telemetry_does_not_change_learning(self):
+        plain = self._agent()
+        plain.learning(50)
+        recorded = self._agent()
+        recorded.learning(50, telemetry=EpisodeTelemetry())
+        self.assertEqual(str(plain), str(recorded))
+
+    def test_parallel_episodes_reject_telemetry(self):
+        self.assertRaises(AttributeError, self._agent().learning, 10, parallel_episodes=2,
+                          telemetry=EpisodeTelemetry())
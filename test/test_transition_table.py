@@ -0,0 +1,114 @@
+import unittest.mock
+
+import numpy as np
+
+from markov_libs import Field
+from markov_libs import FieldDoesNotExistException
+from markov_libs import FieldForbiddenException
+from markov_libs import TransitionTable
+from markov_libs import World
+
+
+class TestTransitionTable(unittest.TestCase):
+    modifiers = [
+        ((0, 1), (-1, 0), (1, 0), (0, -1)),
+    ]
+
+    def setUp(self):
+        forbidden = np.array([[False, False, False], [False, True, False]])
+        terminal = np.array([[False, False, True], [False, False, False]])
+        self.table = TransitionTable.compile(forbidden, terminal, self.modifiers, [0.8, 0.1, 0.1, 0.0])
+
+    def test_compile_creates_table_state_action_outcome(self):
+        self.assertEqual((6, 1, 4), self.table.successors.shape)
+        self.assertEqual(6, self.table.size)
+
+    def test_reachable_outcomes_point_to_neighbours(self):
+        self.assertEqual([3, 0, 1, 0], self.table.outcomes(0, 0))
+
+    def test_wall_and_forbidden_bumps_point_to_state_itself(self):
+        self.assertEqual([1, 0, 2, 1], self.table.outcomes(1, 0))
+        self.assertEqual([3, 3, 3, 0], self.table.outcomes(3, 0))
+
+    def test_terminal_state_points_to_itself(self):
+        self.assertEqual([2, 2, 2, 2], self.table.outcomes(2, 0))
+
+    def test_successor_returns_single_outcome(self):
+        self.assertEqual(3, self.table.successor(0, 0, 0))
+
+    def test_sample_outcome_follows_cumulative_probability(self):
+        self.assertEqual(0, self.table.sample_outcome(0.0))
+        self.assertEqual(0, self.table.sample_outcome(0.79))
+        self.assertEqual(1, self.table.sample_outcome(0.85))
+        self.assertEqual(2, self.table.sample_outcome(0.95))
+        self.assertEqual(3, self.table.sample_outcome(1.0))
+
+
+class TestWorldTransitionTable(unittest.TestCase):
+    mock_file_content = """
+        title = "default"
+        size = [4, 3]
+        reward = -0.04
+        gamma = 1
+        epsilon = 0
+        probability = [0.8, 0.1, 0.1, 0.0]
+
+        [[state]]
+            s_type = 'S'
+            position = [0, 0]
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 2]
+            value = 1
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 1]
+            value = -1
+
+        [[state]]
+            s_type = 'F'
+            position = [1, 1]
+        """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = World()
+        self.world.load('/dev/null')
+
+    def test_load_compiles_transition_table(self):
+        self.assertIsInstance(self.world.transitions, TransitionTable)
+        self.assertEqual(12, self.world.transitions.size)
+
+    def test_table_matches_field_allowed_rules(self):
+        modifiers = [
+            (World.x_modifier_front, World.y_modifier_front),
+            (World.x_modifier_left, World.y_modifier_left),
+            (World.x_modifier_right, World.y_modifier_right),
+            (World.x_modifier_back, World.y_modifier_back)
+        ]
+        for field in self.world.all_fields():
+            if field.state is Field.forbidden:
+                continue
+            for action in World.actions:
+                for outcome, (x_modifier, y_modifier) in enumerate(modifiers):
+                    expected = field
+                    if not field.is_terminal():
+                        try:
+                            expected = self.world.field_allowed(
+                                field.x + x_modifier[action], field.y + y_modifier[action]
+                            )
+                        except (FieldDoesNotExistException, FieldForbiddenException):
+                            pass
+                    self.assertIs(expected, self.world.fields_around(field, action)[outcome])
+
+    def test_agent_move_uses_sampled_outcome(self):
+        self.world.random.random = unittest.mock.Mock(return_value=0.85)
+        field = self.world.field(0, 0)
+        self.assertIs(self.world.position_left(field, World.up), self.world.agent_move(field, World.up))
+        self.assertEqual(1, field.get_action_counter_value(World.up))
@@ -0,0 +1,260 @@
+import os
+import tempfile
+import unittest.mock
+
+import numpy as np
+
+from markov_libs import HistoryModeUnknownException
+from markov_libs import HistoryNotRecordedException
+from markov_libs import StorageInUseException
+from markov_libs import UtilityHistory
+from markov_libs import World
+
+
+class TestUtilityHistory(unittest.TestCase):
+    def test_unknown_mode_raises_exception(self):
+        self.assertRaises(HistoryModeUnknownException, UtilityHistory, 2, 'sometimes')
+
+    def test_non_positive_step_raises_exception(self):
+        self.assertRaises(HistoryModeUnknownException, UtilityHistory, 2, UtilityHistory.every, 0)
+
+    def test_full_mode_keeps_whole_history(self):
+        history = UtilityHistory(2)
+        for value in range(10):
+            history.append(1, value)
+        self.assertEqual(list(range(10)), history.values(1))
+        self.assertEqual([], history.values(0))
+
+    def test_last_mode_keeps_two_values(self):
+        history = UtilityHistory(1, UtilityHistory.last)
+        for value in range(10):
+            history.append(0, value)
+        self.assertEqual([8, 9], history.values(0))
+        self.assertEqual(9, history.last_value(0))
+        self.assertEqual(8, history.previous_value(0))
+
+    def test_every_mode_keeps_every_step_value(self):
+        history = UtilityHistory(1, UtilityHistory.every, 3)
+        for value in range(10):
+            history.append(0, value)
+        self.assertEqual([0, 3, 6, 9], history.values(0))
+        self.assertEqual([0, 3, 6], history.iterations(3).tolist())
+
+    def test_last_raises_index_error_when_empty(self):
+        history = UtilityHistory(1)
+        self.assertRaises(IndexError, history.last_value, 0)
+        self.assertRaises(IndexError, history.pop, 0)
+
+    def test_pop_restores_previous_value(self):
+        history = UtilityHistory(1)
+        for value in [1, 2, 3]:
+            history.append(0, value)
+        self.assertEqual(3, history.pop(0))
+        self.assertEqual(2, history.last_value(0))
+        self.assertEqual(1, history.previous_value(0))
+        self.assertEqual([1, 2], history.values(0))
+
+    def test_pop_in_last_mode_forgets_previous_value(self):
+        history = UtilityHistory(1, UtilityHistory.last)
+        for value in [1, 2, 3]:
+            history.append(0, value)
+        history.pop(0)
+        self.assertEqual(2, history.last_value(0))
+        self.assertRaises(IndexError, history.previous_value, 0)
+
+    def test_append_row_appends_to_selected_columns(self):
+        history = UtilityHistory(3)
+        history.append_row(np.array([1.0, 2.0, 3.0]), np.array([0, 2]))
+        history.append_row(np.array([4.0, 5.0, 6.0]), np.array([0, 1, 2]))
+        self.assertEqual([1.0, 4.0], history.values(0))
+        self.assertEqual([5.0], history.values(1))
+        self.assertEqual([3.0, 6.0], history.values(2))
+
+    def test_differences_are_infinite_without_two_values(self):
+        history = UtilityHistory(2)
+        history.append(0, 1.0)
+        history.append(0, 1.5)
+        history.append(1, 1.0)
+        self.assertEqual([0.5, np.inf], history.differences(np.array([0, 1])).tolist())
+
+    def test_last_mode_memory_stays_flat(self):
+        history = UtilityHistory(4, UtilityHistory.last)
+        for value in range(1000):
+            history.append_row(np.full(4, float(value)), np.arange(4))
+        self.assertFalse(history.records_trace)
+        self.assertEqual((2, 4), history._recent.shape)
+
+    def test_trace_raises_exception_in_last_mode(self):
+        history = UtilityHistory(1, UtilityHistory.last)
+        self.assertRaises(HistoryNotRecordedException, history.trace, np.array([0]))
+
+
+class TestMappedUtilityHistory(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_arrays_are_mapped_files(self):
+        history = UtilityHistory(3, directory=self.directory)
+        self.assertIsInstance(history.count, np.memmap)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'trace.npy')))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'latest.npy')))
+
+    def test_attached_history_reads_values_of_writer(self):
+        history = UtilityHistory(3, directory=self.directory)
+        for value in range(10):
+            history.append_row(np.full(3, float(value)), np.arange(3))
+        history.flush()
+        attached = UtilityHistory.attach(self.directory)
+        self.assertEqual(list(map(float, range(10))), attached.values(1))
+        self.assertEqual(9.0, attached.last_value(2))
+        history.append(2, 10.0)
+        self.assertEqual(10.0, attached.last_value(2))
+        self.assertEqual(history.trace(np.arange(3)).tolist(), attached.trace(np.arange(3)).tolist())
+
+    def test_attached_last_mode_has_no_trace(self):
+        history = UtilityHistory(2, UtilityHistory.last, directory=self.directory)
+        history.append(0, 1.5)
+        attached = UtilityHistory.attach(self.directory)
+        self.assertEqual(1.5, attached.last_value(0))
+        self.assertRaises(HistoryNotRecordedException, attached.trace, np.arange(2))
+
+    def test_recorded_history_is_only_replaced_with_overwrite(self):
+        history = UtilityHistory(2, directory=self.directory)
+        history.append(0, 1.5)
+        self.assertRaises(StorageInUseException, UtilityHistory, 2, directory=self.directory)
+        self.assertEqual(1.5, history.last_value(0))
+        self.assertRaises(IndexError, UtilityHistory(2, directory=self.directory, overwrite=True).last_value, 0)
+
+
+class TestWorldUtilityHistory(unittest.TestCase):
+    mock_file_content = """
+        title = "default"
+        size = [4, 3]
+        reward = -0.04
+        gamma = 1
+        epsilon = 0
+        probability = [0.8, 0.1, 0.1, 0.0]
+
+        [[state]]
+            s_type = 'S'
+            position = [0, 0]
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 2]
+            value = 1
+
+        [[state]]
+            s_type = 'T'
+            position = [3, 1]
+            value = -1
+
+        [[state]]
+            s_type = 'F'
+            position = [1, 1]
+        """
+
+    @unittest.mock.patch(
+        'builtins.open',
+        new=unittest.mock.mock_open(read_data=mock_file_content),
+        create=True
+    )
+    def setUp(self):
+        self.world = World()
+        self.world.load('/dev/null')
+
+    def test_fields_share_world_history(self):
+        self.world.field(0, 1).utility = 0.5
+        self.assertEqual([0.5], self.world.history.values(4))
+
+    def test_last_mode_gives_same_utilities(self):
+        self.world.mdp(termination_value=0.0001)
+        expected = [field.utility_history[-1] for field in self.world.all_fields() if field.utility_history]
+        world = World()
+        world.set_history_mode(UtilityHistory.last)
+        with unittest.mock.patch('builtins.open', unittest.mock.mock_open(read_data=self.mock_file_content)):
+            world.load('/dev/null')
+        world.mdp(termination_value=0.0001)
+        calculated = [field.utility_history[-1] for field in world.all_fields() if field.utility_history]
+        self.assertEqual(expected, calculated)
+        self.assertEqual(2, len(world.field(0, 0).utility_history))
+
+    def test_set_history_mode_keeps_retained_values(self):
+        self.world.mdp(n=5)
+        last_utility = self.world.field(0, 0).utility
+        self.world.set_history_mode(UtilityHistory.every, 2)
+        self.assertEqual(last_utility, self.world.field(0, 0).utility)
+        self.assertEqual(UtilityHistory.every, self.world.history.mode)
+
+    def test_generate_gnuplot_file_labels_recorded_iterations(self):
+        self.world.set_history_mode(UtilityHistory.every, 2)
+        self.world.mdp(n=6, engine=World.numpy_engine)
+        mock_file = unittest.mock.mock_open()
+        with unittest.mock.patch('builtins.open', mock_file):
+            self.world.generate_gnuplot_file('/dev/null')
+        lines = ''.join(call.args[0] for call in mock_file().write.call_args_list).splitlines()
+        self.assertEqual(['0', '2', '4'], [line.split()[0] for line in lines[1:]])
+
+    def test_mapped_history_gives_same_results(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        expected_path = os.path.join(directory.name, 'expected')
+        mapped_path = os.path.join(directory.name, 'mapped')
+        self.world.mdp(n=20)
+        self.world.calculate_policy()
+        expected = str(self.world)
+        self.world.generate_gnuplot_file(expected_path)
+        world = World()
+        with unittest.mock.patch('builtins.open', unittest.mock.mock_open(read_data=self.mock_file_content)):
+            world.load('/dev/null')
+        world.set_history_mode(UtilityHistory.full, directory=os.path.join(directory.name, 'history'))
+        world.mdp(n=20)
+        world.calculate_policy()
+        self.assertIsInstance(world.history.count, np.memmap)
+        self.assertEqual(expected, str(world))
+        world.generate_gnuplot_file(mapped_path)
+        with open(expected_path) as expected_file, open(mapped_path) as mapped_file:
+            self.assertEqual(expected_file.read(), mapped_file.read())
+
+    def _mapped_world(self, directory):
+        world = World()
+        with unittest.mock.patch('builtins.open', unittest.mock.mock_open(read_data=self.mock_file_content)):
+            world.load('/dev/null')
+        world.set_history_mode(UtilityHistory.full, directory=directory)
+        return world
+
+    def test_attached_world_follows_running_world(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        running = self._mapped_world(directory.name)
+        running.mdp(n=10)
+        self.world.attach_history(directory.name)
+        self.assertEqual(str(running), str(self.world))
+        self.assertEqual(running.field(0, 0).utility_history, self.world.field(0, 0).utility_history)
+        running.field(0, 0).utility = 0.25
+        self.assertEqual(0.25, self.world.field(0, 0).utility)
+        self.assertRaises(ValueError, self.world.field(0, 0).__setattr__, 'utility', 0.5)
+
+    def test_second_world_does_not_truncate_running_history(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        running = self._mapped_world(directory.name)
+        running.mdp(n=10)
+        counts = running.history.count.tolist()
+        self.assertRaises(StorageInUseException, self._mapped_world, directory.name)
+        self.assertEqual(counts, running.history.count.tolist())
+        running.set_history_mode(UtilityHistory.last, directory=directory.name)
+        self.assertEqual(UtilityHistory.last, running.history.mode)
+
+    def test_history_survives_rebinding_to_same_directory(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        running = self._mapped_world(directory.name)
+        running.mdp(n=5)
+        values = running.field(0, 0).utility_history
+        self.assertEqual(6, len(values))
+        running.set_history_mode(UtilityHistory.full, directory=directory.name)
+        self.assertEqual(values, running.field(0, 0).utility_history)
+        self.assertEqual(values, UtilityHistory.attach(directory.name).values(0))
@@ -390,6 +390,52 @@ class TestWorldLoaded(unittest.TestCase):
         for calculated, expected in zip(calculated_utilities, expected_utilities):
             self.assertAlmostEqual(expected, calculated, places=3)
 
+    def test_mdp_returns_number_of_iterations(self):
+        self.assertEqual(5, self.world.mdp(n=5))
+        self.assertEqual(5, len(self.world.field(3, 2).utility_history))
+
+    def test_mdp_reports_residual_through_callback(self):
+        residuals = []
+        iterations = self.world.mdp(
+            termination_value=0.0001,
+            callback=lambda iteration, residual: residuals.append((iteration, residual))
+        )
+        self.assertEqual(iterations, len(residuals))
+        self.assertEqual(list(range(1, iterations + 1)), [iteration for iteration, _ in residuals])
+        self.assertLess(residuals[-1][1], 0.0001)
+        self.assertGreaterEqual(residuals[-2][1], 0.0001)
+
+    def test_mdp_callback_residual_is_max_utility_change(self):
+        self.world.mdp(n=3)
+        residuals = []
+        self.world.mdp(n=1, callback=lambda iteration, residual: residuals.append(residual))
+        differences = [
+            abs(field.utility_history[-1] - field.utility_history[-2]) for field in self.world.all_fields()
+            if field.state not in [Field.terminal, Field.forbidden]
+        ]
+        self.assertAlmostEqual(max(differences), residuals[0])
+
+    def test_mdp_with_termination_value_does_not_sweep_converged_world(self):
+        self.world.mdp(termination_value=0.0001)
+        self.assertEqual(0, self.world.mdp(termination_value=0.0001))
+
+    def test_mdp_max_error_requires_gamma_below_one(self):
+        self.assertRaises(AttributeError, self.world.mdp, max_error=0.01)
+
+    def test_mdp_rejects_termination_value_with_max_error(self):
+        self.world.gamma = 0.9
+        self.assertRaises(ValueError, self.world.mdp, termination_value=0.0001, max_error=0.01)
+
+    def test_mdp_max_error_uses_error_bound(self):
+        self.world.gamma = 0.9
+        residuals = []
+        self.world.mdp(max_error=0.01, callback=lambda iteration, residual: residuals.append(residual))
+        self.assertLess(residuals[-1], 0.01 * (1 - 0.9) / 0.9)
+        self.assertGreaterEqual(residuals[-2], 0.01 * (1 - 0.9) / 0.9)
+
+    def test_mdp_without_termination_raises_exception(self):
+        self.assertRaises(AttributeError, self.world.mdp)
+
     def test_has__mdp_stop_method(self):
         self.assertTrue(hasattr(self.world, '_mdp_stop'))
 
@@ -490,6 +536,30 @@ class TestWorldLoaded(unittest.TestCase):
         calculated_policy = [field.policy for field in self.world.all_fields()]
         self.assertEqual(expected_policy, calculated_policy)
 
+    def test_policy_iteration_calculates_correct_policy_for_default_map(self):
+        self.world.policy_iteration()
+        expected_policy = [World.up, World.left, World.left, World.left,
+                           World.up, None, World.up, None,
+                           World.right, World.right, World.right, None]
+        calculated_policy = [field.policy for field in self.world.all_fields()]
+        self.assertEqual(expected_policy, calculated_policy)
+
+    def test_policy_iteration_calculates_utilities_correctly(self):
+        self.world.policy_iteration()
+        expected_utilities = [0.705, 0.655, 0.611, 0.388, 0.762, 0.0, 0.660, -1, 0.812, 0.868, 0.918, 1]
+        calculated_utilities = self.world._get_utilities_for_fields(self.world.all_fields())
+        for calculated, expected in zip(calculated_utilities, expected_utilities):
+            self.assertAlmostEqual(expected, calculated, places=3)
+
+    def test_modified_policy_iteration_calculates_correct_policy_for_default_map(self):
+        iterations = self.world.policy_iteration(evaluation_sweeps=3)
+        expected_policy = [World.up, World.left, World.left, World.left,
+                           World.up, None, World.up, None,
+                           World.right, World.right, World.right, None]
+        calculated_policy = [field.policy for field in self.world.all_fields()]
+        self.assertEqual(expected_policy, calculated_policy)
+        self.assertEqual(iterations + 1, len(self.world.field(0, 0).utility_history))
+
     def test_has__calculate_policy_for_field_method(self):
         self.assertTrue(hasattr(self.world, '_calculate_policy_for_field'))
 
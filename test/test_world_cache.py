@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from markov_libs import World
+from markov_libs import WorldCache
+from markov_libs import WorldCacheException
+
+worlds_directory = os.path.join(os.path.dirname(__file__), '..', 'worlds')
+
+
+class TestWorldCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _copy_world(self, name):
+        filename = os.path.join(self.directory, name)
+        shutil.copy(os.path.join(worlds_directory, name), filename)
+        return filename
+
+    def test_cached_world_matches_parsed_world(self):
+        for name in ['default.toml', 'default3.toml', 'default5.toml', 'world2.toml']:
+            with self.subTest(name=name):
+                filename = self._copy_world(name)
+                parsed = World()
+                parsed.load(filename)
+                compiled = World()
+                compiled.load(filename, cache=True)
+                cached = World()
+                cached.load(filename, cache=True)
+                for world in [compiled, cached]:
+                    self.assertEqual(
+                        [(field.state, field.reward, type(field.reward)) for field in parsed.all_fields()],
+                        [(field.state, field.reward, type(field.reward)) for field in world.all_fields()]
+                    )
+                    start = parsed.start_field()
+                    self.assertIs(world.field(start.x, start.y), world.start_field())
+                    self.assertEqual(parsed.title, world.title)
+                    self.assertEqual(parsed.probability, world.probability)
+                    self.assertEqual(parsed.data['reward'], world.data['reward'])
+                    self.assertCountEqual(parsed.data['state'], world.data['state'])
+                parsed.mdp(n=10)
+                cached.mdp(n=10)
+                self.assertEqual(str(parsed), str(cached))
+
+    def test_first_load_writes_cache(self):
+        filename = self._copy_world('default.toml')
+        World().load(filename, cache=True)
+        self.assertTrue(os.path.exists(WorldCache.path_for(filename)))
+        with open(WorldCache.path_for(filename), 'rb') as f:
+            self.assertEqual(WorldCache.magic, f.read(len(WorldCache.magic)))
+
+    def test_valid_cache_skips_parsing(self):
+        filename = self._copy_world('default.toml')
+        World().load(filename, cache=True)
+        with mock.patch('toml.loads') as loads:
+            World().load(filename, cache=True)
+        loads.assert_not_called()
+
+    def test_cache_is_rebuilt_when_source_changes(self):
+        filename = self._copy_world('default.toml')
+        World().load(filename, cache=True)
+        with open(filename) as f:
+            source = f.read()
+        with open(filename, 'w') as f:
+            f.write(source.replace('reward = -0.04', 'reward = -0.5'))
+        world = World()
+        world.load(filename, cache=True)
+        self.assertEqual(-0.5, world.field(1, 0).reward)
+        self.assertEqual(-0.5, WorldCache.read(WorldCache.path_for(filename)).header['reward'])
+
+    def test_corrupt_cache_is_rebuilt(self):
+        filename = self._copy_world('default.toml')
+        with open(WorldCache.path_for(filename), 'wb') as f:
+            f.write(b'garbage')
+        self.assertRaises(WorldCacheException, WorldCache.read, WorldCache.path_for(filename))
+        world = World()
+        world.load(filename, cache=True)
+        self.assertEqual('default', world.title)
+        self.assertEqual('default', WorldCache.read(WorldCache.path_for(filename)).header['title'])
+
+    def test_unwritable_cache_falls_back_to_parsed_world(self):
+        filename = self._copy_world('default.toml')
+        world = World()
+        with mock.patch.object(WorldCache, 'write', side_effect=PermissionError):
+            world.load(filename, cache=True)
+        self.assertEqual('default', world.title)
+        self.assertFalse(os.path.exists(WorldCache.path_for(filename)))
+
+    def test_read_checks_source_hash(self):
+        filename = self._copy_world('default.toml')
+        World().load(filename, cache=True)
+        self.assertRaises(WorldCacheException, WorldCache.read, WorldCache.path_for(filename), 'other')
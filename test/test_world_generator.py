@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from markov_libs import Field
+from markov_libs import World
+from markov_libs import WorldGenerator
+from markov_libs import WorldLayoutUnknownException
+
+
+class TestWorldGenerator(unittest.TestCase):
+    def compiled_world(self, generator: WorldGenerator) -> World:
+        world = World()
+        world.load_compiled(generator.compile())
+        return world
+
+    def test_unknown_layout_raises_exception(self):
+        self.assertRaises(WorldLayoutUnknownException, WorldGenerator, 10, 10, layout='cave')
+
+    def test_world_without_room_for_terminals_raises_exception(self):
+        self.assertRaises(AttributeError, WorldGenerator(2, 1, seed=0, terminals=2).compile)
+        self.assertRaises(AttributeError, WorldGenerator(3, 3, seed=0, forbidden_density=1.0).compile)
+        self.assertRaises(AttributeError, WorldGenerator, 0, 3)
+
+    def test_same_seed_gives_same_world(self):
+        first = WorldGenerator(30, 20, seed=5, specials=3).compile()
+        second = WorldGenerator(30, 20, seed=5, specials=3).compile()
+        other = WorldGenerator(30, 20, seed=6, specials=3).compile()
+        self.assertTrue(np.array_equal(first.states, second.states))
+        self.assertTrue(np.array_equal(first.reward_ids, second.reward_ids))
+        self.assertEqual(first.header, second.header)
+        self.assertFalse(np.array_equal(first.states, other.states))
+
+    def test_open_layout_places_cells(self):
+        world = self.compiled_world(WorldGenerator(
+            60, 50, seed=1, forbidden_density=0.3, terminals=4, specials=5, terminal_rewards=(1, -1, 2)
+        ))
+        board = world.board
+        self.assertEqual((59, 49), (world.max_x, world.max_y))
+        self.assertAlmostEqual(0.3, board.mask(Field.forbidden).mean(), delta=0.03)
+        self.assertEqual(1, board.mask(Field.start).sum())
+        self.assertIs(Field.start, world.start_field().state)
+        terminals = np.flatnonzero(board.mask(Field.terminal))
+        self.assertEqual([-1, 1, 1, 2], sorted(board.reward(index) for index in terminals))
+        specials = np.flatnonzero(board.mask(Field.special))
+        self.assertEqual([-0.5] * 5, [board.reward(index) for index in specials])
+        self.assertEqual(-0.04, world.start_field().reward)
+
+    def test_terminals_are_reachable_from_start(self):
+        for seed in range(5):
+            generator = WorldGenerator(20, 20, seed=seed, forbidden_density=0.45, terminals=3)
+            board = self.compiled_world(generator).board
+            start = board.index(*generator.compile().header['start'])
+            reachable = generator._reachable(~board.mask(Field.forbidden), start)
+            self.assertTrue(set(np.flatnonzero(board.mask(Field.terminal)).tolist()) <= set(reachable))
+
+    def test_maze_layout_is_connected(self):
+        generator = WorldGenerator(21, 15, seed=2, layout=WorldGenerator.maze_layout)
+        board = self.compiled_world(generator).board
+        open_cells = ~board.mask(Field.forbidden)
+        x, y = generator.compile().header['start']
+        self.assertEqual(int(open_cells.sum()), len(generator._reachable(open_cells, board.index(x, y))))
+        # Corridors: the carved cells of a perfect maze on 11 x 8 rooms, walls everywhere else.
+        self.assertEqual(11 * 8 * 2 - 1, open_cells.sum())
+
+    def test_toml_output_loads_into_same_world(self):
+        generator = WorldGenerator(12, 9, seed=3, specials=2, title='generated')
+        with tempfile.TemporaryDirectory() as directory:
+            loaded = World()
+            loaded.load(generator.write(os.path.join(directory, 'generated.toml')))
+        compiled = self.compiled_world(generator)
+        self.assertEqual('generated', loaded.title)
+        self.assertEqual(str(loaded), str(compiled))
+        self.assertTrue(np.array_equal(loaded.board.state_ids, compiled.board.state_ids))
+        self.assertTrue(np.array_equal(loaded.board.rewards(), compiled.board.rewards()))
+        self.assertEqual(loaded.data, compiled.data)
+        loaded.mdp(n=5, engine=World.numpy_engine)
+        compiled.mdp(n=5, engine=World.numpy_engine)
+        self.assertTrue(np.array_equal(loaded.history.latest(), compiled.history.latest(), equal_nan=True))